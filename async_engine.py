@@ -0,0 +1,283 @@
+# async_engine.py
+# asyncio 版引擎：主控制循环、每轮和每个阶段都是协程，等待是可取消的 await；
+# 停止时直接取消主任务，不依赖分散在各处的 running 检查。
+# 游戏内节拍走专用计时路径：asyncio.sleep 到目标前 ASYNC_SPIN 秒，再同步自旋到目标时间。
+# 与线程版 BotEngine 共用配置、时间线编译和统计；start_worker() / headless 均可直接使用。
+
+import asyncio
+import time
+
+from engine import BotEngine, PHASE_STATUS
+from tap_stats import TimingRecorder
+
+ASYNC_SPIN = 0.002       # 事件循环定时器精度较 time.sleep 粗，最后这段改为自旋
+TELEMETRY_INTERVAL = 0.1  # 事件循环延迟采样间隔（秒）
+
+
+def phase_ranges(plan):
+    """按 PHASE 事件把 plan 切成 (阶段名, 起始下标, 结束下标)；开头没有阶段标记的部分记为 None"""
+    from cycle_compiler import ACT_PHASE  # 与引擎一样，第一轮编译时才导入（依赖 NumPy）
+    ranges = []
+    start, name = 0, None
+    for i, (_, action, payload) in enumerate(plan):
+        if action == ACT_PHASE:
+            if i > start or name is not None:
+                ranges.append((name, start, i))
+            start, name = i, payload
+    ranges.append((name, start, len(plan)))
+    return ranges
+
+
+class AsyncBotEngine(BotEngine):
+    """需要真实时钟（asyncio.sleep 不经过 self.clock.sleep），快进模拟请使用线程版"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loop = None
+        self.main_task = None
+        self.loop_lag = TimingRecorder(("lag",), capacity=4096)  # 事件循环唤醒延迟
+
+    # ---------- 入口 ----------
+    def main_control_loop(self):
+        """阻塞运行，直到停止；可直接作为 start_worker() 的线程目标"""
+        asyncio.run(self.run_async())
+
+    async def run_async(self):
+        self.loop = asyncio.get_running_loop()
+        self.main_task = asyncio.current_task()
+        self.calibrate_timer()
+        self.start_metrics()
+        self.start_capture_worker()
+        self.start_session()
+        self.start_profiler()
+        try:
+            await self.control_loop()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.main_task = None
+            self.stop_profiler()
+            self.end_session()
+            self.stop_capture_worker()
+            self.metrics.set("running", 0)
+            self.stop()
+
+    def stop(self):
+        super().stop()
+        # 可能从其它线程调用：取消主任务必须交给事件循环所在线程
+        task, loop = self.main_task, self.loop
+        if task is not None and loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # 事件循环已结束
+
+    async def sleep(self, seconds):
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    async def idle(self, kind, seconds):
+        """休息 / 轮次间延迟 / 出错退避；被取消时也记入会话记录"""
+        self.metrics.set_phase(kind)
+        started = self.clock.time()
+        try:
+            await self.sleep(seconds)
+        finally:
+            elapsed = self.clock.time() - started
+            self.metrics.add_idle(kind, elapsed)
+            if self.session is not None:
+                self.session.add_idle(kind, started, elapsed)
+
+    async def sleep_until(self, deadline):
+        """专用计时路径：返回 (实际时间, sleep 超调)"""
+        clock = self.clock
+        wake = deadline - max(ASYNC_SPIN, clock.spin)
+        overshoot = 0.0
+        remaining = wake - clock.perf_counter()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+            overshoot = clock.perf_counter() - wake
+        return clock.wait_until(deadline), overshoot
+
+    # ---------- 控制循环 ----------
+    async def control_loop(self):
+        while self.running:
+            if self.check_max_loops():
+                break
+            if self.should_take_rest():
+                self.update_status("😴 准备休息：完成当前轮后将休息", "blue")
+                await self.cycle()
+                if not self.running:
+                    break
+                rest_duration = self.get_current_rest_duration()
+                self.update_status(f"⏸️ 正在休息 ({int(rest_duration)} 秒)", "red")
+                await self.idle("rest", rest_duration)
+                self.start_time = self.clock.time()
+                self.current_work_end_time = self.start_time + self.get_current_work_duration()
+                continue
+            await self.cycle()
+            if self.running:
+                await self.idle("delay", self.get_post_cycle_delay())
+
+    async def cycle(self):
+        """一轮：执行时间线的同时并发运行遥测任务"""
+        if not self.running:
+            return
+        self.loop_count += 1
+        self.metrics.set("loop", self.loop_count)
+        self.tap_stats.reset()
+        self.click_stats.reset()
+        self.detect_stats.reset()
+        self.loop_lag.reset()
+        self.state_log = []
+        self.phase_marks = []
+        started = self.clock.time()
+        elapsed_min = int((started - self.start_time) // 60)
+        self.update_info(f"🔄 第 {self.loop_count} 轮\n⏱️  已运行: {elapsed_min} 分钟")
+
+        telemetry = asyncio.ensure_future(self.telemetry())
+        error = None
+        expected = None
+        try:
+            if self.profiler is not None:
+                self.profiler.begin_cycle(self.loop_count)
+            timeline = self.compile_cycle()
+            expected = timeline.duration
+            await self.play(timeline)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"❌ 第 {self.loop_count} 轮出错: {e}")
+        finally:
+            telemetry.cancel()
+            self.report_timing()
+            self.record_cycle(started, error)
+            self.learn_waits()
+            if self.profiler is not None:
+                self.profile_cycle(started)
+        if not self.running:
+            return
+        reasons = self.check_progress(started, expected, error)
+        if reasons and await self.recover(reasons):
+            return
+        if error is not None:
+            await self.idle("backoff", 5)
+
+    async def recover(self, reasons):
+        recovery = self.start_recovery(reasons)
+        if recovery is None:
+            return False
+        spent = 0.0
+        attempts = 0
+        recovered = not self.needs_recovery(recovery)
+        while not recovered and self.running and attempts < int(self.config["recovery_attempts"]):
+            attempts += 1
+            self.state_log = []
+            t0 = self.clock.time()
+            try:
+                await self.play(self.compile_recovery(recovery))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ 恢复流程出错: {e}")
+            spent += self.clock.time() - t0
+            recovered = self.recovered(recovery)
+            if recovered:
+                break
+            await self.idle("backoff", 5)
+        self.end_recovery(reasons, spent, attempts, recovered)
+        return True
+
+    async def telemetry(self):
+        """采样事件循环的唤醒延迟：延迟大说明有同步代码占用了循环，会直接体现为点击抖动"""
+        record = self.loop_lag.record
+        perf_counter = time.perf_counter
+        while True:
+            target = perf_counter() + TELEMETRY_INTERVAL
+            await asyncio.sleep(TELEMETRY_INTERVAL)
+            record(perf_counter() - target)
+
+    # ---------- 阶段 ----------
+    async def play(self, timeline):
+        plan = timeline.plan()
+        self.tap_stats.ensure_capacity(timeline.tap_groups + 16)
+        self.origin = self.game_origin = self.clock.perf_counter()
+        self.taps = self.skipped = 0
+        for name, start, end in phase_ranges(plan):
+            await self.phase(name, plan, start, end)
+        if timeline.game_time:
+            print(f"⏱️ 第 {self.loop_count} 轮: {self.taps} 次全按, 跳过 {self.skipped} 轮")
+
+    async def phase(self, name, plan, start, end):
+        """执行 plan[start:end]；画面等待点的跳转只发生在阶段内部"""
+        from cycle_compiler import ACT_TAP, ACT_CLICK, ACT_UNTIL, ACT_ANCHOR, ACT_DETECT
+        clock = self.clock
+        backend = self.backend
+        hold = self.config["tap_hold_time"]
+        skip_after = self.config["click_interval_in_game"]
+        record_tap = self.tap_stats.record
+        record_click = self.click_stats.record
+        perf_counter = time.perf_counter
+        n = len(plan)
+        i = start
+        while i < end:
+            offset, action, payload = plan[i]
+            i += 1
+            scheduled = self.origin + offset
+            actual, overshoot = await self.sleep_until(scheduled)
+            if action == ACT_TAP:
+                if actual - scheduled > skip_after:
+                    self.skipped += 1
+                    continue
+                burst_time = backend.batch(payload, hold)
+                record_tap(scheduled - self.game_origin, actual - self.game_origin, actual - scheduled,
+                           burst_time, overshoot)
+                self.taps += 1
+            elif action == ACT_CLICK:
+                t0 = perf_counter()
+                backend.click(*payload)
+                record_click(perf_counter() - t0)
+            elif action == ACT_UNTIL:
+                state, jump = payload
+                if self.detector is None or state not in self.detector:
+                    continue
+                timeout = self.origin + plan[i][0] if i < n else actual
+                seen = await self.watch_state(state, timeout)
+                self.state_log.append((state, (seen or clock.perf_counter()) - actual,
+                                       timeout - actual, seen is not None))
+                if seen is not None and jump < n:
+                    self.origin = seen - plan[jump][0]
+                    i = jump
+            elif action == ACT_ANCHOR:
+                continue
+            elif action == ACT_DETECT:
+                # 识别循环本身是同步的紧凑循环，放到线程池执行，避免占住事件循环
+                until = self.origin + plan[i][0] if i < n else actual
+                self.taps += await asyncio.get_running_loop().run_in_executor(
+                    None, self.detect_lanes, self.game_origin, until)
+            else:
+                self.game_origin = scheduled
+                self.phase_marks.append((payload, actual))
+                self.metrics.set_phase(payload)
+                status = PHASE_STATUS.get(payload, "▶️ 第 {n} 轮: " + payload)
+                if status:
+                    self.update_status(status.format(n=self.loop_count))
+
+    async def watch_state(self, state, deadline):
+        """在 deadline 前轮询画面，出现时返回当时的时间，超时返回 None"""
+        clock = self.clock
+        poll = self.config["state_poll_interval"]
+        while True:
+            if self.detector.matches(state):
+                return clock.perf_counter()
+            remaining = deadline - clock.perf_counter()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(poll, remaining))
+
+    def report_timing(self):
+        super().report_timing()
+        if self.loop_lag.count:
+            lag = self.loop_lag.summary()["lag"]
+            print(f"  🔁 事件循环延迟 p99 {lag['p99']:.2f}ms / max {lag['max']:.2f}ms")
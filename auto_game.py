@@ -2,39 +2,13 @@
 
 import tkinter as tk
 from tkinter import ttk, messagebox, Text
-import pyautogui
-import time
-import random
-import json
-import threading
-import os
-
-# ==================== 关键优化：关闭 PyAutoGUI 默认延迟 ====================
-pyautogui.PAUSE = 0  # ⚠️ 必须设置为 0，否则每次操作自动 sleep 0.1 秒！
-pyautogui.FAILSAFE = True
-
-# 默认参数（含新增随机范围）
-DEFAULT_CONFIG = {
-    "click_interval_enter": 0.7,
-    "load_time_before_game": 15.0,
-    "game_duration": 80.0,
-    "load_time_after_game": 12.0,
-    "click_interval_return": 1.5,
-    "click_interval_in_game": 0.167,  # 每轮“全按”间隔（秒）
-    "click_jitter": 2,               # 推荐 2 像素扰动，更自然
-    "time_jitter": 0.005,
-    "max_loops": 10,
-
-    # === 新增：随机时间范围 ===
-    "work_duration_min": 10 * 60,   # 最少工作 10 分钟（秒）
-    "work_duration_max": 20 * 60,   # 最多工作 20 分钟（秒）
-    "rest_duration_min": 30,        # 最少休息 30 秒
-    "rest_duration_max": 180,       # 最多休息 180 秒
-    "post_cycle_delay_min": 2,    # 每轮后最小延迟（秒）
-    "post_cycle_delay_max": 15,    # 每轮后最大延迟（秒）
-}
-
-CONFIG_FILE = "config.json"
+from engine import BotEngine, PositionsError
+from cycle_script import ScriptError
+from chart import ChartError
+from ui_channel import UIChannel
+
+STOP_TIMEOUT = 1.0  # 停止后工作线程超过该时间（秒）仍未退出时提示
+STOP_POLL = 0.05    # 停止后检查工作线程是否已退出的间隔（秒）
 
 # 自定义提示
 CUSTOM_TIPS = """
@@ -44,71 +18,28 @@ CUSTOM_TIPS = """
 """
 
 
-class RhythmGameBot:
-    def __init__(self):
-        self.running = False
-        self.start_time = None
-        self.current_work_end_time = None  # 动态工作周期结束时间
-        self.loop_count = 0
-        self.enter_steps = []
-        self.game_tracks = []
-        self.return_pos = None
-        self.config = DEFAULT_CONFIG.copy()
-        self.load_saved_config()
-        self.load_positions()
-        self.setup_gui()
-
-    def load_saved_config(self):
-        if os.path.exists(CONFIG_FILE):
-            try:
-                with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                    saved = json.load(f)
-                for k in self.config.keys():
-                    if k in saved:
-                        self.config[k] = float(saved[k])
-            except Exception as e:
-                messagebox.showwarning("⚠️ 配置加载失败", f"使用默认值：\n{e}")
-
-    def save_config(self):
+class RhythmGameBot(BotEngine):
+    def __init__(self, backend=None):
+        # 工作线程不直接操作 Tk 控件，所有界面更新经由该通道在主线程执行；
+        # 先于引擎创建，加载配置时的警告先入队，窗口建好后再弹出
+        self.ui = UIChannel()
         try:
-            with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"⚠️ 无法保存配置: {e}")
-
-    def load_positions(self):
-        try:
-            with open("positions.json", "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            if "enter_steps" not in data:
-                raise KeyError("缺少 'enter_steps'")
-            self.enter_steps = [tuple(pos) for pos in data["enter_steps"]]
-            if len(self.enter_steps) != 11:
-                raise ValueError(f"enter_steps 应为11个点，实际有 {len(self.enter_steps)} 个")
-
-            if "track_left" not in data or "track_right" not in data:
-                raise KeyError("缺少 'track_left' 或 'track_right'")
-            left = data["track_left"]
-            right = data["track_right"]
-            x_left, y_left = left
-            x_right, y_right = right
-            y = y_left
-            x_step = (x_right - x_left) / 3
-            self.game_tracks = [(int(x_left + i * x_step), y) for i in range(4)]
-
-            if "return_pos" not in data:
-                raise KeyError("缺少 'return_pos'")
-            self.return_pos = tuple(data["return_pos"])
-
-            print("✅ 坐标加载成功")
-
+            super().__init__(backend)
         except FileNotFoundError:
             messagebox.showerror("❌ 文件未找到", "未找到 positions.json\n请先运行 calibrate.py")
             exit()
-        except Exception as e:
+        except PositionsError as e:
             messagebox.showerror("❌ 加载失败", f"坐标文件错误：\n{e}")
             exit()
+        except ScriptError as e:
+            messagebox.showerror("❌ 加载失败", f"轮次脚本错误：\n{e}")
+            exit()
+        except ChartError as e:
+            messagebox.showerror("❌ 加载失败", f"谱面错误：\n{e}")
+            exit()
+        self.setup_gui()
+        self.ui.root = self.root
+        self.ui.start()
 
     def setup_gui(self):
         self.root = tk.Tk()
@@ -272,18 +203,9 @@ class RhythmGameBot:
         style.configure("TButton", background="#3a3a3a", foreground="white", font=("Arial", 10))
         style.map("TButton", background=[('active', '#4a4a4a')])
 
-    # ==================== 核心优化：快速点击 + 极小延迟 ====================
-    def safe_click(self, pos):
-        x, y = pos
-        jitter_px = int(self.config["click_jitter"])
-        dx = random.randint(-jitter_px, jitter_px)
-        dy = random.randint(-jitter_px, jitter_px)
-        final_pos = (x + dx, y + dy)
-        pyautogui.click(final_pos)
-
     def update_config_from_gui(self):
         try:
-            for key in self.config.keys():
+            for key in self.entries:
                 self.config[key] = float(self.entries[key].get())
             self.save_config()
             return True
@@ -300,10 +222,7 @@ class RhythmGameBot:
         self.btn_start.config(state="disabled")
         self.btn_stop.config(state="normal")
         self.update_status("3秒后开始，切回游戏窗口！", "orange")
-        self.running = True
-        self.loop_count = 0
-        self.start_time = time.time()
-        self.current_work_end_time = self.start_time + self.get_current_work_duration()  # ✅ 设置首次工作结束时间
+        self.begin()
 
         self.countdown(3)
 
@@ -311,139 +230,53 @@ class RhythmGameBot:
         if n > 0:
             self.update_status(f"倒计时 {n} 秒... 切回游戏！", "orange")
             self.root.after(1000, self.countdown, n - 1)
-        else:
+        elif self.running:  # 倒计时期间已按下停止则不再启动
             self.update_status("🎮 自动化已启动", "green")
-            thread = threading.Thread(target=self.main_control_loop, daemon=True)
-            thread.start()
+            self.start_worker()
 
-    def stop(self):
-        self.running = False
+    def reset_buttons(self):
         self.btn_start.config(state="normal")
         self.btn_stop.config(state="disabled")
-        self.update_status("🛑 已停止", "red")
 
+    def stop(self):
+        # 也会在主控制循环结束时由工作线程调用，因此按钮更新同样经由通道；
+        # 主线程不 join 工作线程，由 wait_worker_exit 用 after() 轮询，界面不会卡住
+        super().stop()
+        self.ui.call(self.wait_worker_exit, self.worker_thread, 0.0)
+
+    def wait_worker_exit(self, thread, waited):
+        """在 Tk 线程中轮询工作线程，退出后再恢复按钮（期间已重新开始则不恢复）"""
+        if thread is not None and thread.is_alive():
+            if waited < STOP_TIMEOUT <= waited + STOP_POLL:
+                print("⚠️ 工作线程未能及时退出")
+            self.root.after(int(STOP_POLL * 1000), self.wait_worker_exit, thread, waited + STOP_POLL)
+            return
+        if not self.running:
+            self.reset_buttons()
+            self.update_status("🛑 已停止", "red")
+
+    # 以下钩子可能在工作线程中调用，只入队，不直接操作控件
     def update_status(self, text, color="black"):
-        self.status.config(text=f"状态: {text}", fg=color)
+        self.ui.post("status", self.set_status, text, color)
 
     def update_info(self, text):
+        self.ui.post("info", self.set_info, text)
+
+    def notify(self, title, text):
+        self.ui.call(messagebox.showinfo, title, text)
+
+    def warn(self, title, text):
+        self.ui.call(messagebox.showwarning, title, text)
+
+    def set_status(self, text, color):
+        self.status.config(text=f"状态: {text}", fg=color)
+
+    def set_info(self, text):
         self.info_text.config(state="normal")
         self.info_text.delete("1.0", "end")
         self.info_text.insert("end", text)
         self.info_text.config(state="disabled")
 
-    # === 新增：随机时间生成方法 ===
-    def get_current_work_duration(self):
-        min_sec = self.config["work_duration_min"]
-        max_sec = self.config["work_duration_max"]
-        return random.uniform(min_sec, max_sec)
-
-    def get_current_rest_duration(self):
-        min_sec = self.config["rest_duration_min"]
-        max_sec = self.config["rest_duration_max"]
-        return random.uniform(min_sec, max_sec)
-
-    def get_post_cycle_delay(self):
-        min_sec = self.config["post_cycle_delay_min"]
-        max_sec = self.config["post_cycle_delay_max"]
-        return random.uniform(min_sec, max_sec)
-
-    def should_take_rest(self):
-        """判断是否应该进入休息（基于当前工作周期结束时间）"""
-        return time.time() >= self.current_work_end_time
-
-    def check_max_loops(self):
-        max_loops = int(self.config["max_loops"])
-        if max_loops > 0 and self.loop_count >= max_loops:
-            self.running = False
-            self.update_status(f"✅ 已完成 {max_loops} 轮", "green")
-            messagebox.showinfo("✅", f"已完成 {max_loops} 轮，自动停止")
-            return True
-        return False
-
-    def main_control_loop(self):
-        """主控制循环：完成当前轮次后再决定是否休息"""
-        while self.running:
-            # 检查是否达到最大循环次数
-            if self.check_max_loops():
-                break
-
-            # 检查是否需要休息（但先完成本轮）
-            if self.should_take_rest():
-                self.update_status("😴 准备休息：完成当前轮后将休息", "blue")
-                self.run_single_cycle()
-                if not self.running:
-                    break
-
-                # 执行随机休息
-                rest_duration = self.get_current_rest_duration()
-                self.update_status(f"⏸️ 正在休息 ({int(rest_duration)} 秒)", "red")
-                rest_end = time.time() + rest_duration
-                while self.running and time.time() < rest_end:
-                    time.sleep(1)
-
-                # 休息结束，重置新的工作周期
-                self.start_time = time.time()
-                self.current_work_end_time = self.start_time + self.get_current_work_duration()
-                continue
-
-            # 正常执行一轮
-            self.run_single_cycle()
-
-            # ✅ 每轮结束后加随机延迟
-            if self.running:
-                delay = self.get_post_cycle_delay()
-                time.sleep(delay)
-
-        self.stop()
-
-    def run_single_cycle(self):
-        """执行一次完整的进入-游戏-返回流程"""
-        if not self.running:
-            return
-
-        self.loop_count += 1
-        elapsed_min = int((time.time() - self.start_time) // 60)
-        info = f"🔄 第 {self.loop_count} 轮\n⏱️  已运行: {elapsed_min} 分钟"
-        self.update_info(info)
-
-        try:
-            self.update_status(f"➡️ 第 {self.loop_count} 轮: 进入流程")
-            for pos in self.enter_steps:
-                if not self.running:
-                    return
-                self.safe_click(pos)
-                time.sleep(self.config["click_interval_enter"])
-            time.sleep(self.config["load_time_before_game"])
-
-            self.update_status(f"🎮 第 {self.loop_count} 轮: 游戏中")
-            end_time = time.time() + self.config["game_duration"]
-
-            while time.time() < end_time and self.running:
-                for track in self.game_tracks:
-                    if not self.running:
-                        return
-                    self.safe_click(track)
-                    time.sleep(0.001)
-
-                base = self.config["click_interval_in_game"]
-                jitter = self.config["time_jitter"]
-                sleep_time = random.uniform(base - jitter, base + jitter)
-                time.sleep(max(0.001, sleep_time))
-
-            self.update_status(f"🔚 第 {self.loop_count} 轮: 返回主菜单")
-            time.sleep(self.config["load_time_after_game"])
-            for _ in range(12):
-                if not self.running:
-                    return
-                self.safe_click(self.return_pos)
-                time.sleep(self.config["click_interval_return"])
-
-            time.sleep(1)
-
-        except Exception as e:
-            print(f"❌ 第 {self.loop_count} 轮出错: {e}")
-            time.sleep(5)
-
     def run(self):
         self.root.mainloop()
 
@@ -452,4 +285,4 @@ class RhythmGameBot:
 if __name__ == "__main__":
     print("📌 请确保已为终端/IDE 添加辅助功能权限")
     bot = RhythmGameBot()
-    bot.run()
\ No newline at end of file
+    bot.run()
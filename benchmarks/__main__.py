@@ -0,0 +1,118 @@
+# benchmarks/__main__.py
+# 运行全部基准并输出 JSON：python -m benchmarks [--out 文件] [--baseline 文件]
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+from benchmarks import (bench_adaptive, bench_async, bench_capture, bench_capture_worker, bench_chart, bench_engine, bench_input_record, bench_lane_detect,
+                        bench_metrics, bench_orchestrator, bench_profiling, bench_recovery, bench_schedule, bench_screen_state, bench_startup, bench_stop,
+                        bench_timer_profile, bench_ui_channel)
+
+MODULES = {
+    "engine": bench_engine,
+    "schedule": bench_schedule,
+    "screen_state": bench_screen_state,
+    "capture": bench_capture,
+    "capture_worker": bench_capture_worker,
+    "chart": bench_chart,
+    "lane_detect": bench_lane_detect,
+    "ui_channel": bench_ui_channel,
+    "startup": bench_startup,
+    "async": bench_async,
+    "adaptive": bench_adaptive,
+    "recovery": bench_recovery,
+    "metrics": bench_metrics,
+    "orchestrator": bench_orchestrator,
+    "input_record": bench_input_record,
+    "timer_profile": bench_timer_profile,
+    "profiling": bench_profiling,
+    "stop": bench_stop,
+}
+
+
+def lookup(result, path):
+    for key in path.split("."):
+        result = result[key]
+    return result
+
+
+def compare(results, baseline):
+    """按各模块的 CHECKS 与基线比较，返回退化项列表"""
+    failures = []
+    for name, module in MODULES.items():
+        if name not in results or name not in baseline:
+            continue
+        for path, direction, tolerance in getattr(module, "CHECKS", []):
+            try:
+                new = lookup(results[name], path)
+                old = lookup(baseline[name], path)
+            except KeyError:
+                continue
+            if direction == "higher":
+                bad = new < old * (1 - tolerance)
+            else:
+                bad = new > old * (1 + tolerance)
+            if bad:
+                failures.append(f"{name}.{path}: {old:.4g} -> {new:.4g}")
+    return failures
+
+
+def check_limits(results):
+    """检查各模块 LIMITS 中的硬性上限，返回超限项列表"""
+    failures = []
+    for name, module in MODULES.items():
+        if name not in results:
+            continue
+        for path, limit in getattr(module, "LIMITS", []):
+            value = lookup(results[name], path)
+            if value > limit:
+                failures.append(f"{name}.{path}: {value:.4g} > {limit:.4g}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="节奏游戏自动化引擎基准（无界面，使用记录后端）")
+    parser.add_argument("--only", nargs="*", choices=sorted(MODULES), help="只运行指定模块")
+    parser.add_argument("--game-duration", type=float, default=10.0, help="单轮游戏时长（秒）")
+    parser.add_argument("--samples", type=int, default=3, help="停止延迟采样次数")
+    parser.add_argument("--out", help="结果 JSON 输出路径（默认输出到标准输出）")
+    parser.add_argument("--baseline", help="基线 JSON，指标退化超过容差时返回非零")
+    args = parser.parse_args()
+
+    results = {
+        "_meta": {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        }
+    }
+    for name in args.only or MODULES:
+        print(f"⏱️ 运行基准: {name}", file=sys.stderr)
+        results[name] = MODULES[name].run(args)
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"💾 结果已保存: {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+    failures = check_limits(results)
+    for line in failures:
+        print(f"❌ 超限: {line}", file=sys.stderr)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f))
+        for line in regressions:
+            print(f"❌ 退化: {line}", file=sys.stderr)
+        failures += regressions
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
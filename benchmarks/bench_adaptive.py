@@ -0,0 +1,93 @@
+# benchmarks/bench_adaptive.py
+# 自适应等待基准：虚拟时钟上模拟加载 / 结算画面按随机时间出现、偶尔识别失败，
+# 比较固定等待和学到的等待下每轮耗时（识别正常时画面一出现就继续，差别只在识别失败的轮次；
+# 不使用画面识别时全部按等待上限执行，差别最大），以及超时次数
+
+import random
+
+from benchmarks.common import make_engine, quiet
+from phase_model import PhaseModel
+from timing import VirtualClock
+
+CHECKS = [
+    ("learned.cycle_s.mean", "lower", 0.05),
+    ("blind_learned.cycle_s.mean", "lower", 0.05),
+]
+
+LOAD_TIMES = {"game": (6.0, 0.6), "return": (3.0, 0.4)}  # 画面出现时间 (均值, 标准差)，秒
+MISS_RATE = 0.02  # 画面识别失败（一直等到超时）的比例
+
+
+class TimedDetector:
+    """画面在首次询问后经过随机时间出现；每轮开始时 reset()"""
+
+    def __init__(self, clock, rng):
+        self.clock = clock
+        self.rng = rng
+        self.pending = {}
+
+    def __contains__(self, state):
+        return state in LOAD_TIMES
+
+    def reset(self):
+        self.pending = {}
+
+    def matches(self, state):
+        now = self.clock.time()
+        if state not in self.pending:
+            mean, sd = LOAD_TIMES[state]
+            missed = self.rng.random() < MISS_RATE
+            self.pending[state] = float("inf") if missed else now + max(0.1, self.rng.gauss(mean, sd))
+        return now >= self.pending[state]
+
+
+CONFIG = dict(load_time_before_game=15.0, load_time_after_game=8.0, game_duration=1.0,
+              click_interval_enter=0.1, click_interval_return=0.2)
+
+
+def run_cycles(cycles, model, seed, detect=True):
+    engine = make_engine(**CONFIG)
+    engine.clock = VirtualClock()
+    engine.detector = TimedDetector(engine.clock, random.Random(seed)) if detect else None
+    engine.phase_model = model
+    engine.begin()
+    durations = []
+    misses = 0
+    with quiet():
+        for _ in range(cycles):
+            if detect:
+                engine.detector.reset()
+            t0 = engine.clock.time()
+            engine.run_single_cycle()
+            durations.append(engine.clock.time() - t0)
+            misses += sum(1 for state, _, _, seen in engine.state_log if not seen)
+    return durations, misses
+
+
+def summary(durations, misses):
+    return {
+        "cycles": len(durations),
+        "cycle_s": {"mean": sum(durations) / len(durations), "max": max(durations)},
+        "timeouts": misses,
+    }
+
+
+def run(args):
+    cycles = 400
+    fixed = run_cycles(cycles, None, seed=1)
+    model = PhaseModel()
+    learned = run_cycles(cycles, model, seed=1)
+    # 学到的值用于不做画面识别的运行（按等待上限执行）
+    blind_fixed = run_cycles(cycles // 4, None, seed=2, detect=False)
+    blind_learned = run_cycles(cycles // 4, model, seed=2, detect=False)
+    result = {
+        "fixed": summary(*fixed),
+        "learned": summary(*learned),
+        "blind_fixed": summary(*blind_fixed),
+        "blind_learned": summary(*blind_learned),
+        "learned_waits": {param: model.limit(param, CONFIG[param], 1.0, 20) for param in model.waits},
+    }
+    for name in ("", "blind_"):
+        result[f"{name}cycle_time_saved"] = (1 - result[f"{name}learned"]["cycle_s"]["mean"]
+                                             / result[f"{name}fixed"]["cycle_s"]["mean"])
+    return result
@@ -0,0 +1,57 @@
+# benchmarks/bench_async.py
+# asyncio 版与线程版引擎对比：同一轮游戏的点击抖动、CPU 开销，以及停止延迟
+
+import asyncio
+import time
+
+from async_engine import AsyncBotEngine
+from benchmarks.bench_engine import stop_latency
+from benchmarks.common import FAST_CONFIG, POSITIONS, distribution, make_engine, quiet
+from input_backend import RecordingBackend
+
+CHECKS = [
+    ("async.lateness_ms.p99", "lower", 1.0),
+    ("async.cpu_per_game_second", "lower", 0.5),
+]
+
+LIMITS = [
+    ("async_stop_latency_ms.max", 50.0),
+]
+
+
+def make_async_engine(**overrides):
+    with quiet():
+        return AsyncBotEngine(RecordingBackend(), config=dict(FAST_CONFIG, **overrides), positions_file=POSITIONS)
+
+
+def measure(engine, run, game_duration):
+    engine.begin()
+    cpu0 = time.process_time()
+    with quiet():
+        run()
+    cpu = time.process_time() - cpu0
+    stats = engine.tap_stats
+    return {
+        "rounds": stats.count,
+        "lateness_ms": distribution(stats.column("lateness")),
+        "overshoot_ms": distribution(stats.column("overshoot")),
+        "cpu_per_game_second": cpu / game_duration,
+    }
+
+
+def run(args):
+    duration = args.game_duration
+    threaded = make_engine(game_duration=duration)
+    result = {"thread": measure(threaded, threaded.run_single_cycle, duration)}
+
+    engine = make_async_engine(game_duration=duration)
+    result["async"] = measure(engine, lambda: asyncio.run(engine.cycle()), duration)
+    result["async"]["loop_lag_ms"] = distribution(engine.loop_lag.column("lag"))
+
+    latencies = []
+    for i in range(args.samples):
+        latencies.append(stop_latency(make_async_engine(game_duration=5.0), 0.3 + 0.05 * i))
+        latencies.append(stop_latency(make_async_engine(game_duration=5.0, load_time_before_game=15.0),
+                                      0.3 + 0.05 * i))
+    result["async_stop_latency_ms"] = distribution(latencies)
+    return result
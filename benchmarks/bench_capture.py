@@ -0,0 +1,61 @@
+# benchmarks/bench_capture.py
+# 区域截图基准：fake 后端上的帧率 / 延迟、每帧新分配的内存，以及与“整屏截图再裁剪”的对比
+
+import time
+import tracemalloc
+
+import numpy as np
+
+from capture import FakeBackend, RegionCapture
+from screen_state import region_around
+
+CHECKS = [
+    ("roi.fps", "higher", 0.5),
+    ("roi.latency_ms_p99", "lower", 1.0),
+]
+
+SCREEN = (1080, 1920, 3)
+# 判定线细长条 + 三个画面指纹
+REGIONS = {
+    "judge_line": (400, 700, 900, 8),
+    "game": region_around(1800, 60),
+    "return": region_around(960, 950),
+    "menu": region_around(150, 980),
+}
+
+
+def measure(grab_all, n):
+    grab_all()  # 预热
+    t0 = time.perf_counter()
+    for _ in range(n):
+        grab_all()
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(n):
+        grab_all()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    grown = sum(stat.size_diff for stat in after.compare_to(before, "filename") if stat.size_diff > 0)
+    return {"fps": n / elapsed, "alloc_bytes_per_frame": grown / n}
+
+
+def run(args):
+    frame = np.random.default_rng(0).integers(0, 256, SCREEN, dtype=np.uint8)
+    cap = RegionCapture(FakeBackend(frame))
+    for name, region in REGIONS.items():
+        cap.register(name, region)
+    buffers = {name: id(buf) for name, buf in cap.buffers.items()}
+
+    n = 2000
+    roi = measure(cap.grab_all, n)
+    roi.update(cap.stats())
+    roi["buffers_reused"] = all(id(buf) == buffers[name] for name, buf in cap.grab_all().items())
+
+    # 对照：每帧复制整屏（相当于 pyautogui.screenshot()）再裁剪
+    def full_screen():
+        shot = frame.copy()
+        return {name: shot[t:t + h, l:l + w] for name, (l, t, w, h) in REGIONS.items()}
+
+    full = measure(full_screen, 200)
+    return {"roi": roi, "full_screen": full, "speedup": roi["fps"] / full["fps"]}
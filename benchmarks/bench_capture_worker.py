@@ -0,0 +1,110 @@
+# benchmarks/bench_capture_worker.py
+# 识别进程基准：截图本身占用 GIL（模拟 pyautogui / PIL 转换这类纯 Python 开销）时，
+# 比较同进程识别和独立进程识别下点击线程每次 poll 被占用的时间、命中率、截图到按下的延迟，
+# 以及环形缓冲区的丢帧数和帧龄
+
+import time
+
+import numpy as np
+
+from benchmarks.common import distribution, make_engine, quiet
+from capture import FakeBackend, RegionCapture
+from input_backend import PRESS
+from lane_detector import SyntheticNotes
+
+CHECKS = [
+    ("worker.hit_rate", "higher", 0.05),
+    ("worker.poll_ms.p99", "lower", 1.0),
+    ("worker.age_ms.p99", "lower", 1.0),
+]
+
+NOTE_WIDTH = 0.05
+GRAB_COST = 0.002  # 每帧截图额外占用 GIL 的时间（秒）
+
+
+class SlowSource:
+    """在 SyntheticNotes 前加一段持有 GIL 的忙等，模拟较慢的截图后端"""
+
+    def __init__(self, notes, cost):
+        self.notes = notes
+        self.cost = cost
+
+    def __call__(self):
+        deadline = time.perf_counter() + self.cost
+        while time.perf_counter() < deadline:
+            pass
+        return self.notes()
+
+
+def slow_notes(tracks, notes, start, cost):
+    """识别进程中调用的帧源工厂：音符时间以引擎给出的 start 为零点"""
+    screen = SyntheticNotes(tracks, notes, width=NOTE_WIDTH)
+    screen.start = start
+    return SlowSource(screen, cost)
+
+
+def make_notes(tracks, duration, rng):
+    notes = []
+    last = [-1.0] * len(tracks)
+    for t in np.sort(rng.uniform(1.0, duration - 0.2, int(duration * 6))).tolist():
+        lane = int(rng.integers(len(tracks)))
+        if t - last[lane] >= 0.15:
+            notes.append((t, lane))
+            last[lane] = t
+    return notes
+
+
+def score(engine, tracks, notes, start):
+    xs = {x: lane for lane, (x, _) in enumerate(tracks)}
+    presses = [(ts - start, xs[x]) for ts, action, x, _ in engine.backend.events if action == PRESS]
+    hits, used = 0, set()
+    for t, lane in notes:
+        for k, (pt, pl) in enumerate(presses):
+            if pl == lane and k not in used and t <= pt < t + NOTE_WIDTH:
+                hits += 1
+                used.add(k)
+                break
+    return {
+        "hit_rate": hits / len(notes) if notes else 0.0,
+        "false_taps": len(presses) - len(used),
+        "poll_ms": distribution(engine.detect_stats.column("process")),
+        "latency_ms": distribution(engine.tap_stats.column("lateness")),
+    }
+
+
+def run_case(duration, notes, use_worker):
+    engine = make_engine(game_mode="detect", capture_worker=int(use_worker))
+    tracks = engine.game_tracks
+    start = engine.clock.perf_counter() + (3.0 if use_worker else 0.5)
+    if use_worker:
+        from capture_worker import CaptureWorker
+        cfg = engine.config
+        engine.capture_worker = CaptureWorker((slow_notes, (tracks, notes, start, GRAB_COST)), tracks,
+                                              cfg["detect_threshold"], cfg["detect_min_interval"],
+                                              cfg["detect_y_offset"], cfg["detect_fps"])
+        if not engine.capture_worker.wait_ready():
+            raise RuntimeError("识别进程未能就绪")
+    else:
+        engine.capture = RegionCapture(FakeBackend(slow_notes(tracks, notes, start, GRAB_COST)))
+    engine.begin()
+    time.sleep(max(0.0, start - engine.clock.perf_counter()))
+    try:
+        with quiet():
+            engine.detect_lanes(start, start + duration)
+        result = score(engine, tracks, notes, start)
+        if use_worker:
+            s = engine.capture_worker.stats()
+            result.update(frames=s["frames"], dropped=s["dropped"],
+                          age_ms={"p50": s["age_ms_p50"], "p99": s["age_ms_p99"], "max": s["age_ms_max"]})
+        return result
+    finally:
+        engine.stop_capture_worker()
+
+
+def run(args):
+    duration = args.game_duration
+    engine = make_engine(game_mode="detect")
+    notes = make_notes(engine.game_tracks, duration, np.random.default_rng(0))
+    inline = run_case(duration, notes, use_worker=False)
+    worker = run_case(duration, notes, use_worker=True)
+    return {"notes": len(notes), "grab_cost_ms": GRAB_COST * 1000, "inline": inline, "worker": worker}
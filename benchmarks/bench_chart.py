@@ -0,0 +1,65 @@
+# benchmarks/bench_chart.py
+# 谱面调度基准：与固定间隔全按相比的按下次数，以及按谱面执行一轮时的延迟
+
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import distribution, make_engine, quiet
+from chart import load_chart
+from cycle_compiler import compile_cycle
+from input_backend import PRESS
+
+CHECKS = [
+    ("event_reduction", "higher", 0.1),
+    ("lateness_ms.p99", "lower", 1.0),
+]
+
+
+def synthetic_chart(path, duration, rng, nps=5.0, chord=0.15):
+    """平均每秒 nps 个音符，其中 chord 比例为双押；12 轨谱面，映射到 4 条轨道"""
+    n = int(duration * nps)
+    times = np.sort(rng.uniform(0.5, duration, n)).round(3)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("time,lane\n")
+        for t in times:
+            lanes = rng.choice(12, 2 if rng.random() < chord else 1, replace=False)
+            for lane in lanes:
+                f.write(f"{t},{lane}\n")
+
+
+def run(args):
+    rng = np.random.default_rng(0)
+    duration = args.game_duration
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "chart.csv")
+        synthetic_chart(path, duration, rng)
+        chart = load_chart(path)
+        engine = make_engine(game_duration=duration, chart_file=path)
+
+        periodic = compile_cycle(engine.config, engine.script, engine.points, engine.game_tracks)
+        charted = engine.compile_cycle()
+        t0 = time.perf_counter()
+        for _ in range(20):
+            engine.compile_cycle()
+        compile_ms = (time.perf_counter() - t0) / 20 * 1000
+
+        engine.begin()
+        with quiet():
+            engine.run_single_cycle()
+        stats = engine.tap_stats
+        taps = engine.backend.count(PRESS) - engine.click_stats.count  # 去掉进入 / 返回流程的点击
+
+    periodic_taps = periodic.summary()["taps"]
+    charted_taps = charted.summary()["taps"]
+    return {
+        "notes": len(chart),
+        "periodic_taps": periodic_taps,
+        "chart_taps": charted_taps,
+        "event_reduction": periodic_taps / charted_taps if charted_taps else 0.0,
+        "compile_ms": compile_ms,
+        "executed_taps": taps,
+        "lateness_ms": distribution(stats.column("lateness")),
+    }
@@ -0,0 +1,89 @@
+# benchmarks/bench_engine.py
+# 引擎热路径基准：实际点击速率、调度误差、每秒游戏时间的 CPU 开销、停止延迟
+
+import time
+
+from benchmarks.common import make_engine, quiet, distribution
+
+# (指标路径, 方向, 允许的相对退化) —— 供 --baseline 回归比较
+CHECKS = [
+    ("cycle.rate_ratio", "higher", 0.02),
+    ("cycle.lateness_ms.p99", "lower", 1.0),
+    ("cycle.cpu_per_game_second", "lower", 0.5),
+    ("control_loop.stop_latency_ms.max", "lower", 1.0),
+]
+
+# (指标路径, 上限) —— 每次运行都检查的硬性要求
+LIMITS = [
+    ("control_loop.stop_latency_ms.max", 50.0),
+]
+
+
+def bench_cycle(game_duration):
+    """跑一次 run_single_cycle，统计实际 / 配置的全按频率和调度误差"""
+    engine = make_engine(game_duration=game_duration)
+    engine.begin()
+    cpu0 = time.process_time()
+    with quiet():
+        engine.run_single_cycle()
+    cpu = time.process_time() - cpu0
+
+    stats = engine.tap_stats
+    rounds = stats.count
+    configured = 1.0 / engine.config["click_interval_in_game"]
+    achieved = rounds / game_duration
+    return {
+        "game_duration": game_duration,
+        "rounds": rounds,
+        "presses_total": engine.backend.count(),
+        "configured_rounds_per_s": configured,
+        "achieved_rounds_per_s": achieved,
+        "rate_ratio": achieved / configured,
+        "lateness_ms": distribution(stats.column("lateness")),
+        "burst_ms": distribution(stats.column("burst")),
+        "overshoot_ms": distribution(stats.column("overshoot")),
+        "cpu_per_game_second": cpu / game_duration,
+    }
+
+
+def stop_latency(engine, run_for):
+    """在 main_control_loop 运行 run_for 秒后停止，返回从 stop() 到线程退出的时间"""
+    engine.begin()
+    with quiet():
+        engine.start_worker()
+        time.sleep(run_for)
+        t0 = time.perf_counter()
+        engine.stop()
+        if not engine.join_worker(timeout=30):
+            raise RuntimeError("工作线程未退出")
+    return time.perf_counter() - t0
+
+
+def bench_control_loop(samples):
+    """在游戏阶段、加载等待、轮次间延迟和出错退避中分别按下停止，统计停止延迟"""
+    cases = {
+        "in_game": dict(game_duration=5.0),
+        "in_wait": dict(game_duration=5.0, load_time_before_game=15.0),
+        "in_delay": dict(game_duration=0.2, post_cycle_delay_min=15.0, post_cycle_delay_max=15.0),
+        "in_backoff": dict(game_duration=0.2),
+    }
+    latencies = {name: [] for name in cases}
+    for i in range(samples):
+        for name, overrides in cases.items():
+            engine = make_engine(**overrides)
+            if name == "in_backoff":
+                # 引用不存在的参数，编译时报错，进入 5 秒出错退避
+                engine.script = {"phases": [{"name": "broken", "type": "wait", "duration": "missing_key"}]}
+            latencies[name].append(stop_latency(engine, 0.5 + 0.05 * i))
+    result = {"samples": samples,
+              "stop_latency_ms": distribution([v for values in latencies.values() for v in values])}
+    for name, values in latencies.items():
+        result[f"stop_latency_{name}_ms"] = distribution(values)
+    return result
+
+
+def run(args):
+    return {
+        "cycle": bench_cycle(args.game_duration),
+        "control_loop": bench_control_loop(args.samples),
+    }
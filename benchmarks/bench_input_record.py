@@ -0,0 +1,93 @@
+# benchmarks/bench_input_record.py
+# 输入录制基准：每个事件的写入开销和文件大小、打开 / 统计长录制的耗时与内存，
+# 以及经记录后端回放时每个事件相对录制时间的误差
+
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import distribution
+from input_backend import RecordingBackend
+from input_record import MOUSE_DOWN, MOUSE_UP, MOVE, LEFT, InputRecorder, load, replay, summarize
+
+CHECKS = [
+    ("record_us.p99", "lower", 1.0),
+    ("replay.lateness_ms.p95", "lower", 1.0),
+]
+
+# 按 p95 限制：少数几次被系统抢占的唤醒决定 p99 / max，和回放本身无关
+LIMITS = [
+    ("replay.lateness_ms.p95", 2.0),
+]
+
+EVENTS = 200_000      # 写入 / 读取用的事件数（约相当于一小时的鼠标移动）
+REPLAY_CLICKS = 1000  # 回放的点击数（约 5 秒）
+CLICK_GAP_NS = 5_000_000
+
+
+def fake_clock(step_ns):
+    t = [0]
+
+    def clock_ns():
+        t[0] += step_ns
+        return t[0]
+    return clock_ns
+
+
+def run(args):
+    directory = tempfile.mkdtemp()
+    big = os.path.join(directory, "big.pjrec")
+    small = os.path.join(directory, "clicks.pjrec")
+    try:
+        # 写入：每次 record() 的耗时（包括攒满一块后的写盘）
+        recorder = InputRecorder(big, clock_ns=fake_clock(1_000_000)).open()
+        costs = []
+        perf_counter = time.perf_counter
+        for i in range(EVENTS):
+            t0 = perf_counter()
+            recorder.record(MOVE, i % 1920, i % 1080)
+            costs.append(perf_counter() - t0)
+        recorder.close()
+        size = os.path.getsize(big)
+
+        # 打开 + 按块统计
+        t0 = perf_counter()
+        _, records = load(big)
+        opened = perf_counter() - t0
+        info = summarize(records)
+        summarized = perf_counter() - t0 - opened
+        del records
+
+        # 回放：间隔 5ms 的左键按下 / 抬起交替
+        recorder = InputRecorder(small, clock_ns=fake_clock(CLICK_GAP_NS)).open()
+        for i in range(REPLAY_CLICKS):
+            recorder.record(MOUSE_DOWN if i % 2 == 0 else MOUSE_UP, 100 + i % 4, 200, LEFT)
+        recorder.close()
+        _, records = load(small)
+        backend = RecordingBackend()
+        stats = replay(records, backend)
+        actual = np.array([t for t, _, _, _ in backend.events])
+        gaps = np.diff(actual) - CLICK_GAP_NS / 1e9
+        del records
+    finally:
+        for path in (big, small):
+            if os.path.exists(path):
+                os.remove(path)
+        os.rmdir(directory)
+
+    return {
+        "events": EVENTS,
+        "bytes_per_event": (size - 32) / EVENTS,
+        "record_us": distribution(costs, scale=1e6),
+        "open_ms": opened * 1000,
+        "summarize_ms": summarized * 1000,
+        "summarized_events": info["events"],
+        "replay": {
+            "events": stats.count,
+            "lateness_ms": distribution(stats.column("lateness")),
+            "overshoot_ms": distribution(stats.column("overshoot")),
+            "gap_error_ms": distribution(np.abs(gaps).tolist()),
+        },
+    }
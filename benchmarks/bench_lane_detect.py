@@ -0,0 +1,62 @@
+# benchmarks/bench_lane_detect.py
+# 判定线识别基准：合成音符帧上的命中率、误按、截图到按下的延迟和识别帧率
+
+import numpy as np
+
+from benchmarks.common import distribution, make_engine, quiet
+from capture import FakeBackend, RegionCapture
+from input_backend import PRESS
+from lane_detector import SyntheticNotes
+
+CHECKS = [
+    ("hit_rate", "higher", 0.05),
+    ("latency_ms.p99", "lower", 1.0),
+    ("fps", "higher", 0.5),
+]
+
+NOTE_WIDTH = 0.05  # 音符经过判定线的时长（秒）
+
+
+def run(args):
+    rng = np.random.default_rng(0)
+    duration = args.game_duration
+    engine = make_engine(game_mode="detect")
+    tracks = engine.game_tracks
+    # 平均每秒 6 个音符，同一轨道间隔至少 0.15 秒
+    notes = []
+    last = [-1.0] * len(tracks)
+    for t in np.sort(rng.uniform(0.5, duration - 0.2, int(duration * 6))).tolist():
+        lane = int(rng.integers(len(tracks)))
+        if t - last[lane] >= 0.15:
+            notes.append((t, lane))
+            last[lane] = t
+
+    screen = SyntheticNotes(tracks, notes, width=NOTE_WIDTH)
+    engine.capture = RegionCapture(FakeBackend(screen))
+    engine.begin()
+    start = screen.start = engine.clock.perf_counter()
+    with quiet():
+        engine.detect_lanes(start, start + duration)
+
+    xs = {x: lane for lane, (x, _) in enumerate(tracks)}
+    presses = [(ts - start, xs[x]) for ts, action, x, _ in engine.backend.events if action == PRESS]
+    # 每个音符在经过判定线期间是否被按下
+    hits, delays, used = 0, [], set()
+    for t, lane in notes:
+        for k, (pt, pl) in enumerate(presses):
+            if pl == lane and k not in used and t <= pt < t + NOTE_WIDTH:
+                hits += 1
+                delays.append(pt - t)
+                used.add(k)
+                break
+    frames = engine.detect_stats.count
+    elapsed = sum(engine.detect_stats.column("interval"))
+    return {
+        "notes": len(notes),
+        "hit_rate": hits / len(notes) if notes else 0.0,
+        "false_taps": len(presses) - len(used),
+        "fps": frames / elapsed if elapsed else 0.0,
+        "process_ms": distribution(engine.detect_stats.column("process")),
+        "latency_ms": distribution(engine.tap_stats.column("lateness")),
+        "note_to_tap_ms": distribution(delays),
+    }
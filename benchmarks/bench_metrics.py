@@ -0,0 +1,71 @@
+# benchmarks/bench_metrics.py
+# 监控指标基准：每轮结束时更新指标和生成一次文本的耗时、本机抓取延迟，
+# 以及高频抓取时游戏内点击调度误差是否受影响
+
+import threading
+import time
+import urllib.request
+
+from benchmarks.common import make_engine, quiet, distribution
+from metrics import MetricsServer
+
+CHECKS = [
+    ("render_ms.p99", "lower", 1.0),
+    ("scraped.lateness_ms.p99", "lower", 1.0),
+]
+
+SCRAPE_INTERVAL = 0.1  # 比实际抓取频率（通常 5-15 秒一次）高两个数量级
+
+
+def run_cycle(game_duration, scrape):
+    engine = make_engine(game_duration=game_duration)
+    server = MetricsServer(engine.metrics, 0)
+    url = f"http://127.0.0.1:{server.port}/metrics"
+    latencies = []
+    done = threading.Event()
+
+    def scraper():
+        while not done.is_set():
+            t0 = time.perf_counter()
+            with urllib.request.urlopen(url, timeout=2) as response:
+                response.read()
+            latencies.append(time.perf_counter() - t0)
+            done.wait(SCRAPE_INTERVAL)
+
+    thread = threading.Thread(target=scraper, daemon=True)
+    if scrape:
+        thread.start()
+    engine.begin()
+    with quiet():
+        engine.run_single_cycle()
+    done.set()
+    if scrape:
+        thread.join()
+    server.close()
+    return engine, {
+        "scrapes": len(latencies),
+        "scrape_ms": distribution(latencies),
+        "lateness_ms": distribution(engine.tap_stats.column("lateness")),
+    }
+
+
+def run(args):
+    engine, baseline = run_cycle(args.game_duration, scrape=False)
+    _, scraped = run_cycle(args.game_duration, scrape=True)
+
+    update, render = [], []
+    lateness = engine.tap_stats.column("lateness")
+    for _ in range(200):
+        t0 = time.perf_counter()
+        engine.metrics.cycle(1, 90.0, None, len(lateness), 20, 80.0, lateness)
+        t1 = time.perf_counter()
+        engine.metrics.render()
+        render.append(time.perf_counter() - t1)
+        update.append(t1 - t0)
+    return {
+        "baseline": baseline,
+        "scraped": scraped,
+        "cycle_update_ms": distribution(update),
+        "render_ms": distribution(render),
+        "render_bytes": len(engine.metrics.render()),
+    }
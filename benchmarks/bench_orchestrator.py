@@ -0,0 +1,92 @@
+# benchmarks/bench_orchestrator.py
+# 多开基准：三个实例共用一个记录后端同时运行，比较串行化输入和各自直接点击（相当于多个 auto_game.py 进程）时
+# 一组全按被其它实例插入点击的次数、合计每小时轮数、按下延迟和排队等待；staggered 用 start_delay 错开各实例的节拍
+
+import contextlib
+import threading
+
+from benchmarks.common import FAST_CONFIG, POSITIONS, distribution, quiet
+from input_backend import RecordingBackend
+from orchestrator import Orchestrator
+
+CHECKS = [
+    ("serialized.cycles_per_hour", "higher", 0.1),
+    ("staggered.burst_ms.p99", "lower", 1.0),
+]
+
+LIMITS = [
+    ("serialized.overlaps", 0),
+]
+
+INSTANCES = 3
+CYCLES = 2
+WINDOW = 960  # 各实例窗口的水平位移（像素）
+STAGGER = 0.05  # staggered 中各实例依次推迟开始的时间（秒），错开游戏内的按下节拍
+HOLD = 0.003  # 每次按下的保持时间：真实后端发一组全按要几毫秒，期间其它线程可以插进来
+
+
+class OverlapBackend(RecordingBackend):
+    """记录后端：一组全按发出期间收到其它线程的输入时计数"""
+
+    def __init__(self):
+        super().__init__()
+        self.owner = None
+        self.overlaps = 0
+
+    def check(self):
+        owner = self.owner
+        if owner is not None and owner != threading.get_ident():
+            self.overlaps += 1
+
+    def press(self, x, y):
+        self.check()
+        super().press(x, y)
+
+    def release(self, x, y):
+        self.check()
+        super().release(x, y)
+
+    def batch(self, events, hold=0.0):
+        self.check()
+        self.owner = threading.get_ident()
+        try:
+            return super().batch(events, hold)
+        finally:
+            self.owner = None
+
+
+def run_case(instances, game_duration, serialize=True, stagger=0.0):
+    backend = OverlapBackend()
+    specs = [{"name": f"w{i}", "positions": POSITIONS, "offset": [i * WINDOW, 0], "start_delay": i * stagger}
+             for i in range(instances)]
+    config = dict(FAST_CONFIG, game_duration=game_duration, max_loops=CYCLES, tap_hold_time=HOLD,
+                  click_interval_enter=0.05, click_interval_return=0.05)
+    with quiet():
+        orchestrator = Orchestrator(specs, backend, config=config)
+        if not serialize:
+            orchestrator.dispatcher.lock = contextlib.nullcontext()
+        orchestrator.start()
+        orchestrator.join()
+    stats = orchestrator.stats()
+    lateness = [v for engine in orchestrator.engines for v in engine.tap_stats.column("lateness")]
+    # burst 包含排队等待：从开始发这组全按到发完
+    bursts = [v for engine in orchestrator.engines for v in engine.tap_stats.column("burst")]
+    waits = orchestrator.dispatcher.waits.column("wait")
+    return {
+        "cycles": stats["cycles"],
+        "cycles_per_hour": stats["cycles_per_hour"],
+        "overlaps": backend.overlaps,
+        "lateness_ms": distribution(lateness),
+        "burst_ms": distribution(bursts),
+        "dispatch_wait_ms": distribution(waits),
+    }
+
+
+def run(args):
+    duration = min(args.game_duration, 2.0)
+    return {
+        "single": run_case(1, duration),
+        "serialized": run_case(INSTANCES, duration),
+        "staggered": run_case(INSTANCES, duration, stagger=STAGGER),
+        "unserialized": run_case(INSTANCES, duration, serialize=False),
+    }
@@ -0,0 +1,121 @@
+# benchmarks/bench_profiling.py
+# 性能剖析开销：同一轮游戏在不剖析和 tracemalloc + cProfile 剖析整轮两种情况下的点击抖动和 CPU，
+# 以及这一轮结束时保存 .prof 和内存快照的耗时、文件大小；
+# instances 为多开时每个实例都开启剖析，检查各实例轮流剖析、没有实例因 cProfile 冲突中断
+
+import contextlib
+import cProfile
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from benchmarks.common import FAST_CONFIG, POSITIONS, distribution, make_engine, quiet
+from input_backend import RecordingBackend
+from orchestrator import Orchestrator
+
+CHECKS = [
+    ("profiled.lateness_ms.p99", "lower", 1.0),
+    ("profiled.end_cycle_ms", "lower", 1.0),
+]
+
+LIMITS = [
+    ("instances.lost_cycles", 0),
+    ("instances.errors", 0),
+]
+
+INSTANCES = 3
+CYCLES = 2
+
+
+class ExclusiveProfile(cProfile.Profile):
+    """Python 3.12 之前模拟 3.12 的限制：进程中同一时刻只能有一个 Profile 开启，再 enable 抛 ValueError"""
+
+    active = None
+
+    def enable(self, *args, **kwargs):
+        if ExclusiveProfile.active is not None and ExclusiveProfile.active is not self:
+            raise ValueError("Another profiling tool is already active")
+        ExclusiveProfile.active = self
+        super().enable(*args, **kwargs)
+
+    def disable(self):
+        super().disable()
+        if ExclusiveProfile.active is self:
+            ExclusiveProfile.active = None
+
+
+def run_case(game_duration, directory=None, every=1):
+    engine = make_engine(game_duration=game_duration, profile_dir=directory or "", profile_every=every)
+    engine.begin()
+    with quiet():
+        engine.start_profiler()
+        profiler = engine.profiler
+        end_cycle = engine.profile_cycle
+        spent = []
+
+        def timed(started):
+            t0 = time.perf_counter()
+            end_cycle(started)
+            spent.append(time.perf_counter() - t0)
+
+        engine.profile_cycle = timed
+        cpu0 = time.process_time()
+        try:
+            engine.run_single_cycle()
+        finally:
+            engine.stop_profiler()
+        cpu = time.process_time() - cpu0
+    result = {
+        "lateness_ms": distribution(engine.tap_stats.column("lateness")),
+        "cpu_per_game_second": cpu / game_duration,
+    }
+    if profiler is not None:
+        files = glob.glob(os.path.join(profiler.directory, "loop_*"))
+        result["end_cycle_ms"] = spent[0] * 1000 if spent else 0.0
+        result["output_kb"] = sum(os.path.getsize(path) for path in files) / 1024
+    return result
+
+
+def run_instances(game_duration, directory):
+    """多开：每个实例每轮都该剖析，各实例的工作线程同时运行"""
+    specs = [{"name": f"w{i}", "positions": POSITIONS, "offset": [i * 960, 0]} for i in range(INSTANCES)]
+    config = dict(FAST_CONFIG, game_duration=game_duration, max_loops=CYCLES, profile_dir=directory, profile_every=1)
+    if sys.version_info < (3, 12):
+        exclusive = mock.patch.object(cProfile, "Profile", ExclusiveProfile)
+    else:
+        exclusive = contextlib.nullcontext()
+    with quiet(), exclusive:
+        orchestrator = Orchestrator(specs, RecordingBackend(), config=config)
+        orchestrator.start()
+        orchestrator.join()
+    stats = orchestrator.stats()
+    records = []
+    for path in glob.glob(os.path.join(directory, "*", "*", "summary.jsonl")):
+        with open(path, "r", encoding="utf-8") as f:
+            records += [json.loads(line) for line in f]
+    profiled = sum(r["profiled"] for r in records)
+    return {
+        "cycles": stats["cycles"],
+        "lost_cycles": INSTANCES * CYCLES - stats["cycles"],
+        "errors": sum(i["errors"] for i in stats["instances"].values()),
+        "profiled_cycles": profiled,
+        "skipped_cycles": len(records) - profiled,
+    }
+
+
+def run(args):
+    duration = args.game_duration
+    directory = tempfile.mkdtemp()
+    try:
+        return {
+            "off": run_case(duration),
+            "profiled": run_case(duration, os.path.join(directory, "single")),
+            "instances": run_instances(min(duration, 2.0), os.path.join(directory, "instances")),
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
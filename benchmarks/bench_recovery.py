@@ -0,0 +1,154 @@
+# benchmarks/bench_recovery.py
+# 卡住恢复基准：虚拟时钟上模拟轮次中途偶发弹窗（弹出后点击无效、画面都识别不到，点“关公告”才消失），
+# 比较旧流程（每轮进入时都点登陆 / 错误确认 / 关公告）和卡住检测 + 恢复流程下的有效轮数与恢复耗时；
+# blind 为没有画面指纹时（卡住检测看不到弹窗）保留 / 去掉进入流程中 blind 登陆步骤的有效轮数
+
+import copy
+import random
+
+from benchmarks.common import make_engine, quiet, distribution
+from input_backend import NullBackend
+from timing import VirtualClock
+
+CHECKS = [
+    ("recovery.good_cycles_per_hour", "higher", 0.05),
+    ("recovery.recovery_s.p95", "lower", 0.5),
+    ("blind.good_cycles_per_hour", "higher", 0.05),
+]
+
+POPUP_RATE = 0.05   # 每轮出现弹窗的概率，出现时刻在轮内均匀分布
+SCREEN_DELAY = 1.0  # 画面在首次询问后出现的时间（秒）
+HOURS = 24.0
+CONFIG = dict(load_time_before_game=15.0, load_time_after_game=8.0, game_duration=60.0,
+              click_interval_enter=0.4, click_interval_return=0.5, phase_model_file="")
+
+
+class PopupScreen(NullBackend):
+    """同时充当画面识别和输入后端：点了“开始演奏”才会进入游戏；弹窗出现后其它点击无效，
+    所有画面都不匹配，直到点击“关公告”"""
+
+    def __init__(self, clock, points, rng):
+        self.clock = clock
+        self.dismiss = tuple(points["dismiss_notice"])
+        self.start_play = tuple(points["start_play"])
+        self.rng = rng
+        self.popup_at = None
+        self.stuck = False
+        self.played = False
+        self.asked = {}
+
+    def update(self):
+        if self.popup_at is not None and self.clock.time() >= self.popup_at:
+            self.stuck = True
+            self.popup_at = None
+
+    def new_cycle(self, length):
+        self.asked = {}
+        self.played = False
+        if self.popup_at is None and not self.stuck and self.rng.random() < POPUP_RATE:
+            self.popup_at = self.clock.time() + self.rng.uniform(0, length)
+
+    # ---- StateDetector 接口 ----
+    def __contains__(self, state):
+        return state in ("game", "return", "menu")
+
+    def matches(self, state):
+        self.update()
+        if self.stuck or (state != "menu" and not self.played):
+            return False
+        now = self.clock.time()
+        return now >= self.asked.setdefault(state, now) + SCREEN_DELAY
+
+    # ---- 输入后端接口 ----
+    def click(self, x, y):
+        self.update()
+        if self.stuck:
+            if (x, y) == self.dismiss:
+                self.stuck = False
+                self.asked = {}
+        elif (x, y) == self.start_play:
+            self.played = True
+
+
+def run_case(legacy, seed):
+    engine = make_engine(**CONFIG)
+    clock = engine.clock = VirtualClock()
+    screen = PopupScreen(clock, engine.points, random.Random(seed))
+    engine.detector = engine.backend = screen
+    if legacy:
+        # 旧流程：进入流程最后的登陆 / 错误确认 / 关公告有没有指纹都每轮点，没有恢复流程
+        script = copy.deepcopy(engine.script)
+        script["phases"][0]["steps"] = [dict(step, blind=False) for step in script["phases"][0]["steps"]]
+        del script["recovery"]
+        engine.script = script
+    length = engine.compile_cycle().duration
+    recoveries = []
+    good = [0]
+    check_progress = engine.check_progress
+    end_recovery = engine.end_recovery
+
+    def check(started, expected, error):
+        # 恢复流程会覆盖 state_log，在这里判断本轮是否完整走完
+        seen = {}
+        for state, _, _, hit in engine.state_log:
+            seen[state] = seen.get(state, False) or hit
+        if error is None and seen and all(seen.values()):
+            good[0] += 1
+        return check_progress(started, expected, error)
+
+    def record(reasons, spent, attempts, recovered):
+        recoveries.append(clock.time() - engine.watchdog.since)
+        end_recovery(reasons, spent, attempts, recovered)
+
+    engine.check_progress = check
+    engine.end_recovery = record
+    engine.begin()
+    with quiet():
+        while clock.time() < HOURS * 3600:
+            screen.new_cycle(length)
+            engine.run_single_cycle()
+    return {
+        "cycles": engine.loop_count,
+        "good_cycles": good[0],
+        "good_cycles_per_hour": good[0] / HOURS,
+        "lost_cycles": engine.loop_count - good[0],
+        "recoveries": len(recoveries),
+        "recovery_s": distribution(recoveries, scale=1.0),
+    }
+
+
+def run_blind(blind_steps, seed):
+    """没有画面指纹：卡住检测只会因出错 / 超时触发，弹窗只能靠每轮进入时的 blind 步骤关掉"""
+    engine = make_engine(fingerprint_file="", **CONFIG)
+    clock = engine.clock = VirtualClock()
+    screen = engine.backend = PopupScreen(clock, engine.points, random.Random(seed))
+    if not blind_steps:
+        script = copy.deepcopy(engine.script)
+        script["phases"][0]["steps"] = [step for step in script["phases"][0]["steps"] if not step.get("blind")]
+        engine.script = script
+    length = engine.compile_cycle().duration
+    good = 0
+    engine.begin()
+    with quiet():
+        while clock.time() < HOURS * 3600:
+            screen.new_cycle(length)
+            engine.run_single_cycle()
+            screen.update()
+            # 点到了“开始演奏”且轮末没有卡在弹窗上
+            good += screen.played and not screen.stuck
+    return {
+        "cycles": engine.loop_count,
+        "good_cycles": good,
+        "good_cycles_per_hour": good / HOURS,
+        "lost_cycles": engine.loop_count - good,
+        "recoveries": int(engine.metrics.values["recoveries_total"]),
+    }
+
+
+def run(args):
+    return {
+        "legacy": run_case(True, seed=1),
+        "recovery": run_case(False, seed=1),
+        "blind": run_blind(True, seed=1),
+        "blind_without_steps": run_blind(False, seed=1),
+    }
@@ -0,0 +1,26 @@
+# benchmarks/bench_schedule.py
+# 虚拟时钟模拟基准：24 小时工作/休息安排的模拟耗时与预期吞吐
+
+import time
+
+from benchmarks.common import POSITIONS
+from engine import DEFAULT_CONFIG
+from simulate import simulate
+
+CHECKS = [
+    ("wall_seconds_per_day", "lower", 1.0),
+]
+
+
+def run(args):
+    overrides = {k: v for k, v in DEFAULT_CONFIG.items() if not isinstance(v, str)}
+    overrides["max_loops"] = 0
+    overrides["phase_model_file"] = ""
+    t0 = time.perf_counter()
+    report = simulate(24.0, 1, config_file="", positions_file=POSITIONS, overrides=overrides)
+    wall = time.perf_counter() - t0
+    return {
+        "wall_seconds_per_day": wall,
+        "cycles_per_hour": report["cycles_per_hour"],
+        "idle_fraction": report["idle_fraction"],
+    }
@@ -0,0 +1,93 @@
+# benchmarks/bench_screen_state.py
+# 画面识别基准：合成图像上的单次检测耗时，以及画面提前出现时一轮能缩短多少时间
+
+import time
+
+import numpy as np
+
+from benchmarks.common import make_engine, quiet
+from screen_state import ArrayScreen, StateDetector, region_around
+
+CHECKS = [
+    ("score_us", "lower", 1.0),
+    ("cycle_saved_fraction", "higher", 0.1),
+]
+
+SIZE = (1000, 1500, 3)
+
+
+class TimedScreen:
+    """合成屏幕：从 start 起按 [(出现时间, 帧)] 切换画面"""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.start = time.perf_counter()
+
+    def grab(self, region):
+        now = time.perf_counter() - self.start
+        frame = self.frames[0][1]
+        for at, f in self.frames:
+            if now >= at:
+                frame = f
+        left, top, width, height = region
+        return frame[top:top + height, left:left + width]
+
+
+def synthetic_frames(engine, rng):
+    """每个画面一张随机底图，在对应点位处画上该画面的“按钮”"""
+    loading = rng.integers(0, 256, SIZE, dtype=np.uint8)
+    frames = {}
+    for name in ("game", "return", "menu"):
+        frame = loading.copy()
+        point = engine.points.get(name, engine.points["track_left"])
+        left, top, w, h = region_around(*point)
+        frame[top:top + h, left:left + w] = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+        frames[name] = frame
+    return loading, frames
+
+
+def run(args):
+    rng = np.random.default_rng(0)
+    engine = make_engine(game_duration=0.5, load_time_before_game=1.5, load_time_after_game=1.5,
+                         click_interval_return=0.2, click_interval_enter=0.0)
+    loading, frames = synthetic_frames(engine, rng)
+
+    # 与 calibrate.py 相同的采集方式：在各画面上截取点位附近区域
+    detector = StateDetector()
+    for name, frame in frames.items():
+        detector.grab = ArrayScreen(frame).grab
+        detector.capture(name, region_around(*engine.points.get(name, engine.points["track_left"])))
+
+    # 单次检测耗时
+    screen = TimedScreen([(0.0, frames["menu"])])
+    detector.grab = screen.grab
+    n = 2000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        detector.matches("menu")
+    score_us = (time.perf_counter() - t0) / n * 1e6
+
+    # 固定等待 vs 画面提前出现
+    def cycle_time(with_detector):
+        engine.detector = detector if with_detector else None
+        engine.begin()
+        # 加载 0.2s 后进入游戏；游戏结束 0.3s 后出现结算；点一次返回后回到主界面
+        game_at = 0.2
+        return_at = game_at + 0.5 + 0.3
+        detector.grab = TimedScreen([(0.0, loading), (game_at, frames["game"]),
+                                     (return_at, frames["return"]),
+                                     (return_at + 0.1, frames["menu"])]).grab
+        t0 = time.perf_counter()
+        with quiet():
+            engine.run_single_cycle()
+        return time.perf_counter() - t0, list(engine.state_log)
+
+    fixed, _ = cycle_time(False)
+    detected, log = cycle_time(True)
+    return {
+        "score_us": score_us,
+        "cycle_fixed_s": fixed,
+        "cycle_detected_s": detected,
+        "cycle_saved_fraction": 1 - detected / fixed,
+        "early_states": [state for state, _, _, seen in log if seen],
+    }
@@ -0,0 +1,62 @@
+# benchmarks/bench_startup.py
+# 启动基准：无界面入口（python -m headless）与图形界面入口的启动耗时和峰值内存（各自独立子进程）
+
+import json
+import subprocess
+import sys
+import time
+
+from benchmarks.common import POSITIONS, ROOT
+
+CHECKS = [
+    ("headless.wall_s", "lower", 0.5),
+    ("headless.rss_mb", "lower", 0.2),
+]
+
+# 无界面入口不导入 tkinter / NumPy / http.server（按需加载），启动耗时和内存都必须明显低于图形界面入口
+LIMITS = [
+    ("headless_to_gui.wall", 0.8),
+    ("headless_to_gui.rss", 0.8),
+]
+
+# 图形界面入口的等价加载：auto_game（tkinter）+ Tcl 解释器 + 引擎 + 默认输入后端。
+# 真正创建窗口需要显示器，这里只创建 Tcl 解释器，因此结果是图形界面开销的下限。
+GUI_PATH = """
+import json, tkinter
+from process_info import peak_rss_mb
+import auto_game
+tkinter.Tcl()
+from engine import BotEngine
+from input_backend import NullBackend, create_backend
+try:
+    backend = create_backend("pyautogui")
+except Exception:
+    backend = NullBackend()
+BotEngine(backend, config={"fingerprint_file": ""}, positions_file=%r)
+print(json.dumps({"rss_mb": peak_rss_mb()}))
+"""
+
+
+def measure(cmd, runs):
+    walls, rss = [], []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        out = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        walls.append(time.perf_counter() - t0)
+        rss.append(json.loads(out.strip().splitlines()[-1])["rss_mb"])
+    walls.sort()
+    return {"wall_s": walls[len(walls) // 2], "rss_mb": max(rss)}
+
+
+def run(args):
+    runs = max(3, args.samples)
+    headless = measure([sys.executable, "-m", "headless", "--startup-only", "--quiet", "--backend", "null",
+                        "--config", "", "--positions", POSITIONS], runs)
+    gui = measure([sys.executable, "-c", GUI_PATH % POSITIONS], runs)
+    return {
+        "headless": headless,
+        "gui_path": gui,
+        "headless_to_gui": {"wall": headless["wall_s"] / gui["wall_s"], "rss": headless["rss_mb"] / gui["rss_mb"]},
+        "wall_saved_fraction": 1 - headless["wall_s"] / gui["wall_s"],
+        "rss_saved_mb": gui["rss_mb"] - headless["rss_mb"],
+    }
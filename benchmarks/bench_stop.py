@@ -0,0 +1,74 @@
+# benchmarks/bench_stop.py
+# 停止延迟检查（虚拟时钟，确定性）：在游戏阶段、加载等待、轮次间延迟和出错退避中按下停止，
+# 统计从 stop() 到 main_control_loop 返回之间又过去的虚拟时间。不依赖机器负载，任何一处不可打断的等待都会直接体现为延迟。
+
+from benchmarks.common import make_engine, quiet, distribution
+from timing import VirtualClock
+
+LIMITS = [
+    ("stop_latency_ms.max", 50.0),
+]
+
+# 名称 -> (配置覆盖, 第一次按下停止的虚拟时间, 停止时应处于的阶段)
+CASES = {
+    "in_game": (dict(game_duration=5.0), 2.0, "game"),
+    "in_wait": (dict(game_duration=0.2, load_time_before_game=15.0), 3.0, "enter"),
+    "in_delay": (dict(game_duration=0.2, post_cycle_delay_min=15.0, post_cycle_delay_max=15.0), 5.0, "delay"),
+    "in_backoff": (dict(game_duration=0.2), 2.0, "backoff"),
+}
+
+
+class StopClock(VirtualClock):
+    """虚拟时钟：时间走到 stop_at 时在等待中调用 engine.stop()，可打断的等待就此返回"""
+
+    def __init__(self, engine, stop_at):
+        super().__init__()
+        self.engine = engine
+        self.stop_at = stop_at
+        self.phase = None
+
+    def fire(self):
+        self.now = self.stop_at
+        self.phase = next((name for name, on in self.engine.metrics.phases.items() if on), None)
+        self.stop_at = None
+        self.engine.stop()
+
+    def sleep(self, seconds, cancel=None):
+        if seconds <= 0 or (cancel is not None and cancel.is_set()):
+            return
+        if self.stop_at is not None and self.now + seconds >= self.stop_at:
+            self.fire()
+            if cancel is not None:
+                return
+        self.now += seconds
+
+    def wait_until(self, deadline):
+        # 自旋等待不可打断：停止发生在自旋中时，仍要等到截止时间
+        if self.stop_at is not None and deadline >= self.stop_at > self.now:
+            self.fire()
+        return super().wait_until(deadline)
+
+
+def stop_latency(name, stop_at):
+    overrides, _, expected = CASES[name]
+    engine = make_engine(**overrides)
+    if name == "in_backoff":
+        # 引用不存在的参数，编译时报错，进入 5 秒出错退避
+        engine.script = {"phases": [{"name": "broken", "type": "wait", "duration": "missing_key"}]}
+    clock = engine.clock = StopClock(engine, stop_at)
+    engine.begin()
+    with quiet():
+        engine.main_control_loop()
+    if clock.phase != expected:
+        raise RuntimeError(f"{name}: 停止时处于阶段 {clock.phase}，应为 {expected}")
+    return clock.now - stop_at
+
+
+def run(args):
+    latencies = {name: [stop_latency(name, stop_at + 0.37 * i) for i in range(args.samples)]
+                 for name, (_, stop_at, _) in CASES.items()}
+    result = {"samples": args.samples,
+              "stop_latency_ms": distribution([v for values in latencies.values() for v in values])}
+    for name, values in latencies.items():
+        result[f"stop_latency_{name}_ms"] = distribution(values)
+    return result
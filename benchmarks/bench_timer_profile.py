@@ -0,0 +1,47 @@
+# benchmarks/bench_timer_profile.py
+# 计时补偿基准：固定 1ms 自旋阈值与按本机 sleep 超调测得的阈值下，连续截止时间的迟到分布和自旋 CPU 占比；
+# busy 中另有一个线程持续做纯 Python 计算（相当于同进程截图 / 识别），唤醒更容易推迟
+
+import threading
+
+from timer_profile import calibrate, measure_deadlines
+from timing import SPIN_THRESHOLD
+
+CHECKS = [
+    ("calibrated.spin_cpu", "lower", 1.0),
+    ("busy_calibrated.lateness_ms.p90", "lower", 1.0),
+]
+
+SAMPLES = 200
+INTERVAL = 0.01
+
+
+def busy(stop):
+    while not stop.is_set():
+        sum(range(2000))
+
+
+def measure(spin):
+    lateness, cpu = measure_deadlines(spin, SAMPLES, INTERVAL)
+    return {"spin_ms": spin * 1000, "lateness_ms": lateness, "spin_cpu": cpu}
+
+
+def run(args):
+    entry = calibrate()
+    result = {
+        "sleep_overshoot_ms": entry["sleep_overshoot_ms"],
+        "fixed": measure(SPIN_THRESHOLD),
+        "calibrated": measure(entry["spin"]),
+    }
+    stop = threading.Event()
+    thread = threading.Thread(target=busy, args=(stop,), daemon=True)
+    thread.start()
+    try:
+        loaded = calibrate()
+        result["busy_sleep_overshoot_ms"] = loaded["sleep_overshoot_ms"]
+        result["busy_fixed"] = measure(SPIN_THRESHOLD)
+        result["busy_calibrated"] = measure(loaded["spin"])
+    finally:
+        stop.set()
+        thread.join()
+    return result
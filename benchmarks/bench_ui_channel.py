@@ -0,0 +1,44 @@
+# benchmarks/bench_ui_channel.py
+# 界面通道基准：工作线程入队一条更新的耗时，以及一轮游戏中状态栏更新被合并的比例（无需 Tk）
+
+import threading
+import time
+
+from benchmarks.common import distribution
+from ui_channel import UIChannel
+
+CHECKS = [
+    ("post_us.p99", "lower", 2.0),
+]
+
+
+def run(args):
+    channel = UIChannel()
+    applied = []
+    n = 20000
+    costs = [0.0] * n
+
+    def worker():
+        perf_counter = time.perf_counter
+        for i in range(n):
+            t0 = perf_counter()
+            channel.post("status", applied.append, i)
+            costs[i] = perf_counter() - t0
+
+    # 主线程每 50ms 取一次，模拟 Tk 的 after() 节拍
+    thread = threading.Thread(target=worker)
+    thread.start()
+    ticks = 0
+    while thread.is_alive():
+        channel.drain()
+        ticks += 1
+        time.sleep(channel.interval / 1000)
+    channel.drain()
+    return {
+        "post_us": distribution(costs, scale=1e6),
+        "posted": channel.posted,
+        "applied": len(applied),
+        "merged_fraction": channel.merged / channel.posted,
+        "last_value_applied": applied[-1] == n - 1,
+        "ticks": ticks + 1,
+    }
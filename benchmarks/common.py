@@ -0,0 +1,57 @@
+# benchmarks/common.py
+# 基准公共工具：构建无界面引擎、静默输出、统计汇总
+
+import contextlib
+import io
+import os
+
+from engine import BotEngine
+from input_backend import RecordingBackend
+from tap_stats import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POSITIONS = os.path.join(ROOT, "positions.json")
+
+# 基准用的压缩参数：去掉加载等待，只保留游戏内节奏相关配置
+FAST_CONFIG = {
+    "click_interval_enter": 0.0,
+    "load_time_before_game": 0.0,
+    "load_time_after_game": 0.0,
+    "click_interval_return": 0.0,
+    "click_interval_in_game": 0.1687,
+    "click_jitter": 0,
+    "time_jitter": 0.0015,
+    "post_cycle_delay_min": 0.0,
+    "post_cycle_delay_max": 0.0,
+    "tap_log_dir": "",
+    "session_db": "",
+    "phase_model_file": "",
+    "timer_profile_file": "",
+}
+
+
+def make_engine(backend=None, **overrides):
+    """用 positions.json 和记录后端构建一个无界面引擎"""
+    config = dict(FAST_CONFIG, **overrides)
+    with quiet():
+        return BotEngine(backend or RecordingBackend(), config=config, positions_file=POSITIONS)
+
+
+@contextlib.contextmanager
+def quiet():
+    """屏蔽引擎的终端输出"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def distribution(values, scale=1000.0):
+    """p50/p95/p99/max/mean，默认换算为毫秒"""
+    values = sorted(values)
+    mean = sum(values) / len(values) if values else 0.0
+    return {
+        "p50": percentile(values, 50) * scale,
+        "p95": percentile(values, 95) * scale,
+        "p99": percentile(values, 99) * scale,
+        "max": (values[-1] if values else 0.0) * scale,
+        "mean": mean * scale,
+    }
@@ -7,29 +7,42 @@ import json
 import time
 from pynput import mouse
 import os
+from cycle_script import load_script, point_labels
+from screen_state import StateDetector, region_around, FINGERPRINT_FILE
+from capture import RegionCapture
+from ui_channel import UIChannel
 
-# 要采集的 14 个点击点（按顺序）
-POINTS = [
-    "1. 登陆界面进入游戏",
-    "2. 登陆错误是确认位置（1的右边一些）",
-    "3. 干掉公告(如果没有弹出公告，请使用get_position.py手动确认后修改json内enter_steps的最后一项)",
-    "4. 右上角菜单",
-    "5. 返回主页面",
-    "6. 开始演出",
-    "7. 左上角返回",
-    "8. 同6，开始演出",
-    "9. 单人Live",
-    "10. 确认",
-    "11. 开始演奏",
-    "12. 游戏内 - 最左边轨道点击位置",
-    "13. 游戏内 - 最右边轨道点击位置",
-    "14. 结算界面 - '返回主菜单' 按钮（将连续点10次）"
-]
+SCRIPT_FILE = "scripts/default_cycle.json"
+
+
+def saved_config():
+    if os.path.exists("config.json"):
+        try:
+            with open("config.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            pass
+    return {}
+
+
+def load_points():
+    """从 config.json 指定的轮次脚本读取要采集的点位 (名称, 提示)，按采集顺序排列"""
+    path = saved_config().get("cycle_script", SCRIPT_FILE)
+    return path, point_labels(load_script(path))
+
+
+# 要采集的点击点（按顺序，由轮次脚本决定）
+SCRIPT_PATH, POINT_LABELS = load_points()
+# 与主程序使用同一截图后端，保证指纹像素一致
+CAPTURE_BACKEND = saved_config().get("capture_backend", "auto")
+POINT_NAMES = [name for name, _ in POINT_LABELS]
+POINTS = [label for _, label in POINT_LABELS]
 
 
 class Calibrator:
     def __init__(self):
         self.positions = []
+        self.detector = StateDetector(RegionCapture(CAPTURE_BACKEND).grab_region)  # 每个点位按下瞬间的画面指纹
         self.current_count = 0
         self.listener = None
 
@@ -41,6 +54,9 @@ class Calibrator:
         self.root.configure(padx=10, pady=10)
 
         self.setup_ui()
+        # pynput 监听线程不直接操作控件，界面更新经由该通道在主线程执行
+        self.ui = UIChannel(self.root)
+        self.ui.start()
 
     def setup_ui(self):
         # 标题
@@ -53,13 +69,13 @@ class Calibrator:
 
         desc = tk.Label(
             self.root,
-            text="请按顺序在游戏内点击以下 14 个位置,推荐先登陆把当日登陆内容点掉，然后返回标题界面后开始",
+            text=f"请按顺序在游戏内点击以下 {len(POINTS)} 个位置,推荐先登陆把当日登陆内容点掉，然后返回标题界面后开始",
             fg="red",
             font=("Arial", 10)
         )
         desc.pack(pady=5)
 
-        # 列表框显示14个点
+        # 列表框显示所有点位
         frame = tk.Frame(self.root)
         frame.pack(pady=10, fill="both", expand=True)
 
@@ -90,7 +106,7 @@ class Calibrator:
 
         self.btn_start = ttk.Button(
             btn_frame,
-            text="🔴 开始录制接下来的14次点击",
+            text=f"🔴 开始录制接下来的{len(POINTS)}次点击",
             command=self.start_listening,
             width=30
         )
@@ -104,37 +120,46 @@ class Calibrator:
         self.btn_clear.pack(side="left", padx=5)
 
     def on_click(self, x, y, button, pressed):
-        if not pressed or button != mouse.Button.left:
-            return  # 只记录左键按下
+        # pynput 监听线程：只把点击交给主线程，记录 / 截取指纹都在主线程执行，与 clear_records 不会同时修改记录
+        if pressed and button == mouse.Button.left:
+            self.ui.call(self.record_click, int(x), int(y))  # 只记录左键按下
 
-        if self.current_count >= len(POINTS):
-            return  # 仅记录14次
+    def record_click(self, x, y):
+        """在主线程记录点击，并截取点击时的画面作为该点位的指纹"""
+        if self.listener is None or self.current_count >= len(POINTS):
+            return  # 已清除 / 已停止录制，或已记录 len(POINTS) 次
 
-        # 记录点击
         self.current_count += 1
-        self.positions.append((int(x), int(y)))
+        self.positions.append((x, y))
+        try:
+            self.detector.capture(POINT_NAMES[self.current_count - 1], region_around(x, y))
+        except Exception as e:
+            print(f"⚠️ 画面指纹截取失败: {e}")
 
-        # 更新状态
+        self.show_progress(self.current_count, x, y)
+
+    def show_progress(self, count, x, y):
+        """在主线程更新列表和状态栏；全部记录完成后自动保存"""
         self.status.config(
-            text=f"✅ 第{self.current_count}步完成: ({x}, {y})",
+            text=f"✅ 第{count}步完成: ({x}, {y})",
             fg="green"
         )
-        self.listbox.itemconfig(self.current_count - 1, fg="gray")
+        self.listbox.itemconfig(count - 1, fg="gray")
 
-        if self.current_count < len(POINTS):
-            self.listbox.itemconfig(self.current_count, fg="red")
+        if count < len(POINTS):
+            self.listbox.itemconfig(count, fg="red")
             self.status.config(
-                text=f"请进行第 {self.current_count + 1} 步: {POINTS[self.current_count].split(' - ')[-1]}",
+                text=f"请进行第 {count + 1} 步: {POINTS[count].split(' - ')[-1]}",
                 fg="orange"
             )
         else:
-            # === 第14次点击完成 → 自动保存 ===
-            self.status.config(text="🎉 全部14个点已记录，正在保存...", fg="blue")
+            # === 最后一次点击完成 → 自动保存 ===
+            self.status.config(text=f"🎉 全部{len(POINTS)}个点已记录，正在保存...", fg="blue")
             self.btn_start.config(state="disabled")
-            self.save_positions()
             if self.listener:
                 self.listener.stop()
             self.listener = None
+            self.save_positions()
 
     def countdown(self, n):
         """非阻塞倒计时"""
@@ -148,13 +173,13 @@ class Calibrator:
 
     def start_listening(self):
         if self.current_count >= len(POINTS):
-            messagebox.showinfo("提示", "✅ 已记录全部14个点！")
+            messagebox.showinfo("提示", f"✅ 已记录全部{len(POINTS)}个点！")
             return
 
         # 确认开始
         confirm = messagebox.askokcancel(
             "🎮 准备开始录制",
-            "即将开始录制接下来的 14 次鼠标左键点击。\n\n"
+            f"即将开始录制接下来的 {len(POINTS)} 次鼠标左键点击。\n\n"
             "请做好准备：\n"
             "1. 点击【确定】\n"
             "2. 快速切换到游戏窗口\n"
@@ -175,17 +200,10 @@ class Calibrator:
         self.countdown(5)
 
     def save_positions(self):
-        """保存坐标到 positions.json"""
-        # 把登陆步骤放到进入歌曲后面，防止在主界面误触
-        tmp_pos = self.positions[:11]
-        game_pos = self.positions[11:]
-        starts = tmp_pos[3:] + tmp_pos[:3] 
-        self.positions = starts + game_pos
+        """保存坐标到 positions.json（按点位名保存，点击顺序由轮次脚本决定）"""
         structured = {
-            "enter_steps": self.positions[:11],
-            "track_left":  self.positions[11],
-            "track_right": self.positions[12],
-            "return_pos":  self.positions[13],
+            "points": dict(zip(POINT_NAMES, self.positions)),
+            "script": SCRIPT_PATH,
             "_note": "自动生成: rhythm game calibrator",
             "_timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
         }
@@ -193,6 +211,7 @@ class Calibrator:
         try:
             with open("positions.json", "w", encoding="utf-8") as f:
                 json.dump(structured, f, indent=2, ensure_ascii=False)
+            self.save_fingerprints()
             # 提示音（macOS）
             os.system('afplay /System/Library/Sounds/Pop.aiff &')
             messagebox.showinfo(
@@ -203,9 +222,23 @@ class Calibrator:
         except Exception as e:
             messagebox.showerror("❌ 保存失败", f"无法保存文件：\n{e}")
 
+    def save_fingerprints(self):
+        """合并保存画面指纹（保留手动采集的其它画面，如 game）"""
+        if not self.detector.fingerprints:
+            return
+        merged = StateDetector()
+        if os.path.exists(FINGERPRINT_FILE):
+            try:
+                merged = StateDetector.load(FINGERPRINT_FILE)
+            except Exception as e:
+                print(f"⚠️ 旧指纹文件无法读取，将覆盖: {e}")
+        merged.fingerprints.update(self.detector.fingerprints)
+        merged.save(FINGERPRINT_FILE)
+
     def clear_records(self):
         """清除当前记录"""
         self.positions.clear()
+        self.detector.fingerprints.clear()
         self.current_count = 0
         self.status.config(text="已清除所有记录", fg="black")
         self.btn_start.config(state="normal")
@@ -218,10 +251,10 @@ class Calibrator:
     def on_closing(self):
         """关闭窗口时处理未保存数据"""
         if 0 < len(self.positions) < len(POINTS):
-            if messagebox.askyesno("⚠️ 未完成记录", "已记录部分坐标但未完成14次点击。\n是否保存当前数据？"):
+            if messagebox.askyesno("⚠️ 未完成记录", f"已记录部分坐标但未完成{len(POINTS)}次点击。\n是否保存当前数据？"):
                 self.save_positions()
         elif len(self.positions) == len(POINTS):
-            if messagebox.askyesno("💾 保存坐标", "已记录全部14个点，是否保存？"):
+            if messagebox.askyesno("💾 保存坐标", f"已记录全部{len(POINTS)}个点，是否保存？"):
                 self.save_positions()
         self.root.destroy()
 
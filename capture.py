@@ -0,0 +1,222 @@
+# capture.py
+# 区域截图：只截取登记过的小区域（判定线、画面指纹），写入预分配的 NumPy 缓冲区，帧间复用同一块内存
+#
+# 后端：mss（推荐）/ xlib（Linux）/ pyautogui（兜底，较慢）/ fake（测试用，从数组切片）
+
+import time
+from array import array
+
+import numpy as np
+
+from tap_stats import percentile
+
+LATENCY_WINDOW = 1024  # 延迟统计保留最近多少帧
+
+
+def to_logical(pixels, width, height):
+    """HiDPI（Retina）屏幕上截图是逻辑尺寸的整数倍，按倍数抽样回逻辑像素；不是整数倍时抛出 ValueError，不截断"""
+    h, w = pixels.shape[:2]
+    if h == height and w == width:
+        return pixels
+    sy, sx = h // height, w // width
+    if sy < 1 or sx < 1 or h != sy * height or w != sx * width:
+        raise ValueError(f"截图尺寸 {w}x{h} 不是请求区域 {width}x{height} 的整数倍")
+    return pixels[::sy, ::sx]
+
+
+class CaptureBackend:
+    """截图后端接口：把 region (left, top, width, height) 的 RGB 像素写入 out (H x W x 3, uint8)"""
+
+    name = "base"
+
+    def read(self, region, out):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MssBackend(CaptureBackend):
+    name = "mss"
+
+    def __init__(self):
+        import mss
+        self._sct = mss.mss()
+
+    def read(self, region, out):
+        left, top, width, height = region
+        shot = self._sct.grab({"left": left, "top": top, "width": width, "height": height})
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        out[...] = to_logical(bgra, width, height)[:, :, 2::-1]
+
+    def close(self):
+        self._sct.close()
+
+
+class XlibBackend(CaptureBackend):
+    name = "xlib"
+
+    def __init__(self):
+        from Xlib import X, display
+        self._display = display.Display()
+        self._root = self._display.screen().root
+        self._format = X.ZPixmap
+
+    def read(self, region, out):
+        left, top, width, height = region
+        image = self._root.get_image(left, top, width, height, self._format, 0xFFFFFFFF)
+        bgrx = np.frombuffer(image.data, dtype=np.uint8).reshape(height, width, 4)
+        out[...] = bgrx[:, :, 2::-1]
+
+    def close(self):
+        self._display.close()
+
+
+class PyAutoGUIBackend(CaptureBackend):
+    """兜底实现：每帧都会生成新的 PIL 图像，只在没有 mss / Xlib 时使用"""
+
+    name = "pyautogui"
+
+    def __init__(self):
+        import pyautogui
+        self._gui = pyautogui
+
+    def read(self, region, out):
+        _, _, width, height = region
+        out[...] = to_logical(np.asarray(self._gui.screenshot(region=region).convert("RGB")), width, height)
+
+
+class FakeBackend(CaptureBackend):
+    """从数组读取：source 为 HxWx3 数组，或返回当前帧的函数（用于合成 / 录制帧序列）"""
+
+    name = "fake"
+
+    def __init__(self, source=None):
+        self.source = source if source is not None else np.zeros((1080, 1920, 3), dtype=np.uint8)
+
+    def read(self, region, out):
+        frame = self.source() if callable(self.source) else self.source
+        left, top, width, height = region
+        np.copyto(out, frame[top:top + height, left:left + width])
+
+
+BACKENDS = {
+    "mss": MssBackend,
+    "xlib": XlibBackend,
+    "pyautogui": PyAutoGUIBackend,
+    "fake": FakeBackend,
+}
+AUTO_ORDER = ("mss", "xlib", "pyautogui")
+
+
+def create_capture_backend(name="auto"):
+    if name != "auto":
+        try:
+            cls = BACKENDS[name]
+        except KeyError:
+            raise ValueError(f"未知截图后端: {name}（可选: auto, {', '.join(BACKENDS)}）")
+        return cls()
+    errors = []
+    for candidate in AUTO_ORDER:
+        try:
+            return BACKENDS[candidate]()
+        except Exception as e:
+            errors.append(f"{candidate}: {e}")
+    raise RuntimeError("没有可用的截图后端（" + "；".join(errors) + "）")
+
+
+class RegionCapture:
+    """登记区域并按名称截取；每个区域一块固定缓冲区，grab 返回的始终是同一个数组"""
+
+    def __init__(self, backend="auto"):
+        # 后端在第一次截图时才创建，避免无界面环境下导入即失败
+        self._backend = backend if isinstance(backend, CaptureBackend) else None
+        self._backend_name = backend if isinstance(backend, str) else None
+        self.regions = {}   # 名称 -> 区域
+        self.buffers = {}   # 名称 -> HxWx3 uint8
+        self.frames = 0
+        self._latency = array("d", bytes(8 * LATENCY_WINDOW))
+        self._first = None
+        self._last = None
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = create_capture_backend(self._backend_name or "auto")
+        return self._backend
+
+    def register(self, name, region):
+        """登记区域并分配缓冲区；同名同尺寸重复登记时复用原缓冲区"""
+        left, top, width, height = (int(v) for v in region)
+        region = (left, top, width, height)
+        buf = self.buffers.get(name)
+        if buf is None or buf.shape != (height, width, 3):
+            self.buffers[name] = np.zeros((height, width, 3), dtype=np.uint8)
+        self.regions[name] = region
+        return self.buffers[name]
+
+    def grab(self, name):
+        """截取已登记的区域，写入并返回其缓冲区"""
+        out = self.buffers[name]
+        t0 = time.perf_counter()
+        self.backend.read(self.regions[name], out)
+        t1 = time.perf_counter()
+        self._latency[self.frames % LATENCY_WINDOW] = t1 - t0
+        self.frames += 1
+        if self._first is None:
+            self._first = t0
+        self._last = t1
+        return out
+
+    def grab_all(self):
+        return {name: self.grab(name) for name in self.regions}
+
+    def grab_region(self, region):
+        """按区域截取（以区域本身作为名称自动登记），可直接作为 StateDetector 的 grab"""
+        key = tuple(int(v) for v in region)
+        if key not in self.regions:
+            self.register(key, key)
+        return self.grab(key)
+
+    def stats(self):
+        """截图帧率与延迟（毫秒，最近 LATENCY_WINDOW 帧）"""
+        n = min(self.frames, LATENCY_WINDOW)
+        latencies = sorted(self._latency[:n])
+        span = (self._last - self._first) if self.frames > 1 else 0.0
+        return {
+            "frames": self.frames,
+            "fps": (self.frames - 1) / span if span > 0 else 0.0,
+            "latency_ms_p50": percentile(latencies, 50) * 1000,
+            "latency_ms_p99": percentile(latencies, 99) * 1000,
+            "latency_ms_max": (latencies[-1] if latencies else 0.0) * 1000,
+        }
+
+    def reset_stats(self):
+        self.frames = 0
+        self._first = self._last = None
+
+    def close(self):
+        if self._backend is not None:
+            self._backend.close()
+
+
+# ============ 测量当前机器的截图帧率 ============
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="测量区域截图的帧率和延迟")
+    parser.add_argument("--backend", default="auto", help="auto / " + " / ".join(BACKENDS))
+    parser.add_argument("--region", nargs=4, type=int, default=[400, 700, 900, 8],
+                        metavar=("LEFT", "TOP", "WIDTH", "HEIGHT"), help="默认为判定线附近的细长条")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    cap = RegionCapture(args.backend)
+    cap.register("roi", args.region)
+    end = time.perf_counter() + args.seconds
+    while time.perf_counter() < end:
+        cap.grab("roi")
+    s = cap.stats()
+    print(f"📷 {cap.backend.name}: {s['fps']:.1f} fps，延迟 p50 {s['latency_ms_p50']:.2f}ms / "
+          f"p99 {s['latency_ms_p99']:.2f}ms / max {s['latency_ms_max']:.2f}ms（{s['frames']} 帧）")
+    cap.close()
@@ -0,0 +1,266 @@
+# capture_worker.py
+# 独立进程截图 + 判定线识别：截图和像素分析不再与点击循环争用同一个 GIL
+#
+# 识别进程把每帧的判定线细长条、按下位掩码和时间戳写入 multiprocessing.shared_memory 环形缓冲区；
+# 引擎侧的 CaptureWorker.poll() 只读共享内存中的几个数，不复制帧、不经过 pickle。
+# 缓冲区满时覆盖最旧的帧（识别进程从不等待引擎），引擎读到时已被覆盖的帧计入 dropped；
+# 每次读取时记录帧龄（截图开始到被引擎读到的时间）。
+# 时间戳为 time.perf_counter()，Linux / macOS 上是系统级单调时钟，两个进程可直接比较。
+
+import multiprocessing
+import time
+from array import array
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from tap_stats import percentile
+
+RING_SLOTS = 64       # 环形缓冲区帧数
+IDLE_AFTER = 0.5      # 引擎超过该时间没有读取时识别进程暂停截图（游戏阶段以外不占 CPU）
+STARTUP_TIMEOUT = 10.0
+AGE_WINDOW = 4096     # 帧龄统计保留最近多少次读取
+
+# 头部 int64 字段
+H_SEQ = 0          # 已写入的帧数（最新帧序号）
+H_RESET = 1        # 引擎请求重置的次数
+H_RESET_ACK = 2    # 识别进程已完成的重置次数
+H_RESET_SEQ = 3    # 最近一次重置时的帧序号，之前的帧不再使用
+H_STOP = 4
+H_READY = 5
+H_ERRORS = 6       # 截图失败次数
+HEADER = 8
+# 头部 float64 字段
+F_POLL = 0         # 引擎最近一次读取的时间
+FHEADER = 2
+# 每帧元数据 float64 字段
+M_SEQ = 0          # 帧序号，写入过程中为 -1
+M_CAPTURED = 1     # 截图开始时间
+M_DONE = 2         # 识别完成时间
+META = 3
+
+
+class FrameRing:
+    """共享内存中的环形缓冲区；各字段都是共享内存上的 NumPy 视图"""
+
+    def __init__(self, shm, slots, shape):
+        self.shm = shm
+        self.name = shm.name
+        self.slots = slots
+        self.shape = tuple(shape)
+        buf = shm.buf
+        offset = 0
+
+        def view(dtype, shape):
+            nonlocal offset
+            arr = np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset)
+            offset += arr.nbytes
+            return arr
+
+        self.header = view(np.int64, (HEADER,))
+        self.fheader = view(np.float64, (FHEADER,))
+        self.meta = view(np.float64, (slots, META))
+        self.masks = view(np.int64, (slots,))
+        self.frames = view(np.uint8, (slots, *self.shape))
+
+    @staticmethod
+    def size(slots, shape):
+        return 8 * (HEADER + FHEADER + slots * META + slots) + slots * int(np.prod(shape))
+
+    @classmethod
+    def create(cls, slots, shape):
+        shm = shared_memory.SharedMemory(create=True, size=cls.size(slots, shape))
+        ring = cls(shm, slots, shape)
+        ring.header[:] = 0
+        ring.fheader[:] = 0.0
+        ring.meta[:] = -1.0
+        return ring
+
+    @classmethod
+    def attach(cls, name, slots, shape):
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+        except TypeError:
+            # 旧版本附加时也会登记到 resource_tracker；spawn 出的识别进程与引擎共用同一个 tracker，
+            # 重复登记无害，这里不能注销，否则引擎 unlink 时 tracker 找不到记录
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, slots, shape)
+
+    def release(self):
+        """释放视图后关闭映射（视图仍被引用时 close 会失败）"""
+        self.header = self.fheader = self.meta = self.masks = self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # 调用方仍持有 latest_frame() 的视图，映射在视图释放后回收
+
+
+def build_capture(backend):
+    """backend 为截图后端名称，或 (工厂函数, 参数) —— 在识别进程中调用工厂函数生成 FakeBackend 的帧源"""
+    from capture import FakeBackend, RegionCapture
+
+    if isinstance(backend, str):
+        return RegionCapture(backend)
+    factory, args = backend
+    return RegionCapture(FakeBackend(factory(*args)))
+
+
+def worker_main(name, spec):
+    """识别进程入口：循环截图 + 识别，把结果写入环形缓冲区，直到引擎设置 H_STOP"""
+    from lane_detector import LaneDetector
+
+    ring = FrameRing.attach(name, spec["slots"], spec["shape"])
+    header, fheader, meta, masks, frames = ring.header, ring.fheader, ring.meta, ring.masks, ring.frames
+    slots = ring.slots
+    capture = build_capture(spec["backend"])
+    detector = LaneDetector(capture, spec["tracks"], spec["threshold"], spec["min_interval"], spec["y_offset"])
+    period = 1.0 / spec["fps"] if spec["fps"] else 0.0
+    perf_counter = time.perf_counter
+    header[H_READY] = 1
+    try:
+        while not header[H_STOP]:
+            if header[H_RESET] != header[H_RESET_ACK]:
+                detector.reset()
+                header[H_RESET_SEQ] = header[H_SEQ]
+                header[H_RESET_ACK] = header[H_RESET]
+            t0 = perf_counter()
+            if t0 - fheader[F_POLL] > IDLE_AFTER:
+                time.sleep(0.005)
+                continue
+            seq = int(header[H_SEQ]) + 1
+            slot = seq % slots
+            meta[slot, M_SEQ] = -1.0
+            # 截图直接写进环形缓冲区的这一格，不经过中间缓冲区
+            capture.buffers["judge_line"] = frames[slot]
+            try:
+                mask = detector.poll(t0)
+            except Exception:
+                header[H_ERRORS] += 1
+                time.sleep(0.1)
+                continue
+            masks[slot] = mask
+            meta[slot, M_CAPTURED] = t0
+            meta[slot, M_DONE] = perf_counter()
+            meta[slot, M_SEQ] = seq
+            header[H_SEQ] = seq
+            if period:
+                remaining = t0 + period - perf_counter()
+                if remaining > 0:
+                    time.sleep(remaining)
+    finally:
+        capture.close()
+        del header, fheader, meta, masks, frames
+        ring.release()
+
+
+class CaptureWorker:
+    """引擎侧：启动识别进程，并以 LaneDetector 相同的 reset() / poll(now) 接口读取结果"""
+
+    def __init__(self, backend, game_tracks, threshold=40.0, min_interval=0.08, y_offset=0, fps=0,
+                 slots=RING_SLOTS):
+        from lane_detector import judge_line_region
+
+        left, top, width, height = judge_line_region(game_tracks, y_offset)
+        self.region = (left, top, width, height)
+        self.lanes = len(game_tracks)
+        self.ring = FrameRing.create(slots, (height, width, 3))
+        spec = {
+            "slots": slots, "shape": (height, width, 3), "backend": backend,
+            "tracks": [tuple(int(v) for v in t) for t in game_tracks],
+            "threshold": threshold, "min_interval": min_interval, "y_offset": y_offset, "fps": fps,
+        }
+        # spawn：不继承引擎线程和 Tk 状态（macOS 上也是默认方式）
+        ctx = multiprocessing.get_context("spawn")
+        self.process = ctx.Process(target=worker_main, args=(self.ring.name, spec), daemon=True)
+        self.process.start()
+        self.last = 0          # 已读取到的帧序号
+        self.reset_id = 0
+        self.captured = 0.0    # 本次 poll 中产生按下的最早一帧的截图时间
+        self.frames = 0        # 读到的帧数
+        self.dropped = 0       # 被覆盖、没来得及读到的帧数
+        self._age = array("d", bytes(8 * AGE_WINDOW))
+        self._reads = 0
+
+    def wait_ready(self, timeout=STARTUP_TIMEOUT):
+        """等待识别进程完成导入和截图后端初始化，返回是否就绪"""
+        deadline = time.perf_counter() + timeout
+        while not self.ring.header[H_READY]:
+            if not self.process.is_alive() or time.perf_counter() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def reset(self):
+        """新的游戏阶段：请求识别进程重新取基线，并立即开始截图；统计从这里重新开始"""
+        header = self.ring.header
+        self.reset_stats()
+        self.reset_id += 1
+        header[H_RESET] = self.reset_id
+        self.ring.fheader[F_POLL] = time.perf_counter()
+
+    def poll(self, now):
+        """合并上次读取以来所有新帧的按下位掩码；不复制帧、不分配数组"""
+        ring = self.ring
+        header, meta, masks = ring.header, ring.meta, ring.masks
+        ring.fheader[F_POLL] = now
+        if header[H_RESET_ACK] != self.reset_id:
+            return 0  # 识别进程还没换上新基线
+        seq = int(header[H_SEQ])
+        last = max(self.last, int(header[H_RESET_SEQ]))
+        if seq <= last:
+            return 0
+        slots = ring.slots
+        first = max(last + 1, seq - slots + 1)
+        self.dropped += first - last - 1
+        mask = 0
+        captured = 0.0
+        for s in range(first, seq + 1):
+            slot = s % slots
+            m = int(masks[slot])
+            t = meta[slot, M_CAPTURED]
+            if meta[slot, M_SEQ] != s:  # 读取过程中被覆盖
+                self.dropped += 1
+                continue
+            if m and not mask:
+                captured = t
+            mask |= m
+        self.frames += seq - first + 1
+        newest = meta[seq % slots, M_CAPTURED]
+        self._age[self._reads % AGE_WINDOW] = now - newest
+        self._reads += 1
+        self.captured = captured if mask else newest
+        self.last = seq
+        return mask
+
+    def latest_frame(self):
+        """最新一帧判定线细长条（共享内存视图，之后可能被覆盖，需要保留时请自行复制）"""
+        return self.ring.frames[int(self.ring.header[H_SEQ]) % self.ring.slots]
+
+    def stats(self):
+        n = min(self._reads, AGE_WINDOW)
+        ages = sorted(self._age[:n])
+        return {
+            "frames": self.frames,
+            "written": int(self.ring.header[H_SEQ]),
+            "dropped": self.dropped,
+            "errors": int(self.ring.header[H_ERRORS]),
+            "age_ms_p50": percentile(ages, 50) * 1000,
+            "age_ms_p99": percentile(ages, 99) * 1000,
+            "age_ms_max": (ages[-1] if ages else 0.0) * 1000,
+        }
+
+    def reset_stats(self):
+        self.frames = self.dropped = self._reads = 0
+
+    def close(self, timeout=2.0):
+        if self.ring is None:
+            return
+        self.ring.header[H_STOP] = 1
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        shm = self.ring.shm
+        self.ring.release()
+        shm.unlink()
+        self.ring = None
@@ -0,0 +1,133 @@
+# chart.py
+# 谱面：从本地谱面文件读取各轨道的音符时间，游戏阶段只在有音符的时刻按对应轨道（替代固定间隔全按）
+#
+# 支持两种格式（时间单位为秒，从游戏阶段开始算起）：
+#   .json: {"lanes": 轨道数, "notes": [[时间, 轨道], ...]}，notes 也可写成 [{"time": t, "lane": l}]
+#   .csv / .txt: 每行 "时间,轨道"（也可用空格分隔），# 开头为注释，允许表头
+# 谱面轨道数多于 game_tracks 时按比例映射（如 12 轨 -> 4 轨）
+
+import csv
+import heapq
+import json
+
+import numpy as np
+
+
+class ChartError(Exception):
+    """谱面文件格式错误"""
+
+
+class Chart:
+    """按时间排序的音符列表：times（秒）与 lanes（轨道下标）"""
+
+    def __init__(self, times, lanes, lane_count=None):
+        times = np.asarray(times, dtype=np.float64)
+        lanes = np.asarray(lanes, dtype=np.int32)
+        if times.shape != lanes.shape:
+            raise ChartError("音符时间与轨道数量不一致")
+        if len(lanes) and lanes.min() < 0:
+            raise ChartError("轨道下标不能为负")
+        order = np.argsort(times, kind="stable")
+        self.times = times[order]
+        self.lanes = lanes[order]
+        self.lane_count = int(lane_count or (self.lanes.max() + 1 if len(self.lanes) else 1))
+        if len(self.lanes) and self.lanes.max() >= self.lane_count:
+            raise ChartError(f"轨道下标超出范围（共 {self.lane_count} 轨）")
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def duration(self):
+        return float(self.times[-1]) if len(self) else 0.0
+
+    def per_lane(self, tracks):
+        """映射到 tracks 条轨道后，每条轨道的音符时间列表（已排序）"""
+        mapped = self.lanes * tracks // self.lane_count
+        return [self.times[mapped == lane].tolist() for lane in range(tracks)]
+
+    def summary(self, tracks=4):
+        counts = [len(times) for times in self.per_lane(tracks)]
+        nps = 0
+        if len(self):
+            # 任意 1 秒窗口内的最大音符数
+            ends = np.searchsorted(self.times, self.times + 1.0, side="left")
+            nps = int((ends - np.arange(len(self))).max())
+        return {
+            "notes": len(self),
+            "duration": self.duration,
+            "lane_count": self.lane_count,
+            "per_track": counts,
+            "max_notes_per_second": nps,
+        }
+
+
+def load_chart(path):
+    try:
+        if path.endswith(".json"):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            notes = [(n["time"], n["lane"]) if isinstance(n, dict) else n for n in data.get("notes", [])]
+            times = [float(t) for t, _ in notes]
+            lanes = [int(lane) for _, lane in notes]
+            return Chart(times, lanes, data.get("lanes"))
+        times, lanes = [], []
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.reader(f):
+                if len(row) == 1:
+                    row = row[0].split()
+                if not row or row[0].lstrip().startswith("#"):
+                    continue
+                try:
+                    t, lane = float(row[0]), int(row[1])
+                except ValueError:
+                    if times:
+                        raise
+                    continue  # 表头
+                times.append(t)
+                lanes.append(lane)
+        return Chart(times, lanes)
+    except (ValueError, KeyError, IndexError, TypeError) as e:
+        raise ChartError(f"{path}: {e}") from e
+
+
+def schedule_notes(lane_times, offset=0.0, merge_window=0.002):
+    """用最小堆按时间归并各轨道的音符，返回 [(时刻, [轨道, ...])]
+
+    时刻 = 音符时间 + offset；与当前组起点相差不超过 merge_window 的音符合并为同一组同时按下，
+    同一组内每条轨道只按一次。
+    """
+    heap = [(times[0], lane, 0) for lane, times in enumerate(lane_times) if times]
+    heapq.heapify(heap)
+    groups = []
+    while heap:
+        t, lane, i = heapq.heappop(heap)
+        if groups and t - groups[-1][2] <= merge_window:
+            if lane not in groups[-1][1]:
+                groups[-1][1].append(lane)
+        else:
+            groups.append((t + offset, [lane], t))
+        times = lane_times[lane]
+        if i + 1 < len(times):
+            heapq.heappush(heap, (times[i + 1], lane, i + 1))
+    return [(t, lanes) for t, lanes, _ in groups]
+
+
+# ============ 查看谱面 ============
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="查看谱面统计，并与固定间隔全按比较事件量")
+    parser.add_argument("file")
+    parser.add_argument("--tracks", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=0.167, help="固定间隔全按的间隔（秒）")
+    args = parser.parse_args()
+
+    chart = load_chart(args.file)
+    info = chart.summary(args.tracks)
+    groups = schedule_notes(chart.per_lane(args.tracks))
+    taps = sum(len(lanes) for _, lanes in groups)
+    periodic = int(np.ceil(chart.duration / args.interval)) * args.tracks if len(chart) else 0
+    print(json.dumps(info, indent=2, ensure_ascii=False))
+    print(f"🎼 按谱面: {taps} 次按下（{len(groups)} 组）；固定间隔全按: {periodic} 次"
+          + (f"，减少 {1 - taps / periodic:.0%}" if periodic else ""))
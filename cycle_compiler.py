@@ -0,0 +1,310 @@
+# cycle_compiler.py
+# 轮次编译器：把轮次脚本 + positions.json + config.json 编译成一条扁平的数组时间线（偏移, x, y, 动作）
+# 随机扰动用 NumPy 一次性批量生成，执行时只需按下标遍历
+
+import csv
+
+import numpy as np
+
+from input_backend import PRESS, RELEASE
+from cycle_script import resolve
+from chart import schedule_notes
+
+ACT_CLICK = 0   # 单次点击（进入 / 返回流程）
+ACT_TAP = 1     # 游戏内轨道点击；偏移相同的连续 TAP 组成一组同时发出
+ACT_PHASE = 2   # 阶段标记，x 为 phases 下标
+ACT_UNTIL = 3   # 画面等待点：x 为 states 下标，y 为画面出现后跳转到的锚点下标；超时即下一事件的偏移
+ACT_ANCHOR = 4  # 跳转锚点（空操作），位于被跳过部分的结束时刻，之后的等待照常保留
+ACT_DETECT = 5  # 判定线识别（game_mode 为 detect）：持续到下一事件的偏移，期间按画面按下轨道
+
+ACTION_NAMES = ("click", "tap", "phase", "until", "anchor", "detect")
+END_PHASE = "end"
+
+
+class CycleTimeline:
+    """一轮的完整事件时间线，按偏移（相对轮次开始，秒）升序排列"""
+
+    def __init__(self, offsets, xs, ys, actions, phases, game_time=0.0, states=()):
+        self.offsets = np.asarray(offsets, dtype=np.float64)
+        self.xs = np.asarray(xs, dtype=np.int32)
+        self.ys = np.asarray(ys, dtype=np.int32)
+        self.actions = np.asarray(actions, dtype=np.uint8)
+        self.phases = [str(name) for name in phases]  # 阶段名，PHASE 事件的 x 为其下标
+        self.game_time = float(game_time)              # 其中游戏内阶段的总时长
+        self.states = [str(name) for name in states]  # 画面名，UNTIL 事件的 x 为其下标
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def duration(self):
+        return float(self.offsets[-1]) if len(self) else 0.0
+
+    def phase_offset(self, name):
+        """阶段第一次出现的偏移；不存在时返回 None"""
+        if name not in self.phases:
+            return None
+        mask = (self.actions == ACT_PHASE) & (self.xs == self.phases.index(name))
+        hits = self.offsets[mask]
+        return float(hits[0]) if len(hits) else None
+
+    @property
+    def tap_groups(self):
+        """游戏内全按的组数"""
+        taps = self.offsets[self.actions == ACT_TAP]
+        return int(len(np.unique(taps)))
+
+    def plan(self):
+        """转换为执行用的 (偏移, 动作, 参数) 列表；同一时刻的 TAP 预先合并成一组按下/抬起事件
+
+        UNTIL 的参数为 (画面名, 跳转到的 plan 下标)。
+        """
+        offsets = self.offsets.tolist()
+        xs = self.xs.tolist()
+        ys = self.ys.tolist()
+        actions = self.actions.tolist()
+        steps = []
+        step_of = [0] * (len(offsets) + 1)  # 时间线下标 -> plan 下标
+        i, n = 0, len(offsets)
+        while i < n:
+            action = actions[i]
+            step_of[i] = len(steps)
+            if action == ACT_TAP:
+                burst = []
+                j = i
+                while j < n and actions[j] == ACT_TAP and offsets[j] == offsets[i]:
+                    burst.append((PRESS, xs[j], ys[j]))
+                    burst.append((RELEASE, xs[j], ys[j]))
+                    step_of[j] = len(steps)
+                    j += 1
+                steps.append((offsets[i], action, burst))
+                i = j
+            elif action == ACT_CLICK:
+                steps.append((offsets[i], action, (xs[i], ys[i])))
+                i += 1
+            elif action == ACT_UNTIL:
+                steps.append((offsets[i], action, (self.states[xs[i]], ys[i])))
+                i += 1
+            elif action in (ACT_ANCHOR, ACT_DETECT):
+                steps.append((offsets[i], action, None))
+                i += 1
+            else:
+                steps.append((offsets[i], action, self.phases[xs[i]]))
+                i += 1
+        step_of[n] = len(steps)
+        # 跳转目标换算为 plan 下标
+        for k, (offset, action, payload) in enumerate(steps):
+            if action == ACT_UNTIL:
+                steps[k] = (offset, action, (payload[0], step_of[payload[1]]))
+        return steps
+
+    def summary(self):
+        return {
+            "events": len(self),
+            "duration": self.duration,
+            "clicks": int(np.count_nonzero(self.actions == ACT_CLICK)),
+            "taps": int(np.count_nonzero(self.actions == ACT_TAP)),
+            "tap_groups": self.tap_groups,
+            "game_time": self.game_time,
+            "phases": {name: self.phase_offset(name) for name in self.phases},
+        }
+
+    def rows(self):
+        names = [ACTION_NAMES[a] for a in self.actions.tolist()]
+        return zip(self.offsets.tolist(), self.xs.tolist(), self.ys.tolist(), names)
+
+    def dump_csv(self, path):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(("offset", "x", "y", "action"))
+            writer.writerows(self.rows())
+
+    def save(self, path):
+        np.savez_compressed(path, offsets=self.offsets, xs=self.xs, ys=self.ys, actions=self.actions,
+                            phases=np.array(self.phases), game_time=self.game_time,
+                            states=np.array(self.states, dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data["offsets"], data["xs"], data["ys"], data["actions"],
+                   data["phases"].tolist(), float(data["game_time"]), data["states"].tolist())
+
+
+def diff_timelines(a, b):
+    """比较两条时间线：事件数、各阶段偏移，以及相同结构下的最大偏移差（秒）"""
+    sa, sb = a.summary(), b.summary()
+    result = {key: (sa[key], sb[key]) for key in ("events", "duration", "clicks", "taps", "tap_groups")}
+    names = list(dict.fromkeys(a.phases + b.phases))
+    result["phases"] = {name: (sa["phases"].get(name), sb["phases"].get(name)) for name in names}
+    if len(a) == len(b) and np.array_equal(a.actions, b.actions):
+        result["max_offset_delta"] = float(np.max(np.abs(a.offsets - b.offsets))) if len(a) else 0.0
+        result["moved_points"] = int(np.count_nonzero((a.xs != b.xs) | (a.ys != b.ys)))
+    return result
+
+
+def compile_cycle(config, script, points, game_tracks, rng=None, chart=None, blind=False):
+    """按轮次脚本和当前配置生成一轮时间线；click_jitter / time_jitter 的随机量在这里一次性生成
+
+    points 为 {点位名: (x, y)}，game_tracks 为游戏内各轨道坐标。
+    blind 为 True（没有画面指纹）时才编译标了 "blind" 的步骤。
+    给出 chart（谱面）时游戏阶段只在音符时刻按对应轨道，否则按固定间隔全按；
+    game_mode 为 detect 时游戏阶段只放一个 DETECT 事件，由执行时的判定线识别决定何时按下。
+    """
+    rng = rng or np.random.default_rng()
+    offsets, xs, ys, actions = [], [], [], []
+    phases = []
+    states = []
+    game_time = 0.0
+    count = [0]  # 已生成的事件数
+
+    def add(off, px, py, action):
+        offsets.append(np.atleast_1d(np.asarray(off, dtype=np.float64)))
+        xs.append(np.atleast_1d(np.asarray(px, dtype=np.int32)))
+        ys.append(np.atleast_1d(np.asarray(py, dtype=np.int32)))
+        actions.append(np.full(len(offsets[-1]), action, dtype=np.uint8))
+        count[0] += len(offsets[-1])
+
+    def until(name, t):
+        """插入画面等待点，返回所在块下标，跳转目标稍后用 jump_here 回填"""
+        if name not in states:
+            states.append(name)
+        add(t, states.index(name), 0, ACT_UNTIL)
+        return len(ys) - 1
+
+    def jump_here(chunks, t):
+        """在 t 处放置锚点，并让 chunks 中的等待点在画面出现后跳到这里"""
+        if not chunks:
+            return
+        for chunk in chunks:
+            ys[chunk][0] = count[0]
+        add(t, 0, 0, ACT_ANCHOR)
+
+    def mark(name, t):
+        if name not in phases:
+            phases.append(name)
+        add(t, phases.index(name), 0, ACT_PHASE)
+
+    def chart_game(t, duration):
+        # 谱面时刻 + chart_offset；扰动按组生成，同组轨道仍同时按下
+        lanes = np.asarray(game_tracks, dtype=np.int32).reshape(-1, 2)
+        groups = schedule_notes(chart.per_lane(len(lanes)), config["chart_offset"])
+        groups = [(gt, ls) for gt, ls in groups if 0 <= gt < duration]
+        if not groups:
+            return
+        group_offsets = np.array([gt for gt, _ in groups])
+        jitter = config["time_jitter"]
+        if jitter > 0:
+            group_offsets = np.clip(group_offsets + rng.uniform(-jitter, jitter, len(groups)),
+                                    0, np.nextafter(duration, 0))
+        counts = [len(ls) for _, ls in groups]
+        flat = np.concatenate([ls for _, ls in groups]).astype(np.intp)
+        offs = np.repeat(group_offsets, counts) + t
+        order = np.argsort(offs, kind="stable")
+        add(offs[order], lanes[flat[order], 0], lanes[flat[order], 1], ACT_TAP)
+
+    def game(t, duration):
+        if config["game_mode"] == "detect":
+            add(t, 0, 0, ACT_DETECT)
+            return
+        if chart is not None:
+            chart_game(t, duration)
+            return
+        # 第 k 组目标时间 = 起点 + k * 间隔 + 扰动（扰动只作用于单组，不累积到后续组）
+        interval = config["click_interval_in_game"]
+        jitter = min(config["time_jitter"], interval / 2)  # 保证组间顺序不变
+        rounds = int(np.ceil(duration / interval))
+        round_offsets = np.arange(rounds) * interval
+        if jitter > 0 and rounds > 1:
+            round_offsets[1:] += rng.uniform(-jitter, jitter, rounds - 1)
+        round_offsets = round_offsets[round_offsets < duration] + t
+        lanes = np.asarray(game_tracks, dtype=np.int32).reshape(-1, 2)
+        add(np.repeat(round_offsets, len(lanes)),
+            np.tile(lanes[:, 0], len(round_offsets)),
+            np.tile(lanes[:, 1], len(round_offsets)),
+            ACT_TAP)
+
+    t = 0.0
+    for phase in script["phases"]:
+        kind = phase.get("type", "steps")
+        for _ in range(int(phase.get("repeat", 1))):
+            mark(phase["name"], t)
+            if kind == "game":
+                duration = resolve(phase["duration"], config)
+                game(t, duration)
+                game_time += duration
+                t += duration
+            elif kind == "wait":
+                if "until" in phase:
+                    chunk = until(phase["until"], t)
+                    t += resolve(phase["duration"], config)
+                    jump_here([chunk], t)
+                else:
+                    t += resolve(phase["duration"], config)
+            else:
+                for step in phase.get("steps", []):
+                    if step.get("blind") and not blind:
+                        continue
+                    wait = resolve(step.get("wait", 0), config)
+                    pending = []
+                    for _ in range(int(step.get("repeat", 1))):
+                        if "click" in step:
+                            x, y = points[step["click"]]
+                            add(t, x, y, ACT_CLICK)
+                        if "until" in step:
+                            pending.append(until(step["until"], t))
+                        t += wait
+                    # 画面出现后跳过该步骤剩余的重复和等待
+                    jump_here(pending, t)
+            if kind != "wait" and "until" in phase:
+                chunk = until(phase["until"], t)
+                t += resolve(phase.get("wait", 0), config)
+                jump_here([chunk], t)
+            else:
+                t += resolve(phase.get("wait", 0), config)
+    mark(END_PHASE, t)
+
+    timeline = CycleTimeline(np.concatenate(offsets), np.concatenate(xs),
+                             np.concatenate(ys), np.concatenate(actions), phases, game_time, states)
+
+    # 坐标扰动批量生成（只作用于点击）
+    jitter_px = int(config["click_jitter"])
+    if jitter_px:
+        mask = (timeline.actions == ACT_CLICK) | (timeline.actions == ACT_TAP)
+        n = int(np.count_nonzero(mask))
+        timeline.xs[mask] += rng.integers(-jitter_px, jitter_px + 1, n, dtype=np.int32)
+        timeline.ys[mask] += rng.integers(-jitter_px, jitter_px + 1, n, dtype=np.int32)
+    return timeline
+
+
+# ============ 导出 / 比较时间线 ============
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from engine import BotEngine, CONFIG_FILE, POSITIONS_FILE
+    from input_backend import NullBackend
+
+    parser = argparse.ArgumentParser(description="编译一轮时间线并导出，或比较两条已保存的时间线")
+    parser.add_argument("files", nargs="*", help="两个 .npz 时间线文件（比较模式）")
+    parser.add_argument("--config", default=CONFIG_FILE)
+    parser.add_argument("--positions", default=POSITIONS_FILE)
+    parser.add_argument("--csv", help="导出为 CSV")
+    parser.add_argument("--npz", help="保存为 .npz（可用于比较）")
+    parser.add_argument("--seed", type=int, help="随机种子，便于复现")
+    args = parser.parse_args()
+
+    if len(args.files) == 2:
+        a, b = (CycleTimeline.load(path) for path in args.files)
+        print(json.dumps(diff_timelines(a, b), indent=2, ensure_ascii=False))
+    else:
+        engine = BotEngine(NullBackend(), config_file=args.config, positions_file=args.positions)
+        timeline = compile_cycle(engine.config, engine.script, engine.points, engine.game_tracks,
+                                 np.random.default_rng(args.seed), engine.chart, blind=engine.detector is None)
+        print(json.dumps(timeline.summary(), indent=2, ensure_ascii=False))
+        if args.csv:
+            timeline.dump_csv(args.csv)
+            print(f"💾 已导出: {args.csv}")
+        if args.npz:
+            timeline.save(args.npz)
+            print(f"💾 已保存: {args.npz}")
@@ -0,0 +1,98 @@
+# cycle_script.py
+# 轮次脚本：用 JSON 描述每轮的阶段、点击步骤、等待和循环次数（替代写死的进入 / 返回流程）
+#
+# 格式：
+#   points: [{"name": 点位名, "label": 校准提示}]，calibrate.py 按此顺序采集
+#   phases: [{"name": 阶段名, "type": "steps" | "game" | "wait", ...}]
+#     steps 阶段: "steps": [{"click": 点位名, "wait": 等待, "repeat": 次数}]，省略 click 即纯等待；
+#       步骤带 "blind": true 时只在没有画面指纹时执行（此时卡住检测看不到画面，不会为弹窗触发 recovery）
+#     game  阶段: "duration": 游戏时长
+#     wait  阶段: "duration": 等待时长
+#     所有阶段都可带 "wait"（阶段结束后等待）和 "repeat"（整个阶段重复次数）
+#   recovery（可选）: 与 steps 阶段格式相同的恢复流程，只在卡住检测（recovery.py）判定没有进展时执行；
+#     带 "until" 时以该画面出现作为恢复成功
+#   等待 / 时长可写数字（秒）或 config.json 中的参数名
+#   "until": 画面名 可加在步骤或阶段上：固定等待变为超时上限，画面提前出现就立即进入下一步
+#     （步骤带 repeat 时，画面出现即跳过剩余重复）；画面指纹见 screen_state.py，未采集时按固定等待执行
+
+import json
+
+PHASE_TYPES = ("steps", "game", "wait")
+TRACK_POINTS = ("track_left", "track_right")  # game 阶段需要的两个轨道端点
+
+
+class ScriptError(Exception):
+    """轮次脚本格式错误"""
+
+
+def resolve(value, config):
+    """把数字或参数名解析为秒数"""
+    if isinstance(value, str):
+        if value not in config:
+            raise ScriptError(f"未知参数: {value}")
+        return float(config[value])
+    return float(value)
+
+
+def load_script(path):
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            script = json.load(f)
+        except ValueError as e:
+            raise ScriptError(f"{path}: {e}") from e
+    validate_script(script)
+    return script
+
+
+def validate_script(script):
+    names = [p.get("name") for p in script.get("points", [])]
+    if not all(names) or len(set(names)) != len(names):
+        raise ScriptError("points 中的 name 不能为空或重复")
+    phases = script.get("phases")
+    if not phases:
+        raise ScriptError("缺少 'phases'")
+    recovery = recovery_phase(script)
+    if recovery is not None and recovery.get("type", "steps") != "steps":
+        raise ScriptError("recovery 只能是 steps 阶段")
+    for phase in phases + ([recovery] if recovery else []):
+        if "name" not in phase:
+            raise ScriptError("阶段缺少 'name'")
+        kind = phase.get("type", "steps")
+        if kind not in PHASE_TYPES:
+            raise ScriptError(f"阶段 {phase['name']} 的类型未知: {kind}")
+        if kind in ("game", "wait") and "duration" not in phase:
+            raise ScriptError(f"阶段 {phase['name']} 缺少 'duration'")
+        for step in phase.get("steps", []):
+            if "click" in step and step["click"] not in names:
+                raise ScriptError(f"阶段 {phase['name']} 引用了未定义的点位: {step['click']}")
+    if has_game(script):
+        missing = [name for name in TRACK_POINTS if name not in names]
+        if missing:
+            raise ScriptError(f"game 阶段需要点位: {', '.join(missing)}")
+
+
+def recovery_phase(script):
+    """脚本的恢复流程（补全阶段名），未定义时返回 None"""
+    recovery = script.get("recovery")
+    return dict(recovery, name=recovery.get("name", "recovery")) if recovery else None
+
+
+def has_game(script):
+    return any(phase.get("type") == "game" for phase in script["phases"])
+
+
+def point_labels(script):
+    """校准时的 (点位名, 提示) 列表"""
+    return [(p["name"], p.get("label", p["name"])) for p in script.get("points", [])]
+
+
+def required_points(script):
+    """脚本实际会点击的点位（含 game 阶段的轨道端点）"""
+    names = []
+    for phase in script["phases"] + ([script["recovery"]] if script.get("recovery") else []):
+        for step in phase.get("steps", []):
+            if "click" in step and step["click"] not in names:
+                names.append(step["click"])
+    if has_game(script):
+        names.extend(name for name in TRACK_POINTS if name not in names)
+    return names
@@ -0,0 +1,861 @@
+# engine.py
+# 自动演出核心引擎：配置 / 坐标加载、点击、主控制循环，不依赖 Tk（界面见 auto_game.py）
+
+import time
+import random
+import json
+import os
+import threading
+from timing import SystemClock, sleep_until
+from input_backend import DEFAULT_BACKEND, create_backend
+from tap_stats import TimingRecorder, format_summary, percentile
+from cycle_script import load_script, required_points, recovery_phase
+from session_log import SessionLog, phase_durations
+from recovery import Watchdog, stuck_reasons
+from metrics import Metrics, MetricsServer
+from timer_profile import TimerProfile
+
+# 默认参数（含新增随机范围）
+DEFAULT_CONFIG = {
+    "click_interval_enter": 0.7,
+    "load_time_before_game": 15.0,
+    "game_duration": 80.0,
+    "load_time_after_game": 12.0,
+    "click_interval_return": 1.5,
+    "click_interval_in_game": 0.167,  # 每轮“全按”间隔（秒）
+    "click_jitter": 2,               # 推荐 2 像素扰动，更自然
+    "time_jitter": 0.005,
+    "max_loops": 10,
+
+    # === 新增：随机时间范围 ===
+    "work_duration_min": 10 * 60,   # 最少工作 10 分钟（秒）
+    "work_duration_max": 20 * 60,   # 最多工作 20 分钟（秒）
+    "rest_duration_min": 30,        # 最少休息 30 秒
+    "rest_duration_max": 180,       # 最多休息 180 秒
+    "post_cycle_delay_min": 2,    # 每轮后最小延迟（秒）
+    "post_cycle_delay_max": 15,    # 每轮后最大延迟（秒）
+
+    "input_backend": DEFAULT_BACKEND,  # 输入后端: pyautogui / pynput / recording
+    "tap_hold_time": 0.0,          # 游戏内每次按下的保持时间（秒）
+    "tap_log_dir": "tap_logs",     # 每轮点击计时明细输出目录（留空则不输出）
+    "tap_log_format": "csv",       # 明细格式: csv / jsonl
+    "cycle_script": "scripts/default_cycle.json",  # 轮次脚本（阶段 / 步骤 / 等待）
+    "fingerprint_file": "fingerprints.npz",  # 画面指纹（calibrate.py 生成，不存在时按固定等待）
+    "state_threshold": 12.0,       # 画面匹配阈值（平均每通道差值）
+    "state_poll_interval": 0.1,    # 等待画面时的检测间隔（秒）
+    "capture_backend": "auto",     # 截图后端: auto / mss / xlib / pyautogui
+    "chart_file": "",              # 谱面文件（见 chart.py），留空则按固定间隔全按
+    "chart_offset": 0.0,           # 谱面同步偏移（秒），正数表示整体推迟
+    "game_mode": "timeline",       # 游戏内: timeline（谱面或固定间隔全按）/ detect（识别判定线上的音符）
+    "detect_threshold": 40.0,      # 判定线颜色偏离基线超过该值视为有音符
+    "detect_min_interval": 0.08,   # 同一轨道两次按下的最小间隔（秒）
+    "detect_y_offset": 0,          # 采样条相对轨道 y 坐标上移的像素（抵消截图到按下的延迟）
+    "detect_fps": 240,             # 识别帧率上限（0 为不限）
+    "detect_latency_budget": 0.016,  # 截图到按下的延迟预算（秒），p99 超出时提示
+    "session_db": "sessions.db",   # 会话记录（每轮阶段耗时 / 错误 / 休息），留空则不记录
+    "phase_model_file": "phase_model.json",  # 自适应等待：按画面实际出现时间缩短等待，留空则关闭
+    "adaptive_margin": 1.0,        # 学到的等待 = 实际 p99 + 该余量（秒），不超过配置值
+    "adaptive_min_samples": 20,    # 样本数达到后才使用学到的值
+    "watchdog_strikes": 1,         # 连续几轮没有进展（出错 / 画面未出现 / 超时）后执行恢复流程
+    "watchdog_overrun": 10.0,      # 一轮实际耗时比编译时长多出该秒数视为没有进展
+    "recovery_attempts": 3,        # 恢复流程最多连续执行次数
+    "capture_worker": 0,           # 1: detect 模式下截图和识别放到独立进程（capture_worker.py），不占点击线程的 GIL
+    "metrics_port": 0,             # 监控指标端口（Prometheus 文本格式，只监听 127.0.0.1），0 为关闭
+    "timer_profile_file": "timer_profile.json",  # 本机计时特性（timer_profile.py），据此补偿 sleep 超调，留空则关闭
+    "profile_dir": "",             # 性能剖析输出目录（profiling.py：tracemalloc 快照 + cProfile），留空则关闭
+    "profile_every": 10,           # 每隔多少轮剖析一整轮并保存内存快照
+}
+
+CONFIG_FILE = "config.json"
+POSITIONS_FILE = "positions.json"
+
+# 时间线阶段标记对应的状态栏文字（其它阶段显示阶段名）
+PHASE_STATUS = {
+    "enter": "➡️ 第 {n} 轮: 进入流程",
+    "game": "🎮 第 {n} 轮: 游戏中",
+    "return": "🔚 第 {n} 轮: 返回主菜单",
+    "recovery": "🛟 第 {n} 轮: 恢复流程",
+    "end": None,
+}
+
+# 旧版 positions.json 中 enter_steps 的顺序（calibrate.py 已把登陆步骤挪到最后）
+LEGACY_ENTER_STEPS = [
+    "menu", "home", "start_live", "back", "start_live_again", "solo_live",
+    "confirm", "start_play", "login_enter", "login_error_confirm", "dismiss_notice",
+]
+
+
+class PositionsError(Exception):
+    """坐标文件格式错误"""
+
+
+class BotEngine:
+    """无界面引擎；界面相关的 update_status / update_info / notify / warn 由子类覆盖"""
+
+    name = None  # 多开时的实例名（orchestrator.py），写入会话记录
+
+    def __init__(self, backend=None, config=None, positions_file=POSITIONS_FILE,
+                 clock=None, config_file=CONFIG_FILE):
+        self.running = False
+        self.stop_event = threading.Event()  # stop() 时设置，打断所有等待
+        self.worker_thread = None
+        self.clock = clock or SystemClock()  # 所有等待都经过 clock，模拟时可替换为虚拟时钟
+        self.start_time = None
+        self.current_work_end_time = None  # 动态工作周期结束时间
+        self.loop_count = 0
+        self.script = None
+        self.points = {}        # 点位名 -> (x, y)
+        self.game_tracks = []
+        self.chart = None       # 谱面，未配置时为 None
+        self.detector = None    # 画面识别，未采集指纹时为 None
+        self.capture = None     # 区域截图，第一次需要截图时才创建（见 region_capture）
+        self.lane_detector = None  # 判定线识别，首次进入 detect 模式的游戏阶段时创建
+        self.lane_bursts = None
+        self.capture_worker = None  # 独立进程识别（capture_worker 为 1 时），运行期间存在
+        self.state_log = []     # 本轮各画面等待: (画面名, 实际等待, 超时上限, 是否提前出现)
+        self.phase_marks = []   # 本轮各阶段开始: (阶段名, perf_counter)
+        self.session = None     # 会话记录，运行期间打开
+        self.phase_model = None  # 自适应等待模型，phase_model_file 为空时为 None
+        self.learned = {}       # 本轮实际使用的学到的等待: {参数名: 秒}
+        self.watchdog = None    # 卡住检测（recovery.py）
+        self.metrics = Metrics()  # 监控指标（metrics.py），只在阶段切换 / 每轮结束时更新
+        self.metrics_server = None
+        self.timer_profile = None  # 本机计时特性（timer_profile.py），timer_profile_file 为空时为 None
+        self.profiler = None    # 性能剖析（profiling.py），profile_dir 非空时运行期间存在
+        self.config = DEFAULT_CONFIG.copy()
+        # 点击计时（预分配，热循环内不分配内存）
+        self.tap_stats = TimingRecorder(("scheduled", "actual", "lateness", "burst", "overshoot"))
+        self.click_stats = TimingRecorder(("click",), capacity=256)
+        self.detect_stats = TimingRecorder(("process", "interval"), capacity=4096)  # 判定线识别每帧耗时
+        if config is None:
+            self.load_saved_config(config_file)
+        else:
+            self.config.update(config)
+        self.positions_file = positions_file
+        self.script = load_script(self.config["cycle_script"])
+        self.load_positions(positions_file)
+        self.load_chart()
+        self.load_detector()
+        self.load_phase_model()
+        self.load_timer_profile()
+        self.watchdog = Watchdog(self.config["watchdog_strikes"])
+        self.backend = backend or create_backend(self.config["input_backend"])
+
+    def load_chart(self):
+        path = self.config["chart_file"]
+        self.chart = None
+        if not path:
+            return
+        from chart import ChartError, load_chart  # 只在配置了谱面时才需要
+        try:
+            self.chart = load_chart(path)
+        except OSError as e:
+            raise ChartError(f"无法读取谱面 {path}: {e}") from e
+        print(f"✅ 谱面加载成功: {path}（{len(self.chart)} 个音符）")
+
+    def load_detector(self):
+        path = self.config["fingerprint_file"]
+        if path and os.path.exists(path):
+            try:
+                from screen_state import StateDetector  # 只在有指纹文件时才需要
+                self.detector = StateDetector.load(path, grab=self.region_capture().grab_region,
+                                                   threshold=self.config["state_threshold"])
+                print(f"✅ 画面指纹加载成功: {', '.join(self.detector.fingerprints)}")
+            except Exception as e:
+                print(f"⚠️ 画面指纹加载失败，按固定等待执行: {e}")
+
+    def region_capture(self):
+        """区域截图：capture 模块依赖 NumPy，第一次需要截图时才导入并创建"""
+        if self.capture is None:
+            from capture import RegionCapture
+            self.capture = RegionCapture(self.config["capture_backend"])
+        return self.capture
+
+    def load_phase_model(self):
+        path = self.config["phase_model_file"]
+        self.phase_model = None
+        if path:
+            from phase_model import PhaseModel  # 只在开启自适应等待时才需要
+            try:
+                self.phase_model = PhaseModel.load(path)
+            except Exception as e:
+                print(f"⚠️ 自适应等待加载失败，按配置值等待: {e}")
+                self.phase_model = PhaseModel(path)
+
+    def load_timer_profile(self):
+        """读取本机计时特性并设置截止时间前的自旋阈值；本机还没有记录时在开始运行时测量（见 calibrate_timer）"""
+        path = self.config["timer_profile_file"]
+        self.timer_profile = None
+        if not path or not isinstance(self.clock, SystemClock):
+            return  # 虚拟时钟不需要
+        try:
+            self.timer_profile = TimerProfile.load(path)
+        except Exception as e:
+            print(f"⚠️ 计时特性加载失败，重新测量: {e}")
+            self.timer_profile = TimerProfile(path)
+        entry = self.timer_profile.current()
+        if entry is not None:
+            self.apply_timer_profile(entry)
+
+    def calibrate_timer(self):
+        """本机没有计时特性记录（或系统 / Python 版本变了）时测量并保存，约 1 秒"""
+        if self.timer_profile is None or self.timer_profile.current() is not None:
+            return
+        self.update_status("⏱️ 正在测量本机计时特性…")
+        try:
+            self.apply_timer_profile(self.timer_profile.ensure())
+        except Exception as e:
+            print(f"⚠️ 无法保存计时特性: {e}")
+
+    def apply_timer_profile(self, entry):
+        self.clock.spin = entry["spin"]
+        overshoot = max(s["p90"] for s in entry["sleep_overshoot_ms"].values())
+        print(f"✅ 计时补偿: 截止时间前 {entry['spin'] * 1000:.2f}ms 开始自旋（sleep 超调 p90 {overshoot:.2f}ms）")
+
+    def load_saved_config(self, path=CONFIG_FILE):
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+                for k in self.config.keys():
+                    if k in saved:
+                        # 字符串参数（如输入后端）原样保留，其余按数字处理
+                        if isinstance(self.config[k], str):
+                            self.config[k] = str(saved[k])
+                        else:
+                            self.config[k] = float(saved[k])
+            except Exception as e:
+                self.warn("⚠️ 配置加载失败", f"使用默认值：\n{e}")
+
+    def apply_overrides(self, overrides):
+        """临时覆盖参数（不写回 config.json），并重新加载受影响的脚本 / 谱面 / 指纹"""
+        self.config.update(overrides)
+        if "cycle_script" in overrides:
+            self.script = load_script(self.config["cycle_script"])
+            self.load_positions(self.positions_file)
+        if "chart_file" in overrides:
+            self.load_chart()
+        if "fingerprint_file" in overrides or "capture_backend" in overrides:
+            self.capture = None
+            self.detector = None
+            self.load_detector()
+        if "phase_model_file" in overrides:
+            self.load_phase_model()
+        if "watchdog_strikes" in overrides:
+            self.watchdog = Watchdog(self.config["watchdog_strikes"])
+        if "timer_profile_file" in overrides:
+            self.load_timer_profile()
+
+    def save_config(self):
+        try:
+            with open(CONFIG_FILE, "w", encoding="utf-8") as f:
+                json.dump(self.config, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            print(f"⚠️ 无法保存配置: {e}")
+
+    def load_positions(self, path=POSITIONS_FILE):
+        """读取 calibrate.py 生成的坐标文件；文件缺失抛出 FileNotFoundError，格式错误抛出 PositionsError
+
+        新格式为 {"points": {点位名: [x, y]}}，旧格式（enter_steps / track_left / track_right / return_pos）按
+        LEGACY_ENTER_STEPS 映射到点位名。
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+
+            if "points" in data:
+                points = {name: tuple(pos) for name, pos in data["points"].items()}
+            else:
+                points = {}
+                if "enter_steps" in data:
+                    points.update(zip(LEGACY_ENTER_STEPS, (tuple(pos) for pos in data["enter_steps"])))
+                for key, name in (("track_left", "track_left"), ("track_right", "track_right"),
+                                  ("return_pos", "return")):
+                    if key in data:
+                        points[name] = tuple(data[key])
+
+            missing = [name for name in required_points(self.script) if name not in points]
+            if missing:
+                raise KeyError(f"缺少点位: {', '.join(missing)}")
+            self.points = points
+
+            if "track_left" in points:
+                x_left, y_left = points["track_left"]
+                x_right, y_right = points["track_right"]
+                y = y_left
+                x_step = (x_right - x_left) / 3
+                self.game_tracks = [(int(x_left + i * x_step), y) for i in range(4)]
+        except (KeyError, ValueError, TypeError) as e:
+            raise PositionsError(e) from e
+
+        print("✅ 坐标加载成功")
+
+    # ==================== 界面钩子（无界面时输出到终端） ====================
+    def update_status(self, text, color="black"):
+        pass
+
+    def update_info(self, text):
+        pass
+
+    def notify(self, title, text):
+        print(f"{title} {text}")
+
+    def warn(self, title, text):
+        print(f"{title} {text}")
+
+    def begin(self):
+        """重置计数并开始新的工作周期"""
+        self.running = True
+        self.stop_event.clear()
+        self.loop_count = 0
+        self.start_time = self.clock.time()
+        self.current_work_end_time = self.start_time + self.get_current_work_duration()  # ✅ 设置首次工作结束时间
+
+    def stop(self):
+        self.running = False
+        self.stop_event.set()
+
+    def wait(self, seconds):
+        """可被 stop() 立即打断的等待，返回是否仍在运行"""
+        self.clock.sleep(seconds, self.stop_event)
+        return self.running
+
+    def idle(self, kind, seconds):
+        """休息 / 轮次间延迟 / 出错退避：可打断的等待，并记入会话记录"""
+        self.metrics.set_phase(kind)
+        started = self.clock.time()
+        running = self.wait(seconds)
+        elapsed = self.clock.time() - started
+        self.metrics.add_idle(kind, elapsed)
+        if self.session is not None:
+            self.session.add_idle(kind, started, elapsed)
+        return running
+
+    def start_session(self):
+        path = self.config["session_db"]
+        if not path:
+            return
+        try:
+            self.session = SessionLog(path)
+            self.session.start(self.config["cycle_script"], self.config, self.clock.time(), self.name)
+        except Exception as e:
+            print(f"⚠️ 无法打开会话记录: {e}")
+            self.session = None
+
+    def end_session(self):
+        if self.session is not None:
+            try:
+                self.session.end(self.clock.time())
+                self.session.close()
+            except Exception as e:
+                print(f"⚠️ 无法写入会话记录: {e}")
+            self.session = None
+
+    def start_metrics(self):
+        """按 metrics_port 启动监控指标服务；服务在引擎存续期间一直运行，停止后仍可读取最后的状态"""
+        port = int(self.config["metrics_port"])
+        server = self.metrics_server
+        if server is not None and (not port or server.port != port):
+            server.close()
+            self.metrics_server = server = None
+        if port and server is None:
+            try:
+                self.metrics_server = MetricsServer(self.metrics, port)
+                print(f"📈 监控指标: http://127.0.0.1:{port}/metrics")
+            except OSError as e:
+                print(f"⚠️ 无法启动监控指标服务（端口 {port}）: {e}")
+        self.metrics.set("running", 1)
+
+    def start_capture_worker(self):
+        """detect 模式且 capture_worker 为 1 时启动识别进程；启动失败时退回同进程识别"""
+        cfg = self.config
+        if cfg["game_mode"] != "detect" or not cfg["capture_worker"] or self.capture_worker is not None:
+            return
+        from capture_worker import CaptureWorker  # 只在使用识别进程时才需要
+        try:
+            worker = CaptureWorker(cfg["capture_backend"], self.game_tracks, cfg["detect_threshold"],
+                                   cfg["detect_min_interval"], cfg["detect_y_offset"], cfg["detect_fps"])
+        except Exception as e:
+            print(f"⚠️ 无法启动识别进程，改为同进程识别: {e}")
+            return
+        if not worker.wait_ready():
+            print("⚠️ 识别进程未能就绪，改为同进程识别")
+            worker.close()
+            return
+        self.capture_worker = worker
+        print(f"🧵 识别进程已启动（pid {worker.process.pid}）")
+
+    def start_profiler(self):
+        if not self.config["profile_dir"] or self.profiler is not None:
+            return
+        from profiling import SessionProfiler  # 只在开启剖析时才需要
+        try:
+            self.profiler = SessionProfiler(self.config["profile_dir"], self.config["profile_every"])
+            self.profiler.start()
+        except Exception as e:
+            print(f"⚠️ 无法开启性能剖析: {e}")
+            self.profiler = None
+
+    def stop_profiler(self):
+        if self.profiler is not None:
+            self.profiler.stop()
+            self.profiler = None
+
+    def profile_cycle(self, started):
+        """剖析本轮结束：保存汇总，剖析的轮次同时保存 .prof 和内存快照"""
+        try:
+            self.profiler.end_cycle(self.loop_count, self.clock.time() - started)
+        except Exception as e:
+            print(f"⚠️ 无法保存性能剖析: {e}")
+            self.stop_profiler()
+
+    def stop_capture_worker(self):
+        if self.capture_worker is not None:
+            self.capture_worker.close()
+            self.capture_worker = None
+
+    def record_cycle(self, started, error=None):
+        """把本轮的阶段耗时、点击数、画面等待和错误写入会话记录，并更新监控指标"""
+        duration = self.clock.time() - started
+        actual = self.tap_stats.column("actual")
+        span = float(actual[-1] - actual[0]) if len(actual) > 1 else 0.0
+        self.metrics.cycle(self.loop_count, duration, error, self.tap_stats.count, self.click_stats.count,
+                           span, self.tap_stats.column("lateness"))
+        if self.session is None:
+            return
+        try:
+            self.session.add_cycle(self.loop_count, started, duration,
+                                   self.tap_stats.count, self.click_stats.count, error,
+                                   phase_durations(self.phase_marks, self.clock.perf_counter()),
+                                   self.state_log)
+        except Exception as e:
+            print(f"⚠️ 无法写入会话记录: {e}")
+
+    def learned_waits(self):
+        """本轮使用的学到的等待：{参数名: 秒}，只包含比配置值短的"""
+        if self.phase_model is None:
+            return {}
+        cfg = self.config
+        from phase_model import adaptive_waits
+        learned = {}
+        for param in adaptive_waits(self.script).values():
+            configured = float(cfg[param])
+            limit = self.phase_model.limit(param, configured, cfg["adaptive_margin"], cfg["adaptive_min_samples"])
+            if limit < configured:
+                learned[param] = limit
+        return learned
+
+    def learn_waits(self):
+        """用本轮的画面等待更新自适应等待模型；学到的时限内画面没出现时放宽时限"""
+        if self.phase_model is None or not self.state_log:
+            return
+        from phase_model import adaptive_waits
+        waits = adaptive_waits(self.script)
+        for state, waited, _, seen in self.state_log:
+            param = waits.get(state)
+            if param is None:
+                continue
+            if seen:
+                self.phase_model.observe(param, waited)
+            elif param in self.learned:
+                self.phase_model.miss(param, self.learned[param])
+                print(f"  ⚠️ 画面 {state} 未在学到的 {self.learned[param]:.2f}s 内出现，下一轮放宽 {param}")
+        try:
+            self.phase_model.save()
+        except Exception as e:
+            print(f"⚠️ 无法保存自适应等待: {e}")
+
+    def start_worker(self):
+        """在后台线程运行主控制循环；上一次的线程尚未退出时先等它结束，避免两个循环同时点击"""
+        self.join_worker()
+        self.worker_thread = threading.Thread(target=self.main_control_loop, daemon=True)
+        self.worker_thread.start()
+        return self.worker_thread
+
+    def join_worker(self, timeout=None):
+        """等待工作线程退出（在工作线程自身中调用时直接返回），返回线程是否已结束"""
+        thread = self.worker_thread
+        if thread is None or thread is threading.current_thread():
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    # === 新增：随机时间生成方法 ===
+    def get_current_work_duration(self):
+        min_sec = self.config["work_duration_min"]
+        max_sec = self.config["work_duration_max"]
+        return random.uniform(min_sec, max_sec)
+
+    def get_current_rest_duration(self):
+        min_sec = self.config["rest_duration_min"]
+        max_sec = self.config["rest_duration_max"]
+        return random.uniform(min_sec, max_sec)
+
+    def get_post_cycle_delay(self):
+        min_sec = self.config["post_cycle_delay_min"]
+        max_sec = self.config["post_cycle_delay_max"]
+        return random.uniform(min_sec, max_sec)
+
+    def should_take_rest(self):
+        """判断是否应该进入休息（基于当前工作周期结束时间）"""
+        return self.clock.time() >= self.current_work_end_time
+
+    def check_max_loops(self):
+        max_loops = int(self.config["max_loops"])
+        if max_loops > 0 and self.loop_count >= max_loops:
+            self.running = False
+            self.update_status(f"✅ 已完成 {max_loops} 轮", "green")
+            self.notify("✅", f"已完成 {max_loops} 轮，自动停止")
+            return True
+        return False
+
+    def main_control_loop(self):
+        """主控制循环：完成当前轮次后再决定是否休息"""
+        self.calibrate_timer()
+        self.start_metrics()
+        self.start_capture_worker()
+        self.start_session()
+        self.start_profiler()
+        try:
+            self.control_loop()
+        finally:
+            self.stop_profiler()
+            self.end_session()
+            self.stop_capture_worker()
+            self.metrics.set("running", 0)
+        self.stop()
+
+    def control_loop(self):
+        while self.running:
+            # 检查是否达到最大循环次数
+            if self.check_max_loops():
+                break
+
+            # 检查是否需要休息（但先完成本轮）
+            if self.should_take_rest():
+                self.update_status("😴 准备休息：完成当前轮后将休息", "blue")
+                self.run_single_cycle()
+                if not self.running:
+                    break
+
+                # 执行随机休息
+                rest_duration = self.get_current_rest_duration()
+                self.update_status(f"⏸️ 正在休息 ({int(rest_duration)} 秒)", "red")
+                if not self.idle("rest", rest_duration):
+                    break
+
+                # 休息结束，重置新的工作周期
+                self.start_time = self.clock.time()
+                self.current_work_end_time = self.start_time + self.get_current_work_duration()
+                continue
+
+            # 正常执行一轮
+            self.run_single_cycle()
+
+            # ✅ 每轮结束后加随机延迟
+            if self.running:
+                self.idle("delay", self.get_post_cycle_delay())
+
+    def run_single_cycle(self):
+        """执行一次完整的进入-游戏-返回流程"""
+        if not self.running:
+            return
+
+        self.loop_count += 1
+        self.metrics.set("loop", self.loop_count)
+        self.tap_stats.reset()
+        self.click_stats.reset()
+        self.detect_stats.reset()
+        self.state_log = []
+        self.phase_marks = []
+        started = self.clock.time()
+        elapsed_min = int((started - self.start_time) // 60)
+        info = f"🔄 第 {self.loop_count} 轮\n⏱️  已运行: {elapsed_min} 分钟"
+        self.update_info(info)
+
+        error = None
+        expected = None
+        try:
+            if self.profiler is not None:
+                self.profiler.begin_cycle(self.loop_count)
+            timeline = self.compile_cycle()
+            expected = timeline.duration
+            self.execute_timeline(timeline)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"❌ 第 {self.loop_count} 轮出错: {e}")
+        finally:
+            self.report_timing()
+            self.record_cycle(started, error)
+            self.learn_waits()
+            if self.profiler is not None:
+                self.profile_cycle(started)
+        if not self.running:
+            return
+        reasons = self.check_progress(started, expected, error)
+        if reasons and self.recover(reasons):
+            return
+        if error is not None:
+            self.idle("backoff", 5)
+
+    # ==================== 卡住检测 / 恢复 ====================
+    def check_progress(self, started, expected, error):
+        """本轮结束后交给卡住检测，需要恢复时返回原因列表"""
+        overrun = self.clock.time() - started - expected if expected is not None else 0.0
+        reasons = stuck_reasons(error, self.state_log, overrun, self.config["watchdog_overrun"])
+        return self.watchdog.check(started, reasons)
+
+    def start_recovery(self, reasons):
+        """返回恢复流程；脚本没有定义 recovery 时返回 None"""
+        recovery = recovery_phase(self.script)
+        if recovery is None:
+            self.watchdog.reset()
+        else:
+            print(f"🛟 第 {self.loop_count} 轮没有进展（{'; '.join(reasons)}），执行恢复流程")
+        return recovery
+
+    def compile_recovery(self, recovery):
+        from cycle_compiler import compile_cycle
+        config = dict(self.config, **self.learned) if self.learned else self.config
+        return compile_cycle(config, {"phases": [recovery]}, self.points, self.game_tracks,
+                             blind=self.detector is None)
+
+    def recovered(self, recovery):
+        """恢复流程带 until 且采集了该画面时以画面出现为准，否则视为已恢复"""
+        state = recovery.get("until")
+        if self.detector is None or state not in self.detector:
+            return True
+        return any(hit for name, _, _, hit in self.state_log if name == state)
+
+    def needs_recovery(self, recovery):
+        """恢复流程的目标画面已经在屏幕上时不必再点（点击位置在该画面上可能是别的按钮）"""
+        state = recovery.get("until")
+        return self.detector is None or state not in self.detector or not self.detector.matches(state)
+
+    def end_recovery(self, reasons, spent, attempts, recovered):
+        """输出并记录恢复耗时（从第一轮没有进展的轮次开始算起）"""
+        since = self.watchdog.since
+        elapsed = self.clock.time() - since
+        self.watchdog.reset()
+        self.metrics.inc("recoveries_total")
+        self.metrics.inc("recovery_seconds_total", elapsed)
+        if recovered:
+            self.update_status(f"✅ 第 {self.loop_count} 轮: 已恢复（{elapsed:.1f}s）", "green")
+        else:
+            self.update_status(f"⚠️ 第 {self.loop_count} 轮: {attempts} 次恢复均未成功，继续下一轮", "red")
+        if self.session is not None:
+            try:
+                self.session.add_recovery(self.loop_count, "; ".join(reasons), since, elapsed, spent,
+                                          attempts, recovered)
+            except Exception as e:
+                print(f"⚠️ 无法写入会话记录: {e}")
+
+    def recover(self, reasons):
+        """执行恢复流程直到回到目标画面或用完次数；脚本没有恢复流程时返回 False"""
+        recovery = self.start_recovery(reasons)
+        if recovery is None:
+            return False
+        spent = 0.0
+        attempts = 0
+        recovered = not self.needs_recovery(recovery)
+        while not recovered and self.running and attempts < int(self.config["recovery_attempts"]):
+            attempts += 1
+            self.state_log = []
+            t0 = self.clock.time()
+            try:
+                self.execute_timeline(self.compile_recovery(recovery))
+            except Exception as e:
+                print(f"❌ 恢复流程出错: {e}")
+            spent += self.clock.time() - t0
+            recovered = self.recovered(recovery)
+            if recovered or not self.idle("backoff", 5):
+                break
+        self.end_recovery(reasons, spent, attempts, recovered)
+        return True
+
+    def compile_cycle(self):
+        """按当前配置和坐标生成本轮时间线；有学到的等待时替换对应参数
+
+        没有画面指纹时卡住检测看不到画面，只会因出错 / 超时触发恢复，脚本中标了 "blind" 的步骤（如登陆 / 关公告）
+        仍然每轮执行。
+        """
+        from cycle_compiler import compile_cycle  # 依赖 NumPy，第一轮编译时才导入
+        self.learned = self.learned_waits()
+        config = dict(self.config, **self.learned) if self.learned else self.config
+        return compile_cycle(config, self.script, self.points, self.game_tracks, chart=self.chart,
+                             blind=self.detector is None)
+
+    def execute_timeline(self, timeline):
+        """回放编译好的时间线：热循环只做下标遍历，没有字典查找和随机数调用"""
+        from cycle_compiler import ACT_TAP, ACT_CLICK, ACT_UNTIL, ACT_ANCHOR, ACT_DETECT
+        plan = timeline.plan()
+        self.tap_stats.ensure_capacity(timeline.tap_groups + 16)
+        clock = self.clock
+        backend = self.backend
+        hold = self.config["tap_hold_time"]
+        skip_after = self.config["click_interval_in_game"]  # 落后超过一组间隔的全按直接跳过，不补点
+        record_tap = self.tap_stats.record
+        record_click = self.click_stats.record
+        perf_counter = time.perf_counter
+        taps = skipped = 0
+
+        detector = self.detector
+        stop_event = self.stop_event
+        origin = game_origin = clock.perf_counter()
+        i, n = 0, len(plan)
+        while i < n and self.running:
+            offset, action, payload = plan[i]
+            i += 1
+            scheduled = origin + offset
+            actual, overshoot = sleep_until(scheduled, clock, stop_event)
+            if not self.running:
+                break
+            if action == ACT_TAP:
+                if actual - scheduled > skip_after:
+                    skipped += 1
+                    continue
+                burst_time = backend.batch(payload, hold)
+                record_tap(scheduled - game_origin, actual - game_origin, actual - scheduled,
+                           burst_time, overshoot)
+                taps += 1
+            elif action == ACT_CLICK:
+                t0 = perf_counter()
+                backend.click(*payload)
+                record_click(perf_counter() - t0)
+            elif action == ACT_UNTIL:
+                state, jump = payload
+                if detector is None or state not in detector:
+                    continue
+                # 固定等待作为超时；画面提前出现时后续事件整体前移
+                timeout = origin + plan[i][0] if i < n else actual
+                seen = self.wait_for_state(state, timeout)
+                self.state_log.append((state, (seen or clock.perf_counter()) - actual,
+                                       timeout - actual, seen is not None))
+                if seen is not None and jump < n:
+                    origin = seen - plan[jump][0]
+                    i = jump
+            elif action == ACT_ANCHOR:
+                continue
+            elif action == ACT_DETECT:
+                taps += self.detect_lanes(game_origin, origin + plan[i][0] if i < n else actual)
+            else:
+                game_origin = scheduled
+                self.phase_marks.append((payload, actual))
+                self.metrics.set_phase(payload)
+                status = PHASE_STATUS.get(payload, "▶️ 第 {n} 轮: " + payload)
+                if status:
+                    self.update_status(status.format(n=self.loop_count))
+
+        if timeline.game_time:
+            print(f"⏱️ 第 {self.loop_count} 轮: {taps} 次全按, 跳过 {skipped} 轮")
+
+    def detect_lanes(self, game_origin, end):
+        """判定线识别：在 end 前循环截图，轨道上出现音符时立即按下；返回按下的组数"""
+        cfg = self.config
+        if self.lane_bursts is None:
+            from lane_detector import lane_bursts  # 只在 detect 模式下才需要
+            self.lane_bursts = lane_bursts(self.game_tracks)
+        if self.capture_worker is not None:
+            detector = self.capture_worker
+        else:
+            if self.lane_detector is None:
+                from lane_detector import LaneDetector
+                self.lane_detector = LaneDetector(self.region_capture(), self.game_tracks, cfg["detect_threshold"],
+                                                  cfg["detect_min_interval"], cfg["detect_y_offset"])
+            detector = self.lane_detector
+        detector.reset()
+        bursts = self.lane_bursts
+        clock = self.clock
+        backend = self.backend
+        hold = cfg["tap_hold_time"]
+        period = 1.0 / cfg["detect_fps"] if cfg["detect_fps"] else 0.0
+        remaining = max(0.0, end - clock.perf_counter())
+        self.detect_stats.ensure_capacity(int(remaining * (cfg["detect_fps"] or 1000)) + 16)
+        # detect_min_interval 为 0（每个上升沿都按）时按 1ms 估算容量
+        self.tap_stats.ensure_capacity(self.tap_stats.count
+                                       + int(remaining / max(cfg["detect_min_interval"], 1e-3) * detector.lanes) + 16)
+        record_frame = self.detect_stats.record
+        record_tap = self.tap_stats.record
+        taps = 0
+        last = clock.perf_counter()
+        while self.running:
+            t0 = clock.perf_counter()
+            if t0 >= end:
+                break
+            mask = detector.poll(t0)
+            t1 = clock.perf_counter()
+            if mask:
+                burst_time = backend.batch(bursts[mask], hold)
+                done = t1 + burst_time
+                # lateness 即截图开始到按下完成的延迟（识别进程中截图开始得更早）
+                captured = detector.captured
+                record_tap(captured - game_origin, done - game_origin, done - captured, burst_time, 0.0)
+                taps += 1
+            record_frame(t1 - t0, t0 - last)
+            last = t0
+            if period:
+                sleep_until(min(t0 + period, end), clock, self.stop_event)
+
+        frames = self.detect_stats.count
+        if frames:
+            latency = sorted(self.tap_stats.column("lateness")[-taps:]) if taps else []
+            p99 = percentile(latency, 99)
+            elapsed = sum(self.detect_stats.column("interval"))
+            fps = frames / elapsed if elapsed > 0 else 0.0
+            budget = cfg["detect_latency_budget"]
+            print(f"👁️ 判定线识别: {frames} 帧（{fps:.0f} fps），{taps} 组按下，"
+                  f"截图→按下 p99 {p99 * 1000:.1f}ms / 预算 {budget * 1000:.0f}ms")
+            if p99 > budget:
+                over = sum(1 for v in latency if v > budget)
+                print(f"  ⚠️ {over} 组按下超出延迟预算，可换用更快的截图后端（capture_backend）")
+            if detector is self.capture_worker:
+                s = detector.stats()
+                print(f"  🧵 识别进程: 读到 {s['frames']} 帧，丢弃 {s['dropped']} 帧，"
+                      f"帧龄 p50 {s['age_ms_p50']:.1f}ms / p99 {s['age_ms_p99']:.1f}ms")
+        return taps
+
+    def wait_for_state(self, state, deadline):
+        """在 deadline 前轮询画面，出现时返回当时的时间，超时返回 None"""
+        clock = self.clock
+        poll = self.config["state_poll_interval"]
+        while self.running:
+            if self.detector.matches(state):
+                return clock.perf_counter()
+            remaining = deadline - clock.perf_counter()
+            if remaining <= 0:
+                return None
+            clock.sleep(min(poll, remaining), self.stop_event)
+        return None
+
+    def report_timing(self):
+        """输出本轮点击计时的百分位汇总，并按配置导出明细"""
+        if self.tap_stats.count == 0 and self.click_stats.count == 0:
+            return
+        print(f"📊 第 {self.loop_count} 轮计时汇总:")
+        summary = self.tap_stats.summary(("lateness", "burst", "overshoot"))
+        summary.update(self.click_stats.summary())
+        if self.detect_stats.count:
+            summary.update(self.detect_stats.summary(("process",)))
+        print(format_summary(summary))
+        for state, waited, limit, seen in self.state_log:
+            mark = "✅ 提前出现" if seen else "⌛ 超时"
+            print(f"  🔍 等待画面 {state}: {waited:.2f}s / 上限 {limit:.2f}s {mark}")
+        for param, value in self.learned.items():
+            print(f"  📐 自适应等待 {param}: {float(self.config[param]):.2f}s → {value:.2f}s")
+        if self.capture is not None and self.capture.frames:
+            s = self.capture.stats()
+            print(f"  📷 截图 {s['frames']} 帧，延迟 p50 {s['latency_ms_p50']:.2f}ms / "
+                  f"p99 {s['latency_ms_p99']:.2f}ms")
+            self.capture.reset_stats()
+        if self.tap_stats.dropped:
+            print(f"  ⚠️ 超出预分配容量，丢弃 {self.tap_stats.dropped} 条记录")
+
+        log_dir = self.config["tap_log_dir"]
+        if log_dir and self.tap_stats.count:
+            try:
+                stem = time.strftime("%Y%m%d_%H%M%S") + f"_loop{self.loop_count}"
+                path = self.tap_stats.dump(log_dir, stem, self.config["tap_log_format"])
+                print(f"  💾 明细已保存: {path}")
+            except Exception as e:
+                print(f"⚠️ 无法保存计时明细: {e}")
+
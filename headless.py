@@ -0,0 +1,141 @@
+# headless.py
+# 无界面运行：python -m headless [--log run.jsonl]
+# 与 auto_game.py 使用同一引擎和 config.json / positions.json，不导入 tkinter，适合无人值守的长时间运行；
+# 进度输出到终端，并可同时写入 JSONL（每行一个事件）。Ctrl+C 停止。
+
+import argparse
+import json
+import signal
+import sys
+import time
+
+from process_info import peak_rss_mb
+
+_T0 = time.perf_counter()
+
+
+class EventLog:
+    """进度日志：终端输出一行文字，同时按需写入 JSONL"""
+
+    def __init__(self, path=None, stream=sys.stdout):
+        self.stream = stream
+        self.file = open(path, "a", encoding="utf-8") if path else None
+
+    def emit(self, event, text=None, **fields):
+        if text and self.stream is not None:
+            print(f"[{time.strftime('%H:%M:%S')}] {text}", file=self.stream, flush=True)
+        if self.file is not None:
+            record = {"ts": round(time.time(), 3), "event": event}
+            if text:
+                record["text"] = text
+            record.update(fields)
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def build_engine(args, log):
+    # 引擎（及 numpy）在解析完参数后才导入，--help 等不必付出导入开销
+    if args.use_async:
+        from async_engine import AsyncBotEngine as BaseEngine
+    else:
+        from engine import BotEngine as BaseEngine
+
+    class HeadlessBot(BaseEngine):
+        """界面钩子改为写日志"""
+
+        def update_status(self, text, color="black"):
+            log.emit("status", text)
+
+        def update_info(self, text):
+            log.emit("info", None, loop=self.loop_count)
+
+        def notify(self, title, text):
+            log.emit("notify", f"{title} {text}")
+
+        def warn(self, title, text):
+            log.emit("warn", f"⚠️ {title}: {text}")
+
+        def report_timing(self):
+            super().report_timing()
+            fields = {"loop": self.loop_count, "taps": self.tap_stats.count, "clicks": self.click_stats.count}
+            if self.tap_stats.count:
+                fields["lateness_ms"] = self.tap_stats.summary(("lateness",))["lateness"]
+            if self.state_log:
+                fields["states"] = [{"state": state, "waited": round(waited, 3), "seen": seen}
+                                    for state, waited, _, seen in self.state_log]
+            log.emit("cycle", None, **fields)
+
+    backend = None
+    if args.backend:
+        from input_backend import create_backend
+        backend = create_backend(args.backend)
+    engine = HeadlessBot(backend, positions_file=args.positions, config_file=args.config)
+    overrides = {}
+    for key, value in args.set:
+        try:
+            overrides[key] = float(value)
+        except ValueError:
+            overrides[key] = value
+    if args.profile:
+        overrides["profile_dir"] = args.profile
+    engine.apply_overrides(overrides)
+    return engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m headless", description="无界面运行自动演出")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--positions", default="positions.json")
+    parser.add_argument("--backend", help="覆盖 config.json 的 input_backend（如 recording / null）")
+    parser.add_argument("--set", nargs=2, action="append", default=[], metavar=("KEY", "VALUE"),
+                        help="临时覆盖某个参数（不写回 config.json），可重复")
+    parser.add_argument("--log", help="JSONL 事件日志路径（追加写入）")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="开启性能剖析，tracemalloc 快照和 cProfile 结果写到该目录（见 profiling.py）")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="使用 asyncio 版引擎")
+    parser.add_argument("--delay", type=float, default=3.0, help="开始前倒计时（秒），用于切回游戏")
+    parser.add_argument("--quiet", action="store_true", help="不在终端输出进度")
+    parser.add_argument("--startup-only", action="store_true", help="只加载引擎，输出启动耗时和内存后退出")
+    args = parser.parse_args(argv)
+
+    log = EventLog(args.log, None if args.quiet else sys.stdout)
+    try:
+        engine = build_engine(args, log)
+    except Exception as e:
+        log.emit("error", f"❌ 加载失败: {e}")
+        log.close()
+        return 1
+    startup = {"startup_s": round(time.perf_counter() - _T0, 4), "rss_mb": round(peak_rss_mb(), 1)}
+    log.emit("startup", f"✅ 引擎已加载（{startup['startup_s']:.2f}s, {startup['rss_mb']:.0f}MB）", **startup)
+    if args.startup_only:
+        log.close()
+        print(json.dumps(startup))
+        return 0
+
+    # Ctrl+C / SIGTERM 只请求停止，由主线程等工作线程退出
+    def request_stop(signum, frame):
+        log.emit("stop", "🛑 收到停止信号")
+        engine.stop()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    engine.begin()
+    if args.delay > 0:
+        log.emit("countdown", f"⏳ {args.delay:.0f} 秒后开始，请切回游戏窗口")
+        engine.wait(args.delay)
+    if engine.running:
+        engine.start_worker()
+        while not engine.join_worker(timeout=0.5):
+            pass
+    log.emit("exit", f"👋 已结束，共 {engine.loop_count} 轮", loops=engine.loop_count)
+    log.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# input_backend.py
+# 输入后端：把点击 / 按下 / 抬起从 pyautogui 中抽离，可替换为更快的注入方式或无界面记录
+
+import json
+import os
+import time
+from timing import wait_until
+
+DEFAULT_BACKEND = "pyautogui"
+PRESS = "press"
+RELEASE = "release"
+
+
+class FailSafeError(RuntimeError):
+    """鼠标被移到屏幕左上角，中断当前操作"""
+
+
+class InputBackend:
+    """输入后端接口：子类至少实现 press / release"""
+
+    name = "base"
+
+    def press(self, x, y):
+        raise NotImplementedError
+
+    def release(self, x, y):
+        raise NotImplementedError
+
+    def click(self, x, y):
+        self.press(x, y)
+        self.release(x, y)
+
+    def batch(self, events, hold=0.0):
+        """连续发出预先构建好的 (动作, x, y) 事件序列，返回整组耗时（秒）
+
+        hold > 0 时每次按下后保持 hold 秒再继续。
+        """
+        press, release = self.press, self.release
+        clock = time.perf_counter
+        t0 = clock()
+        for action, x, y in events:
+            if action == PRESS:
+                press(x, y)
+                if hold:
+                    wait_until(clock() + hold)
+            else:
+                release(x, y)
+        return clock() - t0
+
+    def close(self):
+        pass
+
+
+class PyAutoGUIBackend(InputBackend):
+    """原始实现：每次点击都走 pyautogui（含移动、按下、抬起和参数处理）"""
+
+    name = "pyautogui"
+
+    def __init__(self):
+        import pyautogui
+        # ==================== 关键优化：关闭 PyAutoGUI 默认延迟 ====================
+        pyautogui.PAUSE = 0  # ⚠️ 必须设置为 0，否则每次操作自动 sleep 0.1 秒！
+        pyautogui.FAILSAFE = True
+        self._gui = pyautogui
+
+    def click(self, x, y):
+        self._gui.click(x, y)
+
+    def press(self, x, y):
+        self._gui.mouseDown(x, y)
+
+    def release(self, x, y):
+        self._gui.mouseUp(x, y)
+
+
+class PynputBackend(InputBackend):
+    """通过 pynput 直接投递事件（macOS 走 Quartz，Linux 走 Xlib），省掉 pyautogui 的参数解析开销"""
+
+    name = "pynput"
+
+    def __init__(self):
+        from pynput.mouse import Button, Controller
+        self._mouse = Controller()
+        self._left = Button.left
+
+    def _check_failsafe(self):
+        # 与 pyautogui.FAILSAFE 保持一致：鼠标在左上角时中断
+        if self._mouse.position == (0, 0):
+            raise FailSafeError("鼠标位于屏幕左上角，已中断")
+
+    def press(self, x, y):
+        self._check_failsafe()
+        self._mouse.position = (x, y)
+        self._mouse.press(self._left)
+
+    def release(self, x, y):
+        self._mouse.release(self._left)
+
+
+class RecordingBackend(InputBackend):
+    """内存记录后端：不产生真实输入，只记录带时间戳的事件，用于无界面测试和基准"""
+
+    name = "recording"
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.events = []  # (时间戳, 动作, x, y)
+
+    def press(self, x, y):
+        self.events.append((self.clock(), PRESS, x, y))
+
+    def release(self, x, y):
+        self.events.append((self.clock(), RELEASE, x, y))
+
+    def count(self, action=PRESS):
+        return sum(1 for e in self.events if e[1] == action)
+
+    def clear(self):
+        self.events.clear()
+
+
+class NullBackend(InputBackend):
+    """空后端：丢弃所有事件，用于快进模拟"""
+
+    name = "null"
+
+    def press(self, x, y):
+        pass
+
+    def release(self, x, y):
+        pass
+
+
+BACKENDS = {
+    "pyautogui": PyAutoGUIBackend,
+    "pynput": PynputBackend,
+    "recording": RecordingBackend,
+    "null": NullBackend,
+}
+
+
+def create_backend(name):
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"未知输入后端: {name}（可选: {', '.join(BACKENDS)}）")
+    return cls()
+
+
+def config_backend(config_file="config.json"):
+    """config.json 中的 input_backend；没有配置文件时为 DEFAULT_BACKEND"""
+    name = DEFAULT_BACKEND
+    if os.path.exists(config_file):
+        with open(config_file, "r", encoding="utf-8") as f:
+            name = str(json.load(f).get("input_backend", name))
+    return name
+
+
+def measure_click_cost(backend, pos, n=200):
+    """测量单次 click 的耗时（微秒），返回 (平均值, 中位数, 最大值)"""
+    x, y = pos
+    costs = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        backend.click(x, y)
+        costs.append((time.perf_counter() - t0) * 1e6)
+    costs.sort()
+    return sum(costs) / n, costs[n // 2], costs[-1]
+
+
+# ============ 对比各后端的点击开销 ============
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="测量各输入后端的单次点击开销")
+    parser.add_argument("backends", nargs="*", default=["recording"], help="要测量的后端")
+    parser.add_argument("--pos", nargs=2, type=int, default=[100, 100], metavar=("X", "Y"))
+    parser.add_argument("-n", type=int, default=200, help="点击次数")
+    args = parser.parse_args()
+
+    for name in args.backends:
+        try:
+            backend = create_backend(name)
+        except Exception as e:
+            print(f"⚠️ {name}: 不可用 ({e})")
+            continue
+        mean, median, worst = measure_click_cost(backend, args.pos, args.n)
+        print(f"{name:>10}: 平均 {mean:8.1f}µs  中位 {median:8.1f}µs  最大 {worst:8.1f}µs")
+        backend.close()
@@ -0,0 +1,267 @@
+# input_record.py
+# 输入录制 / 回放：用 pynput 监听记录每个鼠标 / 键盘事件（perf_counter_ns 时间戳），写成定长记录的二进制文件，
+# 回放时按截止时间经输入后端重新发出，并输出每个事件的时间误差
+#   python input_record.py record run.pjrec [--no-move]   # Esc 结束
+#   python input_record.py info run.pjrec
+#   python input_record.py replay run.pjrec [--backend recording] [--speed 1.0]
+#
+# 文件格式（小端）：32 字节文件头 + N 条 20 字节记录
+#   文件头: 魔数 b"PJSKREC1", 版本 u16, 记录长度 u16, 保留 u32, 开始时的 perf_counter_ns i64, 开始时的 Unix 时间 f64
+#   记录:   相对开始的纳秒 i64, x i32, y i32, 类型 u8, 按键 u8, 滚动 dx i8, 滚动 dy i8
+# 键盘事件的 x 为虚拟键码（没有时为 -1），y 为字符码（没有时为 0）。
+# 读取时用 numpy.memmap 直接映射文件，长录制不会整个读进内存，也不会变成 Python 对象；
+# 录制中途退出时文件末尾不完整的记录会被忽略。
+
+import struct
+import threading
+import time
+
+import numpy as np
+
+from tap_stats import TimingRecorder, format_summary
+from timing import SYSTEM_CLOCK, sleep_until
+
+MAGIC = b"PJSKREC1"
+VERSION = 1
+HEADER = struct.Struct("<8sHHIqd")
+RECORD = struct.Struct("<qiiBBbb")
+RECORD_DTYPE = np.dtype([("t_ns", "<i8"), ("x", "<i4"), ("y", "<i4"), ("kind", "u1"), ("button", "u1"),
+                         ("dx", "i1"), ("dy", "i1")])
+CHUNK = 4096  # 录制时攒够这么多条再写盘；回放时每次从映射中取这么多条
+
+# 事件类型
+MOVE = 0
+MOUSE_DOWN = 1
+MOUSE_UP = 2
+SCROLL = 3
+KEY_DOWN = 4
+KEY_UP = 5
+KIND_NAMES = {MOVE: "move", MOUSE_DOWN: "mouse_down", MOUSE_UP: "mouse_up", SCROLL: "scroll",
+              KEY_DOWN: "key_down", KEY_UP: "key_up"}
+
+# 鼠标按键
+BUTTONS = {"left": 1, "right": 2, "middle": 3}
+LEFT = BUTTONS["left"]
+
+
+class RecordingError(Exception):
+    """录制文件格式错误"""
+
+
+class InputRecorder:
+    """把输入事件追加到定长记录的缓冲区，攒满 CHUNK 条后一次写盘；record() 可从多个监听线程调用"""
+
+    def __init__(self, path, moves=True, clock_ns=time.perf_counter_ns):
+        self.path = path
+        self.moves = moves
+        self.clock_ns = clock_ns
+        self.lock = threading.Lock()
+        self.buffer = bytearray(RECORD.size * CHUNK)
+        self.pending = 0
+        self.count = 0
+        self.file = None
+        self.start_ns = 0
+        self.listeners = []
+
+    def open(self):
+        self.file = open(self.path, "wb")
+        self.start_ns = self.clock_ns()
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0, self.start_ns, time.time()))
+        return self
+
+    def record(self, kind, x, y, button=0, dx=0, dy=0):
+        t = self.clock_ns() - self.start_ns
+        with self.lock:
+            RECORD.pack_into(self.buffer, self.pending * RECORD.size, t, int(x), int(y), kind, button,
+                             max(-128, min(127, int(dx))), max(-128, min(127, int(dy))))
+            self.pending += 1
+            self.count += 1
+            if self.pending == CHUNK:
+                self.flush()
+
+    def flush(self):
+        """在持有 lock 时调用"""
+        if self.pending:
+            self.file.write(memoryview(self.buffer)[:self.pending * RECORD.size])
+            self.pending = 0
+
+    # ---- pynput 回调 ----
+    def on_move(self, x, y):
+        if self.moves:
+            self.record(MOVE, x, y)
+
+    def on_click(self, x, y, button, pressed):
+        self.record(MOUSE_DOWN if pressed else MOUSE_UP, x, y, BUTTONS.get(button.name, 0))
+
+    def on_scroll(self, x, y, dx, dy):
+        self.record(SCROLL, x, y, 0, dx, dy)
+
+    def on_key(self, key, pressed):
+        vk = getattr(key, "vk", None)
+        if vk is None and hasattr(key, "value"):
+            vk = getattr(key.value, "vk", None)  # Key.esc 等特殊键
+        char = getattr(key, "char", None)
+        self.record(KEY_DOWN if pressed else KEY_UP, -1 if vk is None else vk, ord(char) if char else 0)
+
+    def start(self, on_key=None):
+        """打开文件并启动鼠标 / 键盘监听；on_key(key, pressed) 返回 False 时停止录制"""
+        from pynput import keyboard, mouse  # 只在录制时才需要
+
+        self.open()
+
+        def key_event(pressed):
+            def handler(key):
+                self.on_key(key, pressed)
+                if on_key is not None and on_key(key, pressed) is False:
+                    threading.Thread(target=self.stop, daemon=True).start()  # 不能在监听线程中 join 自己
+            return handler
+
+        self.listeners = [
+            mouse.Listener(on_move=self.on_move, on_click=self.on_click, on_scroll=self.on_scroll),
+            keyboard.Listener(on_press=key_event(True), on_release=key_event(False)),
+        ]
+        for listener in self.listeners:
+            listener.start()
+        return self
+
+    def join(self):
+        for listener in self.listeners:
+            listener.join()
+
+    def stop(self):
+        for listener in self.listeners:
+            listener.stop()
+        self.close()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.flush()
+                self.file.close()
+                self.file = None
+
+
+def load(path):
+    """返回 (文件头字典, 记录) —— 记录为映射到文件的 numpy 结构化数组，按需从磁盘读取"""
+    with open(path, "rb") as f:
+        raw = f.read(HEADER.size)
+        f.seek(0, 2)
+        size = f.tell()
+    if len(raw) < HEADER.size:
+        raise RecordingError(f"{path}: 文件过短")
+    magic, version, record_size, _, start_ns, start_time = HEADER.unpack(raw)
+    if magic != MAGIC or record_size != RECORD_DTYPE.itemsize:
+        raise RecordingError(f"{path}: 不是录制文件或版本不兼容（版本 {version}，记录 {record_size} 字节）")
+    header = {"version": version, "start_ns": start_ns, "start_time": start_time}
+    count = (size - HEADER.size) // record_size
+    if count == 0:
+        return header, np.zeros(0, dtype=RECORD_DTYPE)
+    return header, np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER.size, shape=(count,))
+
+
+def summarize(records):
+    """各类事件数、时长和平均事件率（按块统计，不把整个文件读进内存）"""
+    counts = np.zeros(256, dtype=np.int64)
+    for i in range(0, len(records), CHUNK * 16):
+        counts += np.bincount(records["kind"][i:i + CHUNK * 16], minlength=256)
+    duration = float(records["t_ns"][-1]) / 1e9 if len(records) else 0.0
+    return {
+        "events": len(records),
+        "duration_s": duration,
+        "events_per_second": len(records) / duration if duration else 0.0,
+        "kinds": {name: int(counts[kind]) for kind, name in KIND_NAMES.items() if counts[kind]},
+    }
+
+
+def replay(records, backend, clock=None, speed=1.0, cancel=None, stats=None):
+    """按录制时的间隔经 backend 重新发出左键按下 / 抬起，返回计时记录（scheduled / actual / lateness / overshoot）
+
+    输入后端只有左键按下 / 抬起，移动 / 滚动 / 键盘 / 其它按键不回放。按块读取映射，
+    每个事件的截止时间 = 开始时间 + 录制时间 / speed；cancel（threading.Event）被设置时立即停止。
+    """
+    clock = clock or SYSTEM_CLOCK
+    kinds = records["kind"]
+    buttons = records["button"]
+    total = 0
+    for i in range(0, len(records), CHUNK):
+        total += int(np.count_nonzero(((kinds[i:i + CHUNK] == MOUSE_DOWN) | (kinds[i:i + CHUNK] == MOUSE_UP))
+                                      & (buttons[i:i + CHUNK] == LEFT)))
+    if stats is None:
+        stats = TimingRecorder(("scheduled", "actual", "lateness", "overshoot"), capacity=total + 16)
+    else:
+        stats.reset()
+        stats.ensure_capacity(total + 16)
+    press, release = backend.press, backend.release
+    record = stats.record
+    scale = 1e-9 / speed
+    origin = clock.perf_counter()
+    for i in range(0, len(records), CHUNK):
+        chunk = records[i:i + CHUNK]
+        mask = ((chunk["kind"] == MOUSE_DOWN) | (chunk["kind"] == MOUSE_UP)) & (chunk["button"] == LEFT)
+        events = chunk[mask]
+        # 一块最多 CHUNK 条，转成 Python 数值后热循环里只做下标访问
+        offsets = (events["t_ns"] * scale).tolist()
+        xs = events["x"].tolist()
+        ys = events["y"].tolist()
+        downs = (events["kind"] == MOUSE_DOWN).tolist()
+        for j in range(len(offsets)):
+            scheduled = origin + offsets[j]
+            actual, overshoot = sleep_until(scheduled, clock, cancel)
+            if cancel is not None and cancel.is_set():
+                return stats
+            if downs[j]:
+                press(xs[j], ys[j])
+            else:
+                release(xs[j], ys[j])
+            record(scheduled - origin, actual - origin, actual - scheduled, overshoot)
+    return stats
+
+
+# ============ 录制 / 查看 / 回放 ============
+if __name__ == "__main__":
+    import argparse
+    import json
+    import signal
+
+    parser = argparse.ArgumentParser(description="录制 / 回放鼠标键盘输入（定长记录二进制文件）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("record", help="录制到文件，按 Esc 结束")
+    p.add_argument("path")
+    p.add_argument("--no-move", action="store_true", help="不记录鼠标移动")
+    p = sub.add_parser("info", help="查看录制文件")
+    p.add_argument("path")
+    p = sub.add_parser("replay", help="回放录制文件中的左键按下 / 抬起，并输出时间误差")
+    p.add_argument("path")
+    p.add_argument("--backend", help="输入后端（默认使用 config.json 的 input_backend，recording 只计时不点击）")
+    p.add_argument("--speed", type=float, default=1.0, help="回放速度倍数")
+    p.add_argument("--delay", type=float, default=3.0, help="开始前倒计时（秒），用于切回游戏")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        from pynput import keyboard
+
+        recorder = InputRecorder(args.path, moves=not args.no_move)
+        print("⏺️ 开始录制，按 Esc 结束")
+        recorder.start(on_key=lambda key, pressed: not (pressed and key == keyboard.Key.esc))
+        recorder.join()
+        recorder.close()
+        print(f"💾 已保存 {recorder.count} 个事件: {args.path}")
+    elif args.command == "info":
+        header, records = load(args.path)
+        info = summarize(records)
+        info["recorded_at"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(header["start_time"]))
+        print(json.dumps(info, indent=2, ensure_ascii=False))
+    else:
+        from input_backend import config_backend, create_backend
+
+        _, records = load(args.path)
+        backend = create_backend(args.backend or config_backend())
+        cancel = threading.Event()
+        signal.signal(signal.SIGINT, lambda signum, frame: cancel.set())
+        print(f"⏳ {args.delay:.0f} 秒后开始回放（{backend.name}），Ctrl+C 停止")
+        time.sleep(args.delay)
+        stats = replay(records, backend, speed=args.speed, cancel=cancel)
+        print(f"▶️ 回放 {stats.count} 个事件")
+        if stats.count:
+            print(format_summary(stats.summary(("lateness", "overshoot"))))
+        backend.close()
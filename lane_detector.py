@@ -0,0 +1,200 @@
+# lane_detector.py
+# 判定线识别：截取判定线附近的细长条，按轨道向量化计算颜色变化，只在轨道上出现音符时按下该轨道
+#
+# 基线取游戏阶段开始时的第一帧（此时判定线上没有音符），之后某轨道的平均颜色偏离基线超过阈值即视为有音符；
+# 只在“无 -> 有”的上升沿按下，同一轨道两次按下至少间隔 min_interval。
+# 可用合成帧（SyntheticNotes）或录制的帧序列（FramePlayer）离线测试，无需游戏画面。
+
+import time
+
+import numpy as np
+
+from input_backend import PRESS, RELEASE
+
+STRIP_HEIGHT = 6    # 判定线细长条高度（像素）
+LANE_WIDTH = 24     # 每条轨道采样宽度（像素）
+
+
+def judge_line_region(game_tracks, y_offset=0, strip_height=STRIP_HEIGHT, lane_width=LANE_WIDTH):
+    """判定线细长条区域 (left, top, width, height)：覆盖所有轨道的采样列"""
+    tracks = np.asarray(game_tracks, dtype=np.int64).reshape(-1, 2)
+    half = lane_width // 2
+    left = max(0, int(tracks[:, 0].min()) - half)
+    right = int(tracks[:, 0].max()) + half
+    top = max(0, int(tracks[:, 1].mean()) - int(y_offset) - strip_height // 2)
+    return (left, top, right - left, strip_height)
+
+
+class LaneDetector:
+    """在 capture（RegionCapture）上登记判定线区域，poll() 返回本帧需要按下的轨道位掩码"""
+
+    def __init__(self, capture, game_tracks, threshold=40.0, min_interval=0.08, y_offset=0,
+                 strip_height=STRIP_HEIGHT, lane_width=LANE_WIDTH):
+        tracks = np.asarray(game_tracks, dtype=np.int64).reshape(-1, 2)
+        half = lane_width // 2
+        self.region = judge_line_region(tracks, y_offset, strip_height, lane_width)
+        left = self.region[0]
+        self.capture = capture
+        capture.register("judge_line", self.region)
+        # 各轨道采样列（相对区域左边界），形状 (轨道数, lane_width)
+        self.cols = (tracks[:, 0] - left)[:, None] + np.arange(-half, lane_width - half)[None, :]
+        self.lanes = len(tracks)
+        self.threshold = threshold
+        self.min_interval = min_interval
+        self.reset()
+
+    def reset(self):
+        self.baseline = None
+        self.captured = 0.0  # 最近一帧的截图时间（与 capture_worker.CaptureWorker 一致）
+        self.present = np.zeros(self.lanes, dtype=bool)
+        self.last_tap = np.full(self.lanes, -np.inf)
+
+    def levels(self, pixels):
+        """各轨道采样区的平均颜色，形状 (轨道数, 3)"""
+        return pixels[:, self.cols].mean(axis=(0, 2))
+
+    def poll(self, now):
+        """截取一帧并判断；返回需要按下的轨道位掩码（第 i 位为第 i 条轨道）"""
+        self.captured = now
+        levels = self.levels(self.capture.grab("judge_line"))
+        if self.baseline is None:
+            self.baseline = levels
+            return 0
+        present = np.abs(levels - self.baseline).mean(axis=1) > self.threshold
+        fire = present & ~self.present & (now - self.last_tap >= self.min_interval)
+        self.present = present
+        if not fire.any():
+            return 0
+        self.last_tap[fire] = now
+        return int(np.dot(fire, 1 << np.arange(self.lanes)))
+
+
+def lane_bursts(game_tracks):
+    """预先为每个位掩码构建 按下/抬起 事件组，热循环内直接查表"""
+    bursts = []
+    for mask in range(1 << len(game_tracks)):
+        burst = []
+        for lane, (x, y) in enumerate(game_tracks):
+            if mask >> lane & 1:
+                burst.append((PRESS, x, y))
+                burst.append((RELEASE, x, y))
+        bursts.append(burst)
+    return bursts
+
+
+class SyntheticNotes:
+    """合成帧源：note_times 中每个 (时间, 轨道) 在 [t, t + width) 内出现在判定线上
+
+    作为 capture.FakeBackend 的 source；各轨道组合的帧预先生成，取帧时只做查表。
+    """
+
+    def __init__(self, game_tracks, notes, size=(1080, 1920), width=0.05, seed=0, clock=time.perf_counter):
+        rng = np.random.default_rng(seed)
+        tracks = np.asarray(game_tracks, dtype=np.int64).reshape(-1, 2)
+        base = rng.integers(0, 40, (*size, 3), dtype=np.uint8)  # 暗色背景 + 噪声
+        self.frames = []
+        for mask in range(1 << len(tracks)):
+            frame = base.copy()
+            for lane, (x, y) in enumerate(tracks):
+                if mask >> lane & 1:
+                    frame[y - 10:y + 10, x - LANE_WIDTH:x + LANE_WIDTH] = (250, 220, 255)
+            self.frames.append(frame)
+        notes = sorted(notes)
+        self.times = np.array([t for t, _ in notes], dtype=np.float64)
+        self.lanes = np.array([lane for _, lane in notes], dtype=np.int64)
+        self.width = width
+        self.clock = clock
+        self.start = clock()
+
+    def mask_at(self, t):
+        lo = np.searchsorted(self.times, t - self.width, side="right")
+        hi = np.searchsorted(self.times, t, side="right")
+        mask = 0
+        for lane in self.lanes[lo:hi].tolist():
+            mask |= 1 << lane
+        return mask
+
+    def __call__(self):
+        return self.frames[self.mask_at(self.clock() - self.start)]
+
+
+class FramePlayer:
+    """录制帧回放：按当前时间返回最近一帧，作为 capture.FakeBackend 的 source
+
+    frames 为 (N, H, W, 3)，times 为相对开始的秒数；给出 region 时 frames 只是该区域的细长条，
+    回放时写回一块整屏坐标的缓冲区。
+    """
+
+    def __init__(self, frames, times, region=None, clock=time.perf_counter):
+        self.frames = frames
+        self.times = np.asarray(times, dtype=np.float64)
+        self.region = region
+        if region is not None:
+            left, top, width, height = region
+            self.screen = np.zeros((top + height, left + width, 3), dtype=np.uint8)
+        self.clock = clock
+        self.start = clock()
+
+    def frame_at(self, t):
+        i = int(np.searchsorted(self.times, t, side="right")) - 1
+        frame = self.frames[max(0, min(i, len(self.frames) - 1))]
+        if self.region is None:
+            return frame
+        left, top = self.region[:2]
+        self.screen[top:, left:] = frame
+        return self.screen
+
+    def __call__(self):
+        return self.frame_at(self.clock() - self.start)
+
+    @classmethod
+    def load(cls, path, clock=time.perf_counter):
+        """读取 `python lane_detector.py record` 录制的帧序列"""
+        data = np.load(path)
+        return cls(data["frames"], data["times"], tuple(data["region"].tolist()), clock)
+
+
+# ============ 录制 / 回放判定线 ============
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from capture import FakeBackend, RegionCapture
+    from engine import DEFAULT_CONFIG, BotEngine, POSITIONS_FILE
+    from input_backend import NullBackend
+
+    parser = argparse.ArgumentParser(description="录制判定线画面，或用录制的帧离线检验识别结果")
+    parser.add_argument("command", choices=("record", "replay"))
+    parser.add_argument("file", help="帧序列 .npz")
+    parser.add_argument("--positions", default=POSITIONS_FILE)
+    parser.add_argument("--seconds", type=float, default=10.0, help="录制时长")
+    parser.add_argument("--delay", type=float, default=5.0, help="录制前倒计时，用于切回游戏")
+    args = parser.parse_args()
+
+    engine = BotEngine(NullBackend(), config=dict(DEFAULT_CONFIG), positions_file=args.positions)
+    cfg = engine.config
+    if args.command == "record":
+        cap = RegionCapture(cfg["capture_backend"])
+        LaneDetector(cap, engine.game_tracks, y_offset=cfg["detect_y_offset"])
+        print(f"⏳ {args.delay:.0f} 秒后开始录制 {args.seconds:.0f} 秒...")
+        time.sleep(args.delay)
+        frames, times = [], []
+        start = time.perf_counter()
+        while time.perf_counter() - start < args.seconds:
+            times.append(time.perf_counter() - start)
+            frames.append(cap.grab("judge_line").copy())
+        # 只保存细长条，回放时放回整屏坐标
+        np.savez_compressed(args.file, frames=np.stack(frames), times=np.array(times),
+                            region=np.array(cap.regions["judge_line"]))
+        print(f"💾 已录制 {len(frames)} 帧（{len(frames) / args.seconds:.0f} fps）-> {args.file}")
+    else:
+        player = FramePlayer.load(args.file)
+        now = 0.0  # 逐帧推进，不按真实时间回放
+        detector = LaneDetector(RegionCapture(FakeBackend(lambda: player.frame_at(now))), engine.game_tracks,
+                                cfg["detect_threshold"], cfg["detect_min_interval"], cfg["detect_y_offset"])
+        taps = []
+        for now in player.times.tolist():
+            mask = detector.poll(now)
+            taps.extend((round(now, 4), lane) for lane in range(detector.lanes) if mask >> lane & 1)
+        print(json.dumps(taps, ensure_ascii=False))
+        print(f"🎯 {len(taps)} 次按下（{len(player.times)} 帧）")
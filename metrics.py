@@ -0,0 +1,147 @@
+# metrics.py
+# 运行监控：以 Prometheus 文本格式在本机 HTTP 端口输出计数和当前状态（config.json 的 metrics_port，0 为关闭）
+#   curl http://127.0.0.1:9464/metrics
+# 指标只在阶段切换、每轮结束和休息 / 延迟前后更新，游戏内点击的热循环里没有任何额外操作；
+# 只监听 127.0.0.1，供本机的 Prometheus / 脚本抓取。
+
+import threading
+import time
+
+from tap_stats import percentile
+
+PREFIX = "pjsk_"
+QUANTILES = (50, 90, 99)
+
+# 指标名 -> (类型, 说明)
+METRICS = {
+    "running": ("gauge", "引擎是否在运行（1 / 0）"),
+    "loop": ("gauge", "当前轮次编号"),
+    "phase": ("gauge", "当前阶段（值为 1 的标签即当前阶段）"),
+    "cycles_total": ("counter", "完成的轮数（未出错）"),
+    "cycle_errors_total": ("counter", "出错的轮数"),
+    "recoveries_total": ("counter", "执行恢复流程的次数"),
+    "recovery_seconds_total": ("counter", "从没有进展到恢复完成的累计时间（秒）"),
+    "taps_total": ("counter", "游戏内按下的组数"),
+    "clicks_total": ("counter", "进入 / 返回流程的点击数"),
+    "taps_per_second": ("gauge", "上一轮游戏内每秒按下的组数"),
+    "tap_lateness_seconds": ("gauge", "上一轮按下相对计划时间的延迟分位数（秒，标签 q 为分位）"),
+    "last_cycle_seconds": ("gauge", "上一轮耗时（秒）"),
+    "last_cycle_timestamp_seconds": ("gauge", "上一轮结束的 Unix 时间"),
+    "idle_seconds_total": ("counter", "休息 / 轮次间延迟 / 出错退避的累计时间（秒）"),
+}
+
+
+class Metrics:
+    """指标值；由工作线程更新、HTTP 线程读取，统一加锁"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {"running": 0, "loop": 0, "cycles_total": 0, "cycle_errors_total": 0,
+                       "recoveries_total": 0, "recovery_seconds_total": 0.0, "taps_total": 0,
+                       "clicks_total": 0, "taps_per_second": 0.0, "last_cycle_seconds": 0.0,
+                       "last_cycle_timestamp_seconds": 0.0}
+        self.phases = {}     # 出现过的阶段名 -> 0 / 1
+        self.lateness = {}   # 分位数 -> 秒
+        self.idle = {}       # 空闲类型 -> 累计秒数
+
+    def set(self, name, value):
+        with self.lock:
+            self.values[name] = value
+
+    def inc(self, name, value=1):
+        with self.lock:
+            self.values[name] += value
+
+    def set_phase(self, name):
+        with self.lock:
+            for key in self.phases:
+                self.phases[key] = 0
+            self.phases[name] = 1
+
+    def add_idle(self, kind, seconds):
+        with self.lock:
+            self.idle[kind] = self.idle.get(kind, 0.0) + seconds
+
+    def cycle(self, loop, duration, error, taps, clicks, game_time, lateness):
+        """每轮结束时更新；lateness 为本轮各次按下的延迟（秒），在这里排序取分位数"""
+        lateness = sorted(lateness)
+        quantiles = {q: percentile(lateness, q) for q in QUANTILES} if lateness else {}
+        with self.lock:
+            v = self.values
+            v["loop"] = loop
+            v["cycle_errors_total" if error else "cycles_total"] += 1
+            v["taps_total"] += taps
+            v["clicks_total"] += clicks
+            v["taps_per_second"] = taps / game_time if game_time else 0.0
+            v["last_cycle_seconds"] = duration
+            v["last_cycle_timestamp_seconds"] = time.time()
+            if quantiles:
+                self.lateness = quantiles
+
+    def render(self):
+        """Prometheus 文本格式"""
+        lines = []
+
+        def header(name):
+            kind, text = METRICS[name]
+            lines.append(f"# HELP {PREFIX}{name} {text}")
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        with self.lock:
+            for name, value in self.values.items():
+                header(name)
+                lines.append(f"{PREFIX}{name} {value}")
+            header("phase")
+            for phase, value in self.phases.items():
+                lines.append(f'{PREFIX}phase{{phase="{phase}"}} {value}')
+            header("tap_lateness_seconds")
+            for q, value in self.lateness.items():
+                lines.append(f'{PREFIX}tap_lateness_seconds{{q="{q / 100:g}"}} {value:.6f}')
+            header("idle_seconds_total")
+            for kind, value in self.idle.items():
+                lines.append(f'{PREFIX}idle_seconds_total{{kind="{kind}"}} {value:.3f}')
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """后台线程中的 HTTP 服务，GET /metrics 返回 Metrics.render()"""
+
+    def __init__(self, metrics, port, host="127.0.0.1"):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # 只在开启指标服务时才需要
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # 不在终端输出每次抓取
+
+        self.server = ThreadingHTTPServer((host, int(port)), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ============ 查看正在运行的引擎的指标 ============
+if __name__ == "__main__":
+    import argparse
+    import urllib.request
+
+    parser = argparse.ArgumentParser(description="读取本机正在运行的引擎的监控指标")
+    parser.add_argument("--port", type=int, default=9464)
+    args = parser.parse_args()
+    with urllib.request.urlopen(f"http://127.0.0.1:{args.port}/metrics", timeout=2) as response:
+        print(response.read().decode("utf-8"), end="")
@@ -0,0 +1,295 @@
+# orchestrator.py
+# 多开：一个控制进程同时运行多个游戏窗口 / 模拟器的轮次引擎
+#   python orchestrator.py [--instances instances.json] [--backend pynput] [--duration 秒]
+#
+# instances.json:
+#   {"instances": [
+#     {"name": "A", "positions": "positions.json", "offset": [0, 0]},
+#     {"name": "B", "positions": "positions.json", "offset": [960, 0], "start_delay": 20,
+#      "config": {"game_duration": 95}}
+#   ]}
+# 各实例共用 config.json，"config" 中的键只覆盖该实例；offset 为窗口相对校准时的位移（像素），
+# 大小相同的窗口可共用一份 positions.json 和画面指纹，点位、轨道和指纹区域都按 offset 平移。
+# start_delay 错开各实例的开始时间，避免所有实例同时进入游戏阶段。
+#
+# 所有实例的输入经同一个 InputDispatcher 串行发出：一组全按 / 一次点击持有锁直到发完，
+# 不同实例的按下 / 抬起不会在一组之内交错（真实鼠标只有一个光标）。
+# 本机计时特性在所有实例启动前测量一次；会话记录中每个实例各自一条 session，带实例名。
+
+import copy
+import json
+import os
+import threading
+import time
+
+from engine import BotEngine, CONFIG_FILE
+from input_backend import InputBackend, config_backend, create_backend
+from tap_stats import TimingRecorder
+
+INSTANCES_FILE = "instances.json"
+DISPATCH_CAPACITY = 65536  # 输入等待记录容量，report() 时清空
+
+
+class InputDispatcher:
+    """串行化多个实例的输入：每次 click / batch 独占底层后端，并记录等锁时间"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.waits = TimingRecorder(("wait", "hold"), capacity=DISPATCH_CAPACITY)
+
+    def channel(self, name):
+        return DispatchedBackend(self, name)
+
+    def run(self, method, *args):
+        t0 = time.perf_counter()
+        with self.lock:
+            t1 = time.perf_counter()
+            result = method(*args)
+            self.waits.record(t1 - t0, time.perf_counter() - t1)
+        return result
+
+    def snapshot(self, reset=False):
+        """持有锁取出等待记录的副本，不会和正在发出的输入同时读写；reset 时直接换上空记录器"""
+        fresh = TimingRecorder(self.waits.fields, capacity=DISPATCH_CAPACITY) if reset else None
+        with self.lock:
+            if reset:
+                waits, self.waits = self.waits, fresh
+                return waits
+            return copy.deepcopy(self.waits)
+
+    def close(self):
+        self.backend.close()
+
+
+class DispatchedBackend(InputBackend):
+    """单个实例看到的输入后端：所有操作交给 InputDispatcher 排队"""
+
+    name = "dispatched"
+
+    def __init__(self, dispatcher, instance):
+        self.dispatcher = dispatcher
+        self.instance = instance
+
+    def press(self, x, y):
+        self.dispatcher.run(self.dispatcher.backend.press, x, y)
+
+    def release(self, x, y):
+        self.dispatcher.run(self.dispatcher.backend.release, x, y)
+
+    def click(self, x, y):
+        self.dispatcher.run(self.dispatcher.backend.click, x, y)
+
+    def batch(self, events, hold=0.0):
+        return self.dispatcher.run(self.dispatcher.backend.batch, events, hold)
+
+    def close(self):
+        pass  # 底层后端由 InputDispatcher 关闭
+
+
+class InstanceEngine(BotEngine):
+    """一个窗口的引擎：坐标和画面指纹按窗口位移平移，界面钩子带上实例名"""
+
+    def __init__(self, name, offset=(0, 0), **kwargs):
+        self.name = name
+        self.offset = (int(offset[0]), int(offset[1]))
+        self.status = ""
+        super().__init__(**kwargs)
+
+    def load_positions(self, path):
+        super().load_positions(path)
+        dx, dy = self.offset
+        if dx or dy:
+            self.points = {name: (x + dx, y + dy) for name, (x, y) in self.points.items()}
+            self.game_tracks = [(x + dx, y + dy) for x, y in self.game_tracks]
+
+    def load_detector(self):
+        super().load_detector()
+        dx, dy = self.offset
+        if self.detector is not None and (dx or dy):
+            for refs in self.detector.fingerprints.values():
+                refs[:] = [((left + dx, top + dy, width, height), ref) for (left, top, width, height), ref in refs]
+
+    def update_status(self, text, color="black"):
+        self.status = text
+
+    def notify(self, title, text):
+        print(f"[{self.name}] {title} {text}")
+
+    def warn(self, title, text):
+        print(f"[{self.name}] {title} {text}")
+
+
+def instance_overrides(spec, config):
+    """实例参数：共享文件按实例名分开（自适应等待模型、计时明细、性能剖析），监控端口默认关闭，再叠加实例自己的覆盖"""
+    name = spec["name"]
+    overrides = {"metrics_port": 0}
+    if config["phase_model_file"]:
+        stem, ext = os.path.splitext(config["phase_model_file"])
+        overrides["phase_model_file"] = f"{stem}_{name}{ext}"
+    if config["tap_log_dir"]:
+        overrides["tap_log_dir"] = os.path.join(config["tap_log_dir"], name)
+    if config["profile_dir"]:
+        overrides["profile_dir"] = os.path.join(config["profile_dir"], name)
+    overrides.update(spec.get("config", {}))
+    return overrides
+
+
+def load_instances(path=INSTANCES_FILE):
+    """读取实例列表，缺少名称或名称重复时抛出 ValueError"""
+    with open(path, "r", encoding="utf-8") as f:
+        instances = json.load(f)["instances"]
+    names = [spec.get("name") for spec in instances]
+    if not instances or None in names or len(set(names)) != len(names):
+        raise ValueError(f"{path}: 每个实例都需要唯一的 name")
+    return instances
+
+
+class Orchestrator:
+    """按实例列表构建引擎，各自在线程中运行主控制循环，输入经同一个 InputDispatcher 发出"""
+
+    def __init__(self, instances, backend, config=None, config_file=CONFIG_FILE, clock=None,
+                 engine_class=InstanceEngine):
+        self.dispatcher = InputDispatcher(backend)
+        self.engines = []
+        self.delays = {}
+        self.threads = []
+        self.started = None
+        for spec in instances:
+            name = spec["name"]
+            engine = engine_class(name, spec.get("offset", (0, 0)), backend=self.dispatcher.channel(name),
+                                  config=config, positions_file=spec.get("positions", "positions.json"),
+                                  clock=clock, config_file=config_file)
+            engine.apply_overrides(instance_overrides(spec, engine.config))
+            self.engines.append(engine)
+            self.delays[name] = float(spec.get("start_delay", 0.0))
+
+    def calibrate_timer(self):
+        """启动前测量一次本机计时特性并交给所有实例
+
+        各实例同时测量会互相占用 CPU、测出偏大的超调，还会同时写同一个计时特性文件。
+        """
+        profiles = {}
+        for engine in self.engines:
+            if engine.timer_profile is None:
+                continue
+            path = engine.timer_profile.path
+            if path not in profiles:
+                engine.calibrate_timer()
+                profiles[path] = engine.timer_profile
+                continue
+            engine.timer_profile = profiles[path]
+            entry = engine.timer_profile.current()
+            if entry is not None:
+                engine.apply_timer_profile(entry)
+
+    def start(self):
+        self.calibrate_timer()
+        self.threads = []
+        self.started = time.time()
+        for engine in self.engines:
+            engine.begin()
+            engine.worker_thread = threading.Thread(target=self.run_instance, args=(engine,),
+                                                    name=f"instance-{engine.name}", daemon=True)
+            engine.worker_thread.start()
+            self.threads.append(engine.worker_thread)
+
+    def run_instance(self, engine):
+        if engine.wait(self.delays[engine.name]):
+            engine.main_control_loop()
+
+    def stop(self):
+        for engine in self.engines:
+            engine.stop()
+
+    def join(self, timeout=None):
+        """等待所有实例退出，返回是否都已结束"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        for thread in self.threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.perf_counter()))
+        return not self.running
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self.threads)
+
+    def stats(self, reset=False):
+        """各实例和合计的完成轮数 / 每小时轮数，以及输入排队等待的分布（毫秒）；reset 时清空等待记录"""
+        elapsed = time.time() - self.started if self.started else 0.0
+        hours = elapsed / 3600
+        instances = {}
+        for engine in self.engines:
+            values = engine.metrics.values
+            cycles = values["cycles_total"]
+            instances[engine.name] = {
+                "cycles": cycles,
+                "errors": values["cycle_errors_total"],
+                "recoveries": values["recoveries_total"],
+                "cycles_per_hour": cycles / hours if hours else 0.0,
+                "status": engine.status,
+            }
+        total = sum(s["cycles"] for s in instances.values())
+        waits = self.dispatcher.snapshot(reset)
+        return {
+            "elapsed_s": elapsed,
+            "cycles": total,
+            "cycles_per_hour": total / hours if hours else 0.0,
+            "instances": instances,
+            "dispatch": waits.summary() if waits.count else {},
+            "dispatched": waits.count,
+        }
+
+    def report(self):
+        s = self.stats(reset=True)
+        lines = [f"📊 {len(self.engines)} 个实例，运行 {s['elapsed_s'] / 60:.1f} 分钟，"
+                 f"共完成 {s['cycles']} 轮（{s['cycles_per_hour']:.1f} 轮/小时）"]
+        for name, i in s["instances"].items():
+            lines.append(f"  [{name}] {i['cycles']} 轮（{i['cycles_per_hour']:.1f} 轮/小时），"
+                         f"出错 {i['errors']}，恢复 {i['recoveries']}  {i['status']}")
+        if s["dispatch"]:
+            wait = s["dispatch"]["wait"]
+            lines.append(f"  🔀 输入 {s['dispatched']} 次，排队等待 p50 {wait['p50']:.2f}ms / "
+                         f"p99 {wait['p99']:.2f}ms / max {wait['max']:.2f}ms")
+        return "\n".join(lines)
+
+    def close(self):
+        self.dispatcher.close()
+
+
+# ============ 同时运行多个实例 ============
+if __name__ == "__main__":
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(description="在多个游戏窗口上同时运行自动演出")
+    parser.add_argument("--instances", default=INSTANCES_FILE, help="实例列表（见文件开头说明）")
+    parser.add_argument("--config", default=CONFIG_FILE)
+    parser.add_argument("--backend", help="覆盖 config.json 的 input_backend（如 recording / null）")
+    parser.add_argument("--duration", type=float, default=0.0, help="运行多少秒后停止（0 为直到 Ctrl+C）")
+    parser.add_argument("--report", type=float, default=600.0, help="输出汇总的间隔（秒）")
+    parser.add_argument("--delay", type=float, default=3.0, help="开始前倒计时（秒），用于切回游戏")
+    args = parser.parse_args()
+
+    try:
+        orchestrator = Orchestrator(load_instances(args.instances),
+                                    create_backend(args.backend or config_backend(args.config)),
+                                    config_file=args.config)
+    except Exception as e:
+        raise SystemExit(f"❌ 加载失败: {e}")
+    signal.signal(signal.SIGINT, lambda signum, frame: orchestrator.stop())
+    signal.signal(signal.SIGTERM, lambda signum, frame: orchestrator.stop())
+
+    print(f"⏳ {args.delay:.0f} 秒后开始 {len(orchestrator.engines)} 个实例")
+    time.sleep(args.delay)
+    orchestrator.start()
+    end = time.perf_counter() + args.duration if args.duration > 0 else None
+    next_report = time.perf_counter() + args.report
+    while not orchestrator.join(timeout=0.5):
+        now = time.perf_counter()
+        if end is not None and now >= end:
+            orchestrator.stop()
+        if now >= next_report:
+            print(orchestrator.report())
+            next_report = now + args.report
+    print(orchestrator.report())
+    orchestrator.close()
@@ -0,0 +1,175 @@
+# phase_model.py
+# 自适应等待：记录带画面等待的阶段实际用了多久（画面出现的时刻），按参数维护 EWMA 和最近样本，
+# 把固定等待缩短到实际 p99 + 余量并保存，换到更快的机器上每轮时间自动下降，不必手动调 config.json
+#
+# 只学习在轮次脚本中只出现一次、且作为某个 "until" 画面等待超时（不带 repeat）的参数；学到的值不会超过配置值。
+# 画面在学到的时限内没有出现时按时限记一个样本，下一轮的时限随之放宽。
+# `python phase_model.py` 查看学到的值，`--from-sessions sessions.db` 用已有会话记录补充样本。
+
+import json
+import os
+
+from tap_stats import percentile
+
+PHASE_MODEL_FILE = "phase_model.json"
+EWMA_ALPHA = 0.2  # EWMA 平滑系数，越大越跟随最近几轮
+WINDOW = 200      # 每个参数保留的最近样本数（p99 按此窗口计算）
+
+
+def adaptive_waits(script):
+    """{画面名: 参数名}：脚本中可以按画面实际出现时间缩短的等待"""
+    uses = {}
+    candidates = []
+
+    def use(value):
+        if isinstance(value, str):
+            uses[value] = uses.get(value, 0) + 1
+
+    for phase in script["phases"]:
+        kind = phase.get("type", "steps")
+        use(phase.get("duration"))
+        use(phase.get("wait"))
+        if "until" in phase:
+            # 与 compile_cycle 一致：wait 阶段的画面等待以 duration 为超时，其它阶段以阶段后的 wait 为超时
+            candidates.append((phase["until"], phase.get("duration") if kind == "wait" else phase.get("wait")))
+        for step in phase.get("steps", []):
+            use(step.get("wait"))
+            if "until" in step and int(step.get("repeat", 1)) == 1:
+                candidates.append((step["until"], step.get("wait")))
+    states = [state for state, _ in candidates]
+    # 同一参数用在多处时缩短它会影响无关的等待，同一画面等多次时无法区分样本，都不学习
+    return {state: param for state, param in candidates
+            if isinstance(param, str) and uses[param] == 1 and states.count(state) == 1}
+
+
+class PhaseModel:
+    """每个参数: {"ewma": 平滑后的实际耗时, "samples": 最近样本, "misses": 学到的时限内未出现的次数}"""
+
+    def __init__(self, path=None, waits=None):
+        self.path = path
+        self.waits = waits or {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path):
+        waits = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                waits = json.load(f).get("waits", {})
+        return cls(path, waits)
+
+    def save(self):
+        """有新样本时写回文件（先写临时文件再替换，中途退出不会留下半个文件）"""
+        if not self.dirty or not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"waits": self.waits}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def entry(self, param):
+        return self.waits.setdefault(param, {"ewma": None, "samples": [], "misses": 0})
+
+    def observe(self, param, seconds):
+        e = self.entry(param)
+        e["ewma"] = seconds if e["ewma"] is None else e["ewma"] + EWMA_ALPHA * (seconds - e["ewma"])
+        e["samples"] = (e["samples"] + [round(seconds, 4)])[-WINDOW:]
+        self.dirty = True
+
+    def miss(self, param, limit):
+        """画面在学到的时限 limit 内没有出现：实际耗时至少为 limit，按 limit 记一个样本，
+        p99 随之上移，下一轮的时限放宽 margin；超时频繁时逐步退回配置值"""
+        e = self.entry(param)
+        e["samples"] = (e["samples"] + [round(limit, 4)])[-WINDOW:]
+        e["misses"] += 1
+        self.dirty = True
+
+    def p99(self, param):
+        e = self.waits.get(param)
+        return percentile(sorted(e["samples"]), 99) if e else 0.0
+
+    def limit(self, param, configured, margin, min_samples):
+        """学到的等待上限：样本足够时为 p99 + margin，且不超过配置值"""
+        e = self.waits.get(param)
+        if e is None or len(e["samples"]) < max(1, int(min_samples)):
+            return configured
+        return min(configured, self.p99(param) + margin)
+
+    def summary(self, waits, config):
+        """{参数名: 统计}，waits 为 adaptive_waits() 的结果"""
+        result = {}
+        for state, param in waits.items():
+            e = self.waits.get(param, {"ewma": None, "samples": [], "misses": 0})
+            samples = sorted(e["samples"])
+            configured = float(config[param])
+            result[param] = {
+                "state": state,
+                "samples": len(samples),
+                "ewma": e["ewma"],
+                "p50": percentile(samples, 50),
+                "p99": percentile(samples, 99),
+                "misses": e["misses"],
+                "configured": configured,
+                "learned": self.limit(param, configured, config["adaptive_margin"],
+                                      config["adaptive_min_samples"]),
+            }
+        return result
+
+
+def seed_from_sessions(model, waits, db):
+    """用会话记录（session_log.py）中画面提前出现的等待补充样本，返回补充的样本数"""
+    import sqlite3
+
+    conn = sqlite3.connect(db)
+    rows = conn.execute("SELECT state, waited FROM states WHERE seen = 1 ORDER BY rowid").fetchall()
+    conn.close()
+    count = 0
+    for state, waited in rows:
+        if state in waits:
+            model.observe(waits[state], waited)
+            count += 1
+    return count
+
+
+# ============ 查看 / 补充学到的等待 ============
+if __name__ == "__main__":
+    import argparse
+
+    from engine import DEFAULT_CONFIG, CONFIG_FILE
+    from cycle_script import load_script
+
+    parser = argparse.ArgumentParser(description="查看自适应等待学到的值")
+    parser.add_argument("--config", default=CONFIG_FILE)
+    parser.add_argument("--model", help=f"模型文件（默认取 config 的 phase_model_file 或 {PHASE_MODEL_FILE}）")
+    parser.add_argument("--from-sessions", metavar="DB", help="用会话记录补充样本并保存")
+    parser.add_argument("--reset", action="store_true", help="清空学到的值（之后按配置值等待）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    args = parser.parse_args()
+
+    config = dict(DEFAULT_CONFIG)
+    if os.path.exists(args.config):
+        with open(args.config, "r", encoding="utf-8") as f:
+            config.update({k: v for k, v in json.load(f).items() if k in config})
+    path = args.model or config["phase_model_file"] or PHASE_MODEL_FILE
+    model = PhaseModel.load(path)
+    waits = adaptive_waits(load_script(config["cycle_script"]))
+
+    if args.reset:
+        model.waits = {}
+        model.dirty = True
+    if args.from_sessions:
+        print(f"📥 从会话记录补充 {seed_from_sessions(model, waits, args.from_sessions)} 个样本")
+    model.save()
+
+    result = model.summary(waits, config)
+    if args.json:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif not result:
+        print("📭 当前轮次脚本中没有可自适应的等待（需要带 until 且只出现一次的参数）")
+    else:
+        for param, s in result.items():
+            ewma = f"{s['ewma']:.2f}s" if s["ewma"] is not None else "-"
+            print(f"📐 {param}（等待画面 {s['state']}）: {s['samples']} 个样本，EWMA {ewma}，"
+                  f"p50 {s['p50']:.2f}s / p99 {s['p99']:.2f}s，未出现 {s['misses']} 次")
+            print(f"   配置 {s['configured']:.2f}s → 实际使用 {s['learned']:.2f}s")
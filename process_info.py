@@ -0,0 +1,21 @@
+# process_info.py
+# 进程资源信息：无界面入口的启动输出、性能剖析（profiling.py）和启动基准共用
+
+import sys
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存（MB）
+
+    Linux 上 ru_maxrss 在 exec 后保留父进程的峰值（子进程启动基准会读到父进程的内存），优先读 /proc 的 VmHWM。
+    """
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
@@ -0,0 +1,244 @@
+# profiling.py
+# 长时间运行的性能剖析（config.json 的 profile_dir 非空或 headless --profile 目录时开启）：
+# 运行期间开启 tracemalloc，每 profile_every 轮用 cProfile 剖析一整轮，并在这一轮结束时保存内存快照；
+# 每轮的内存 / CPU / 耗时追加到 summary.jsonl。不开启时引擎每轮只多一次 None 判断。
+#   python profiling.py summary profiles/20260101_120000          # 每轮内存、CPU 变化
+#   python profiling.py diff A.tracemalloc B.tracemalloc           # 两个快照之间增长最多的分配位置
+#   python profiling.py diff A.prof B.prof                         # 两轮之间耗时变化最大的函数
+#   python profiling.py diff profiles/20260101_120000              # 目录中较早和最后一个快照 / 剖析
+#   python profiling.py stats loop_00010.prof [--sort tottime]    # 单轮剖析
+# .prof 为标准 pstats 格式，也可以用 snakeviz 等工具查看。
+
+import cProfile
+import glob
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+from process_info import peak_rss_mb
+
+PROFILE_FRAMES = 5   # tracemalloc 每次分配保留的调用栈深度
+SNAPSHOT_SUFFIX = ".tracemalloc"
+PROFILE_SUFFIX = ".prof"
+SUMMARY_FILE = "summary.jsonl"
+# 快照比较时忽略的分配位置（剖析工具自身和导入系统）
+IGNORED = ("<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>",
+           tracemalloc.__file__, cProfile.__file__, __file__)
+
+# tracemalloc 是整个进程共用的：多开时每个实例各有一个 SessionProfiler，按引用计数开关，
+# 最后一个停止时才关闭；进程启动前已经开启的（PYTHONTRACEMALLOC 等）不关闭
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+
+
+def acquire_tracing(frames=PROFILE_FRAMES):
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            _tracing_owned = True
+        _tracing_users += 1
+
+
+def release_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+# Python 3.12 起 cProfile 基于进程全局的 sys.monitoring：同一时刻只能有一个 Profile 开启（再 enable 抛 ValueError），
+# 开启后记录所有线程。多开时各实例经这把锁轮流剖析，拿不到锁的那一轮跳过剖析，不等待
+_profile_lock = threading.Lock()
+
+
+class SessionProfiler:
+    """按轮次剖析：begin_cycle / end_cycle 在工作线程中调用
+
+    Python 3.12 之前 cProfile 只记录调用它的线程；3.12 起记录进程内所有线程，多开时 .prof 中也有其它实例的调用。
+    同一时刻只有一个实例在剖析，其它实例该剖析的轮次跳过（summary.jsonl 中 profiled 为 false）。
+    多开时 tracemalloc 的内存数字和快照是整个进程的，不单属于该实例。
+    """
+
+    def __init__(self, directory, every=10, frames=PROFILE_FRAMES):
+        self.directory = os.path.join(directory, time.strftime("%Y%m%d_%H%M%S"))
+        self.every = max(1, int(every))
+        self.frames = frames
+        self.tracing = False
+        self.profile = None
+        self.cpu = 0.0
+        self.summary = None
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        acquire_tracing(self.frames)
+        self.tracing = True
+        self.summary = open(os.path.join(self.directory, SUMMARY_FILE), "a", encoding="utf-8")
+        self.cpu = time.process_time()
+        print(f"🔬 性能剖析: 每 {self.every} 轮保存到 {self.directory}")
+
+    def due(self, loop):
+        return loop == 1 or loop % self.every == 0
+
+    def begin_cycle(self, loop):
+        if not self.due(loop) or not _profile_lock.acquire(blocking=False):
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # 进程中还有锁以外的剖析（如 python -m cProfile 启动），本轮不剖析
+            _profile_lock.release()
+            print(f"⚠️ 第 {loop} 轮跳过剖析: {e}")
+            return
+        self.profile = profile
+
+    def end_profile(self):
+        self.profile.disable()
+        self.profile = None
+        _profile_lock.release()
+
+    def end_cycle(self, loop, duration):
+        """每轮追加一行汇总；剖析的那一轮同时保存 .prof 和内存快照"""
+        stem = os.path.join(self.directory, f"loop_{loop:05d}")
+        profiled = self.profile is not None
+        if profiled:
+            profile = self.profile
+            self.end_profile()
+            profile.dump_stats(stem + PROFILE_SUFFIX)
+            tracemalloc.take_snapshot().dump(stem + SNAPSHOT_SUFFIX)
+        cpu = time.process_time()
+        current, peak = tracemalloc.get_traced_memory()
+        record = {"loop": loop, "ts": round(time.time(), 3), "cycle_s": round(duration, 3),
+                  "cpu_s": round(cpu - self.cpu, 3), "traced_kb": current // 1024, "traced_peak_kb": peak // 1024,
+                  "rss_mb": round(peak_rss_mb(), 1), "profiled": profiled}
+        self.cpu = cpu
+        self.summary.write(json.dumps(record) + "\n")
+        self.summary.flush()
+
+    def stop(self):
+        if self.profile is not None:
+            self.end_profile()
+        if self.tracing:
+            release_tracing()
+            self.tracing = False
+        if self.summary is not None:
+            self.summary.close()
+            self.summary = None
+
+
+# ============ 比较 / 查看 ============
+def load_snapshot(path):
+    snapshot = tracemalloc.Snapshot.load(path)
+    return snapshot.filter_traces([tracemalloc.Filter(False, pattern) for pattern in IGNORED])
+
+
+def diff_snapshots(old, new, key="lineno", top=20):
+    """[(增长字节数, 增长分配数, 当前字节数, 位置)]，按增长量降序"""
+    stats = load_snapshot(new).compare_to(load_snapshot(old), key)
+    rows = []
+    for stat in stats[:top]:
+        frame = stat.traceback[0]
+        where = f"{frame.filename}:{frame.lineno}"
+        if key == "traceback":
+            where = " <- ".join(f"{os.path.basename(f.filename)}:{f.lineno}" for f in stat.traceback)
+        rows.append((stat.size_diff, stat.count_diff, stat.size, where))
+    return rows
+
+
+def function_times(path):
+    """{函数: (调用次数, 自身耗时, 累计耗时)}"""
+    stats = pstats.Stats(path)
+    return {func: (nc, tt, ct) for func, (cc, nc, tt, ct, callers) in stats.stats.items()}
+
+
+def diff_profiles(old, new, top=20):
+    """[(累计耗时变化, 自身耗时变化, 调用次数变化, 新的累计耗时, 函数)]，按累计耗时变化的绝对值降序"""
+    a, b = function_times(old), function_times(new)
+    rows = []
+    for func in set(a) | set(b):
+        nc0, tt0, ct0 = a.get(func, (0, 0.0, 0.0))
+        nc1, tt1, ct1 = b.get(func, (0, 0.0, 0.0))
+        filename, line, name = func
+        rows.append((ct1 - ct0, tt1 - tt0, nc1 - nc0, ct1, f"{os.path.basename(filename)}:{line}({name})"))
+    rows.sort(key=lambda row: abs(row[0]), reverse=True)
+    return rows[:top]
+
+
+def first_last(directory, suffix):
+    """目录中用于比较的两个文件；第 1 轮包含首次导入和缓存建立，有更多文件时从下一个开始比较"""
+    files = sorted(glob.glob(os.path.join(directory, "loop_*" + suffix)))
+    if len(files) < 2:
+        raise SystemExit(f"❌ {directory} 中的 {suffix} 文件不足两个")
+    return files[1 if len(files) > 2 else 0], files[-1]
+
+
+def print_snapshot_diff(old, new, key, top):
+    print(f"🧠 内存: {os.path.basename(old)} → {os.path.basename(new)}（按 {key}）")
+    total = 0
+    for size, count, current, where in diff_snapshots(old, new, key, top):
+        total += size
+        print(f"  {size / 1024:+10.1f} KiB {count:+8d} 次  现 {current / 1024:10.1f} KiB  {where}")
+    print(f"  前 {top} 项合计 {total / 1024:+.1f} KiB")
+
+
+def print_profile_diff(old, new, top):
+    print(f"🔥 CPU: {os.path.basename(old)} → {os.path.basename(new)}（累计耗时变化）")
+    for dct, dtt, dnc, ct, name in diff_profiles(old, new, top):
+        print(f"  累计 {dct * 1000:+9.2f}ms  自身 {dtt * 1000:+9.2f}ms  调用 {dnc:+8d}  现 {ct * 1000:9.2f}ms  {name}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="查看 / 比较长时间运行的性能剖析结果")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("summary", help="每轮的内存 / CPU 变化")
+    p.add_argument("directory")
+    p = sub.add_parser("diff", help="比较两个快照或两个 .prof（给出目录时比较较早的和最后一个，跳过第 1 轮）")
+    p.add_argument("paths", nargs="+", metavar="PATH")
+    p.add_argument("--key", default="lineno", choices=("lineno", "filename", "traceback"),
+                   help="内存快照的分组方式")
+    p.add_argument("--top", type=int, default=20)
+    p = sub.add_parser("stats", help="查看单轮剖析")
+    p.add_argument("path")
+    p.add_argument("--sort", default="cumulative", help="pstats 排序字段（cumulative / tottime / calls）")
+    p.add_argument("--top", type=int, default=30)
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        with open(os.path.join(args.directory, SUMMARY_FILE), "r", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        if not rows:
+            raise SystemExit("📭 还没有记录")
+        first = rows[0]
+        for r in rows:
+            mark = " 🔬" if r["profiled"] else ""
+            print(f"第 {r['loop']:5d} 轮: {r['cycle_s']:7.1f}s  CPU {r['cpu_s']:6.2f}s  "
+                  f"tracemalloc {r['traced_kb']:8d} KiB（{r['traced_kb'] - first['traced_kb']:+d}）  "
+                  f"RSS 峰值 {r['rss_mb']:.1f}MB{mark}")
+        last = rows[-1]
+        if len(rows) > 1:
+            per = (last["traced_kb"] - first["traced_kb"]) / (last["loop"] - first["loop"])
+            print(f"📈 {len(rows)} 轮内存变化 {last['traced_kb'] - first['traced_kb']:+d} KiB（每轮 {per:+.1f} KiB）")
+    elif args.command == "diff":
+        if len(args.paths) == 1 and os.path.isdir(args.paths[0]):
+            directory = args.paths[0]
+            print_snapshot_diff(*first_last(directory, SNAPSHOT_SUFFIX), args.key, args.top)
+            print_profile_diff(*first_last(directory, PROFILE_SUFFIX), args.top)
+        elif len(args.paths) == 2:
+            old, new = args.paths
+            if old.endswith(PROFILE_SUFFIX):
+                print_profile_diff(old, new, args.top)
+            else:
+                print_snapshot_diff(old, new, args.key, args.top)
+        else:
+            parser.error("diff 需要一个目录或两个文件")
+    else:
+        pstats.Stats(args.path).sort_stats(args.sort).print_stats(args.top)
@@ -0,0 +1,49 @@
+# recovery.py
+# 卡住检测：每轮结束后检查是否有进展（出错、该出现的画面没出现、实际耗时远超编译时长），
+# 连续 watchdog_strikes 轮异常时执行轮次脚本中的 "recovery" 恢复流程（如登陆 / 错误确认 / 关公告），
+# 而不是每轮都固定点一遍；从第一轮异常开始到恢复完成的时间记为恢复耗时
+
+def stuck_reasons(error, state_log, overrun, slack):
+    """本轮没有进展的原因列表，正常时为空
+
+    state_log 为本轮画面等待 (画面名, 实际等待, 超时上限, 是否提前出现)；同一画面等多次时（如带 repeat 的返回点击）
+    只要有一次出现就算正常。overrun 为实际耗时减去编译时长（秒），超过 slack 视为异常。
+    """
+    reasons = []
+    if error:
+        reasons.append(f"出错: {error}")
+    seen = {}
+    for state, _, _, hit in state_log:
+        seen[state] = seen.get(state, False) or hit
+    missed = [state for state, hit in seen.items() if not hit]
+    if missed:
+        reasons.append(f"画面未出现: {', '.join(missed)}")
+    if overrun > slack:
+        reasons.append(f"比预期多用 {overrun:.1f}s")
+    return reasons
+
+
+class Watchdog:
+    """统计连续异常轮数；达到 strikes 时返回原因，由引擎执行恢复流程"""
+
+    def __init__(self, strikes=1):
+        self.strikes = max(1, int(strikes))
+        self.count = 0       # 连续异常轮数
+        self.since = None    # 第一轮异常的开始时间
+        self.reasons = []
+
+    def reset(self):
+        self.count = 0
+        self.since = None
+        self.reasons = []
+
+    def check(self, started, reasons):
+        """started 为本轮开始时间；需要恢复时返回原因列表，否则返回 None"""
+        if not reasons:
+            self.reset()
+            return None
+        if self.since is None:
+            self.since = started
+        self.count += 1
+        self.reasons = reasons
+        return reasons if self.count >= self.strikes else None
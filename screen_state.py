@@ -0,0 +1,132 @@
+# screen_state.py
+# 画面状态识别：截取几个小区域，与校准时保存的参考指纹做向量化比较，判断当前处于哪个画面
+#
+# 指纹在 calibrate.py 采集点位时自动截取（以点击点为中心的小方块，表示“该按钮可点击”的画面），
+# 其它画面（如游戏内的 game）可用 `python screen_state.py capture game X Y` 手动采集。
+# 轮次脚本中的 "until": 画面名 即等待该画面出现。
+
+import numpy as np
+
+from capture import RegionCapture
+
+FINGERPRINT_FILE = "fingerprints.npz"
+FINGERPRINT_SIZE = 40      # 指纹区域边长（像素）
+DEFAULT_THRESHOLD = 12.0   # 平均每通道差值（0-255）不超过该值视为匹配
+
+
+def region_around(x, y, size=FINGERPRINT_SIZE):
+    """以 (x, y) 为中心的正方形区域 (left, top, width, height)"""
+    half = size // 2
+    return (max(0, int(x) - half), max(0, int(y) - half), size, size)
+
+
+class ArrayScreen:
+    """用 NumPy 数组模拟屏幕，grab 时直接切片；用于合成图像测试和录制帧回放"""
+
+    def __init__(self, frame):
+        self.frame = np.asarray(frame, dtype=np.uint8)
+
+    def grab(self, region):
+        left, top, width, height = region
+        return self.frame[top:top + height, left:left + width]
+
+
+class StateDetector:
+    """保存各画面的参考指纹，并判断当前截图是否匹配"""
+
+    def __init__(self, grab=None, threshold=DEFAULT_THRESHOLD):
+        # 默认按区域截图（capture.py），各指纹区域复用各自的缓冲区
+        self.grab = grab or RegionCapture().grab_region
+        self.threshold = threshold
+        self.fingerprints = {}  # 画面名 -> [(区域, 参考像素)]
+
+    def __contains__(self, name):
+        return name in self.fingerprints
+
+    def add(self, name, region, pixels):
+        # 截图缓冲区会被下一帧覆盖，参考指纹必须复制一份
+        self.fingerprints.setdefault(name, []).append((tuple(int(v) for v in region),
+                                                       np.array(pixels, dtype=np.uint8)))
+
+    def capture(self, name, region):
+        """截取当前画面作为 name 的参考指纹"""
+        self.add(name, region, self.grab(region))
+
+    def score(self, name):
+        """当前画面与 name 指纹的平均差值；无指纹时返回 inf"""
+        refs = self.fingerprints.get(name)
+        if not refs:
+            return float("inf")
+        total = 0.0
+        count = 0
+        for region, ref in refs:
+            pixels = self.grab(region)
+            if pixels.shape != ref.shape:
+                return float("inf")
+            diff = np.abs(pixels.astype(np.int16) - ref.astype(np.int16))
+            total += float(diff.sum())
+            count += diff.size
+        return total / count
+
+    def matches(self, name):
+        return self.score(name) <= self.threshold
+
+    def detect(self, names=None):
+        """返回匹配度最高且低于阈值的画面名，没有则返回 None"""
+        best, best_score = None, self.threshold
+        for name in names or self.fingerprints:
+            s = self.score(name)
+            if s <= best_score:
+                best, best_score = name, s
+        return best
+
+    def save(self, path=FINGERPRINT_FILE):
+        arrays = {}
+        for name, refs in self.fingerprints.items():
+            for i, (region, ref) in enumerate(refs):
+                arrays[f"{name}@{i}@{','.join(map(str, region))}"] = ref
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path=FINGERPRINT_FILE, grab=None, threshold=DEFAULT_THRESHOLD):
+        detector = cls(grab, threshold)
+        data = np.load(path)
+        for key in sorted(data.files, key=lambda k: int(k.split("@")[1])):
+            name, _, region = key.split("@")
+            detector.add(name, tuple(int(v) for v in region.split(",")), data[key])
+        return detector
+
+
+# ============ 采集指纹 / 检测当前画面 ============
+if __name__ == "__main__":
+    import argparse
+    import os
+    import time
+
+    parser = argparse.ArgumentParser(description="采集画面指纹，或检测当前画面匹配哪个指纹")
+    parser.add_argument("--file", default=FINGERPRINT_FILE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    sub = parser.add_subparsers(dest="command")
+    cap = sub.add_parser("capture", help="以 (X, Y) 为中心截取当前画面作为指纹（如游戏内暂停按钮 → game）")
+    cap.add_argument("name")
+    cap.add_argument("x", type=int)
+    cap.add_argument("y", type=int)
+    cap.add_argument("--size", type=int, default=FINGERPRINT_SIZE)
+    cap.add_argument("--delay", type=float, default=5.0, help="倒计时秒数，用于切回游戏")
+    args = parser.parse_args()
+
+    if args.command == "capture":
+        detector = StateDetector(threshold=args.threshold)
+        if os.path.exists(args.file):
+            detector = StateDetector.load(args.file, threshold=args.threshold)
+            detector.fingerprints.pop(args.name, None)
+        print(f"⏳ {args.delay:.0f} 秒后截取，请切换到目标画面...")
+        time.sleep(args.delay)
+        detector.capture(args.name, region_around(args.x, args.y, args.size))
+        detector.save(args.file)
+        print(f"💾 已保存指纹 {args.name} -> {args.file}")
+    else:
+        detector = StateDetector.load(args.file, threshold=args.threshold)
+        for name in detector.fingerprints:
+            print(f"{name:>20}: 差值 {detector.score(name):6.1f}")
+        print(f"🔍 当前画面: {detector.detect() or '未识别'}")
@@ -0,0 +1,227 @@
+# session_log.py
+# 会话记录：每次运行的每轮阶段耗时、点击数、错误、休息 / 轮次间延迟写入 SQLite（只追加），
+# `python session_log.py` 汇总多次运行：每小时轮数、各阶段耗时、时间都花在了哪里、哪些等待可以缩短
+# 多开（orchestrator.py）时每个实例各自一条 session，instance 为实例名，`--instance 名称` 只汇总该实例
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from tap_stats import percentile
+
+SESSION_DB = "sessions.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY, started REAL, ended REAL, host TEXT, script TEXT, config TEXT, instance TEXT);
+CREATE TABLE IF NOT EXISTS cycles (
+    session INTEGER, loop INTEGER, started REAL, duration REAL, taps INTEGER, clicks INTEGER, error TEXT);
+CREATE TABLE IF NOT EXISTS phases (
+    session INTEGER, loop INTEGER, phase TEXT, duration REAL);
+CREATE TABLE IF NOT EXISTS states (
+    session INTEGER, loop INTEGER, state TEXT, waited REAL, timeout REAL, seen INTEGER);
+CREATE TABLE IF NOT EXISTS idle (
+    session INTEGER, kind TEXT, started REAL, duration REAL);
+CREATE TABLE IF NOT EXISTS recoveries (
+    session INTEGER, loop INTEGER, reason TEXT, started REAL, recovery_time REAL, spent REAL,
+    attempts INTEGER, recovered INTEGER);
+"""
+
+IDLE_KINDS = ("rest", "delay", "backoff")  # 休息 / 轮次间延迟 / 出错退避
+
+
+def ensure_schema(conn):
+    """建表；旧版本创建的记录可能缺少后来新增的表 / 列"""
+    conn.executescript(SCHEMA)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(sessions)")]
+    if "instance" not in columns:
+        conn.execute("ALTER TABLE sessions ADD COLUMN instance TEXT")
+        conn.commit()
+
+
+def phase_durations(marks, end):
+    """[(阶段名, 开始时间)] -> [(阶段名, 时长)]；最后一个阶段持续到 end，结束标记本身不计"""
+    result = []
+    for k, (name, t) in enumerate(marks):
+        t_next = marks[k + 1][1] if k + 1 < len(marks) else end
+        if name != "end":
+            result.append((name, max(0.0, t_next - t)))
+    return result
+
+
+class SessionLog:
+    """一次运行（begin 到停止）对应一条 session；写入可能来自工作线程，统一加锁"""
+
+    def __init__(self, path=SESSION_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        ensure_schema(self.conn)
+        self.lock = threading.Lock()
+        self.session = None
+
+    def start(self, script=None, config=None, started=None, instance=None):
+        """instance 为多开时的实例名，本次运行的所有记录都经 session 归到该实例"""
+        with self.lock, self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO sessions (started, host, script, config, instance) VALUES (?, ?, ?, ?, ?)",
+                (started or time.time(), socket.gethostname(), script,
+                 json.dumps(config, ensure_ascii=False) if config else None, instance))
+            self.session = cur.lastrowid
+        return self.session
+
+    def add_cycle(self, loop, started, duration, taps=0, clicks=0, error=None, phases=(), states=()):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT INTO cycles VALUES (?, ?, ?, ?, ?, ?, ?)",
+                              (self.session, loop, started, duration, taps, clicks, error))
+            self.conn.executemany("INSERT INTO phases VALUES (?, ?, ?, ?)",
+                                  [(self.session, loop, name, d) for name, d in phases])
+            self.conn.executemany("INSERT INTO states VALUES (?, ?, ?, ?, ?, ?)",
+                                  [(self.session, loop, state, waited, timeout, int(seen))
+                                   for state, waited, timeout, seen in states])
+
+    def add_idle(self, kind, started, duration):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT INTO idle VALUES (?, ?, ?, ?)", (self.session, kind, started, duration))
+
+    def add_recovery(self, loop, reason, started, recovery_time, spent, attempts, recovered):
+        """started 为第一轮异常的开始时间，recovery_time 为从那时到恢复完成，spent 为执行恢复流程本身的时间"""
+        with self.lock, self.conn:
+            self.conn.execute("INSERT INTO recoveries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                              (self.session, loop, reason, started, recovery_time, spent, attempts,
+                               int(recovered)))
+
+    def end(self, ended=None):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE sessions SET ended = ? WHERE id = ?", (ended or time.time(), self.session))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def distribution(values):
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "total": sum(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+    }
+
+
+def report(path=SESSION_DB, last=None, instance=None):
+    """汇总最近 last 次运行（默认全部）；给出 instance 时只汇总该实例"""
+    conn = sqlite3.connect(path)
+    ensure_schema(conn)
+    where = " WHERE instance = ?" if instance else ""
+    ids = [row[0] for row in conn.execute("SELECT id FROM sessions" + where + " ORDER BY id DESC" +
+                                           (f" LIMIT {int(last)}" if last else ""),
+                                           (instance,) if instance else ())]
+    if not ids:
+        return {"sessions": 0}
+    marks = ",".join("?" * len(ids))
+
+    def rows(sql):
+        return conn.execute(sql.format(ids=marks), ids).fetchall()
+
+    # 运行时长：未正常结束的运行以最后一条记录为止
+    wall = 0.0
+    for sid, started, ended in rows("SELECT id, started, ended FROM sessions WHERE id IN ({ids})"):
+        if ended is None:
+            ends = conn.execute(
+                "SELECT MAX(e) FROM (SELECT MAX(started + duration) AS e FROM cycles WHERE session = ? "
+                "UNION ALL SELECT MAX(started + duration) FROM idle WHERE session = ?)", (sid, sid)).fetchone()
+            ended = ends[0] or started
+        wall += max(0.0, ended - started)
+
+    cycles = rows("SELECT duration, error FROM cycles WHERE session IN ({ids})")
+    completed = sum(1 for _, error in cycles if error is None)
+    phases = {}
+    for phase, duration in rows("SELECT phase, duration FROM phases WHERE session IN ({ids})"):
+        phases.setdefault(phase, []).append(duration)
+    idle = {kind: [] for kind in IDLE_KINDS}
+    for kind, duration in rows("SELECT kind, duration FROM idle WHERE session IN ({ids})"):
+        idle.setdefault(kind, []).append(duration)
+    states = {}
+    for state, waited, timeout, seen in rows("SELECT state, waited, timeout, seen FROM states "
+                                             "WHERE session IN ({ids})"):
+        states.setdefault(state, []).append((waited, timeout, seen))
+    recoveries = rows("SELECT recovery_time, spent, recovered FROM recoveries WHERE session IN ({ids})")
+    errors = rows("SELECT error, COUNT(*) FROM cycles WHERE session IN ({ids}) AND error IS NOT NULL "
+                  "GROUP BY error ORDER BY COUNT(*) DESC LIMIT 5")
+    conn.close()
+
+    # 时间去向：各阶段 + 各类空闲，剩余为轮次外的其它开销（编译、统计输出等）
+    where = {f"phase:{name}": sum(v) for name, v in phases.items()}
+    where.update({f"idle:{kind}": sum(v) for kind, v in idle.items()})
+    where["recovery"] = sum(spent for _, spent, _ in recoveries)
+    where["other"] = max(0.0, wall - sum(where.values()))
+    return {
+        "sessions": len(ids),
+        "wall_hours": wall / 3600,
+        "cycles": len(cycles),
+        "completed_cycles": completed,
+        "cycles_per_hour": completed / (wall / 3600) if wall else 0.0,
+        "time_fraction": {k: v / wall for k, v in where.items()} if wall else {},
+        "phases": {name: distribution(v) for name, v in phases.items()},
+        "idle": {kind: distribution(v) for kind, v in idle.items() if v},
+        "states": {
+            state: dict(distribution([w for w, _, _ in v]),
+                        timeout_mean=sum(t for _, t, _ in v) / len(v),
+                        seen_fraction=sum(s for _, _, s in v) / len(v))
+            for state, v in states.items()
+        },
+        "recoveries": dict(distribution([t for t, _, ok in recoveries if ok]),
+                           attempts=len(recoveries), failed=sum(1 for _, _, ok in recoveries if not ok)),
+        "errors": [{"error": e, "count": c} for e, c in errors],
+    }
+
+
+def format_report(r):
+    if not r["sessions"]:
+        return "📭 没有会话记录"
+    lines = [
+        f"🗂️ {r['sessions']} 次运行，共 {r['wall_hours']:.2f} 小时",
+        f"🔄 {r['completed_cycles']}/{r['cycles']} 轮完成（{r['cycles_per_hour']:.2f} 轮/小时）",
+        "⏱️ 时间去向:",
+    ]
+    for key, frac in sorted(r["time_fraction"].items(), key=lambda kv: -kv[1]):
+        lines.append(f"  {key:>20}: {frac:6.1%}")
+    lines.append("📐 各阶段耗时（秒）:")
+    for name, d in r["phases"].items():
+        lines.append(f"  {name:>20}: 平均 {d['mean']:6.2f}  p50 {d['p50']:6.2f}  p95 {d['p95']:6.2f}")
+    if r["states"]:
+        lines.append("🔍 画面等待（实际等待 / 固定上限，秒）:")
+        for state, d in r["states"].items():
+            lines.append(f"  {state:>20}: p50 {d['p50']:5.2f}  p99 {d['p99']:5.2f} / 上限 {d['timeout_mean']:5.2f}"
+                         f"  提前出现 {d['seen_fraction']:.0%}")
+    rec = r["recoveries"]
+    if rec["attempts"]:
+        lines.append(f"🛟 卡住恢复 {rec['attempts']} 次（失败 {rec['failed']} 次），"
+                     f"恢复耗时 p50 {rec['p50']:.1f}s / p95 {rec['p95']:.1f}s")
+    for e in r["errors"]:
+        lines.append(f"❌ {e['count']} 次: {e['error']}")
+    return "\n".join(lines)
+
+
+# ============ 汇总报告 ============
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="汇总会话记录：每小时轮数、各阶段耗时、时间去向")
+    parser.add_argument("--db", default=SESSION_DB)
+    parser.add_argument("--last", type=int, help="只统计最近 N 次运行")
+    parser.add_argument("--instance", help="只统计多开中该实例的运行")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        parser.error(f"找不到会话记录: {args.db}")
+    result = report(args.db, args.last, args.instance)
+    print(json.dumps(result, indent=2, ensure_ascii=False) if args.json else format_report(result))
@@ -0,0 +1,130 @@
+# simulate.py
+# 虚拟时钟快进模拟：评估工作/休息/轮次间延迟等参数对每小时轮数的影响，不产生任何点击
+
+import argparse
+import contextlib
+import io
+import json
+
+from engine import BotEngine, CONFIG_FILE, POSITIONS_FILE
+from input_backend import NullBackend
+from timing import VirtualClock
+
+
+class SimulatedEngine(BotEngine):
+    """在虚拟时钟上运行主控制循环；每轮时间线直接快进，不逐个回放事件"""
+
+    def __init__(self, horizon, **kwargs):
+        self.horizon = horizon
+        self.cycles = 0
+        self.cycle_time = 0.0   # 轮次内时间（进入 + 游戏 + 返回）
+        self.game_time = 0.0    # 其中游戏内时间
+        self.rest_time = 0.0
+        self.rest_count = 0
+        self.delay_time = 0.0   # 轮次间延迟
+        self.max_loops_hit = False
+        super().__init__(NullBackend(), clock=VirtualClock(), **kwargs)
+        self.config["tap_log_dir"] = ""
+        self.config["session_db"] = ""
+
+    def execute_timeline(self, timeline):
+        """不回放事件，直接把虚拟时间快进一整轮"""
+        self.clock.sleep(timeline.duration)
+        self.game_time += timeline.game_time
+
+    def run_single_cycle(self):
+        if self.clock.time() >= self.horizon:
+            self.running = False
+            return
+        t0 = self.clock.time()
+        super().run_single_cycle()
+        t1 = self.clock.time()
+        if t1 <= self.horizon:
+            self.cycles += 1
+        self.cycle_time += min(t1, self.horizon) - t0
+
+    def get_current_rest_duration(self):
+        duration = super().get_current_rest_duration()
+        self.rest_count += 1
+        self.rest_time += max(0.0, min(duration, self.horizon - self.clock.time()))
+        return duration
+
+    def get_post_cycle_delay(self):
+        delay = super().get_post_cycle_delay()
+        self.delay_time += max(0.0, min(delay, self.horizon - self.clock.time()))
+        return delay
+
+    def notify(self, title, text):
+        self.max_loops_hit = True
+
+    def report_timing(self):
+        pass
+
+    def simulate(self):
+        self.begin()
+        self.main_control_loop()
+        end = min(self.clock.time(), self.horizon)
+        hours = end / 3600 if end else 1.0
+        return {
+            "simulated_hours": end / 3600,
+            "cycles": self.cycles,
+            "cycles_per_hour": self.cycles / hours,
+            "rests": self.rest_count,
+            "idle_fraction": (end - self.cycle_time) / end if end else 0.0,
+            "game_fraction": self.game_time / end if end else 0.0,
+            "rest_fraction": self.rest_time / end if end else 0.0,
+            "delay_fraction": self.delay_time / end if end else 0.0,
+            "stopped_by_max_loops": self.max_loops_hit,
+        }
+
+
+def simulate(hours=24.0, runs=5, config_file=CONFIG_FILE, positions_file=POSITIONS_FILE, overrides=None):
+    """多次模拟取平均（随机工作/休息时长每次不同）"""
+    results = []
+    for _ in range(runs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine = SimulatedEngine(hours * 3600, config_file=config_file, positions_file=positions_file)
+            engine.apply_overrides(overrides or {})
+            results.append(engine.simulate())
+    keys = [k for k in results[0] if k != "stopped_by_max_loops"]
+    report = {k: sum(r[k] for r in results) / runs for k in keys}
+    report["runs"] = runs
+    report["stopped_by_max_loops"] = any(r["stopped_by_max_loops"] for r in results)
+    return report
+
+
+def format_report(report):
+    return "\n".join([
+        f"⏱️ 模拟时长: {report['simulated_hours']:.2f} 小时（{report['runs']} 次平均）",
+        f"🔄 完成轮数: {report['cycles']:.1f}（{report['cycles_per_hour']:.2f} 轮/小时）",
+        f"🎮 游戏内占比: {report['game_fraction']:.1%}",
+        f"😴 空闲占比: {report['idle_fraction']:.1%}"
+        f"（休息 {report['rest_fraction']:.1%}，轮次间延迟 {report['delay_fraction']:.1%}，"
+        f"共休息 {report['rests']:.1f} 次）",
+        "⏹️ 已因最大循环次数提前停止" if report["stopped_by_max_loops"] else "",
+    ]).rstrip()
+
+
+# ============ 运行 ============
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="用虚拟时钟快进模拟 config.json 的工作/休息安排")
+    parser.add_argument("--config", default=CONFIG_FILE, help="配置文件")
+    parser.add_argument("--positions", default=POSITIONS_FILE, help="坐标文件")
+    parser.add_argument("--hours", type=float, default=24.0, help="模拟时长（小时）")
+    parser.add_argument("--runs", type=int, default=5, help="模拟次数（取平均）")
+    parser.add_argument("--set", nargs=2, action="append", default=[], metavar=("KEY", "VALUE"),
+                        help="临时覆盖某个参数，可重复")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    args = parser.parse_args()
+
+    overrides = {}
+    for key, value in args.set:
+        try:
+            overrides[key] = float(value)
+        except ValueError:
+            overrides[key] = value
+    report = simulate(args.hours, args.runs, args.config, args.positions, overrides)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print(format_report(report))
@@ -0,0 +1,107 @@
+# tap_stats.py
+# 点击计时记录：预分配数组存储，热循环里只做下标写入，不产生新对象
+
+import csv
+import json
+import math
+import os
+from array import array
+
+
+def percentile(sorted_values, p):
+    """最近秩百分位，sorted_values 需已升序"""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+class TimingRecorder:
+    """按字段预分配 double 数组；超出容量的记录只计数不保存"""
+
+    def __init__(self, fields, capacity=1024):
+        self.fields = tuple(fields)
+        self.capacity = 0
+        self.columns = {}
+        self._cols = ()
+        self.count = 0
+        self.dropped = 0
+        self.ensure_capacity(capacity)
+
+    def ensure_capacity(self, capacity):
+        """在进入热循环前调用，容量不足时一次性扩容"""
+        if capacity <= self.capacity:
+            return
+        for name in self.fields:
+            col = array("d", bytes(8 * capacity))
+            old = self.columns.get(name)
+            if old is not None:
+                col[:self.count] = old[:self.count]
+            self.columns[name] = col
+        self._cols = tuple(self.columns[name] for name in self.fields)
+        self.capacity = capacity
+
+    def reset(self):
+        self.count = 0
+        self.dropped = 0
+
+    def record(self, *values):
+        i = self.count
+        if i >= self.capacity:
+            self.dropped += 1
+            return
+        j = 0
+        for col in self._cols:
+            col[i] = values[j]
+            j += 1
+        self.count = i + 1
+
+    def column(self, name):
+        return self.columns[name][:self.count]
+
+    def summary(self, fields=None, scale=1000.0):
+        """各字段 p50/p95/p99/max，默认换算为毫秒"""
+        result = {}
+        for name in fields or self.fields:
+            values = sorted(self.column(name))
+            result[name] = {
+                "p50": percentile(values, 50) * scale,
+                "p95": percentile(values, 95) * scale,
+                "p99": percentile(values, 99) * scale,
+                "max": (values[-1] if values else 0.0) * scale,
+            }
+        return result
+
+    def rows(self):
+        cols = [self.column(name) for name in self.fields]
+        return zip(*cols)
+
+    def dump_csv(self, path):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.fields)
+            writer.writerows(self.rows())
+
+    def dump_jsonl(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for row in self.rows():
+                f.write(json.dumps(dict(zip(self.fields, row))) + "\n")
+
+    def dump(self, directory, stem, fmt="csv"):
+        """写到 directory/stem.csv 或 .jsonl，返回文件路径"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{stem}.{fmt}")
+        if fmt == "jsonl":
+            self.dump_jsonl(path)
+        else:
+            self.dump_csv(path)
+        return path
+
+
+def format_summary(summary):
+    """把 summary() 结果格式化为多行文本"""
+    lines = []
+    for name, s in summary.items():
+        lines.append(f"  {name:>10}: p50 {s['p50']:7.2f}ms  p95 {s['p95']:7.2f}ms  "
+                     f"p99 {s['p99']:7.2f}ms  max {s['max']:7.2f}ms")
+    return "\n".join(lines)
@@ -0,0 +1,235 @@
+# timer_profile.py
+# 本机计时特性：测量 sleep 超调（比请求多睡的时间）、计时器分辨率和补偿后的截止时间误差，按主机名保存；
+# 引擎启动时读取（本机没有记录或系统 / Python 版本变了时先花约 1 秒测量），把 sleep_until 的自旋阈值
+# 设为超调 p90 + 余量 —— 超调大的机器提前醒来不再迟到，超调小的机器少自旋、少占 CPU。
+# 偶发的长超调（虚拟机被抢占等）自旋也躲不开，自旋越长反而越容易在自旋中被抢占，所以不按 p99 / 最大值取。
+#   python timer_profile.py                      # 查看本机计时特性，并检查 config.json 中的间隔能否达到
+#   python timer_profile.py --recalibrate        # 重新测量
+#   python timer_profile.py --clicks X Y         # 同时测量输入后端单次点击的耗时（会在 X, Y 真实点击）
+
+import json
+import os
+import platform
+import time
+
+from tap_stats import percentile
+from timing import SystemClock, sleep_until
+
+TIMER_PROFILE_FILE = "timer_profile.json"
+SLEEP_DURATIONS = (0.0005, 0.001, 0.002, 0.005)  # 测量超调的 sleep 时长（秒）
+SLEEP_SAMPLES = 60
+DEADLINE_SAMPLES = 60
+DEADLINE_INTERVAL = 0.01
+SPIN_MARGIN = 0.0002  # 自旋阈值 = 超调 p90 + 该余量
+MIN_SPIN = 0.0002
+MAX_SPIN = 0.005
+
+
+def host_key():
+    return platform.node() or "localhost"
+
+
+def host_signature():
+    """系统或 Python 版本变化后重新测量"""
+    return f"{platform.platform()} / Python {platform.python_version()}"
+
+
+def quantiles(values, scale=1000.0):
+    values = sorted(values)
+    return {"p50": percentile(values, 50) * scale, "p90": percentile(values, 90) * scale,
+            "p99": percentile(values, 99) * scale, "max": (values[-1] if values else 0.0) * scale}
+
+
+def measure_sleep(durations=SLEEP_DURATIONS, samples=SLEEP_SAMPLES):
+    """{时长: 超调分位数（毫秒）}"""
+    perf_counter = time.perf_counter
+    result = {}
+    for seconds in durations:
+        overshoot = []
+        for _ in range(samples):
+            t0 = perf_counter()
+            time.sleep(seconds)
+            overshoot.append(perf_counter() - t0 - seconds)
+        result[f"{seconds:g}"] = quantiles(overshoot)
+    return result
+
+
+def measure_resolution(samples=10000):
+    """连续读取 perf_counter 时最小的非零差值（秒）"""
+    perf_counter = time.perf_counter
+    best = float("inf")
+    last = perf_counter()
+    for _ in range(samples):
+        now = perf_counter()
+        if last < now < last + best:
+            best = now - last
+        last = now
+    return best if best != float("inf") else 0.0
+
+
+def measure_deadlines(spin, samples=DEADLINE_SAMPLES, interval=DEADLINE_INTERVAL):
+    """按给定自旋阈值连续等 samples 个截止时间，返回 (迟到分位数（毫秒）, 自旋占等待时间的比例)"""
+    clock = SystemClock(spin)
+    lateness = []
+    origin = clock.perf_counter()
+    t0 = time.process_time()
+    for k in range(1, samples + 1):
+        deadline = origin + k * interval
+        actual, _ = sleep_until(deadline, clock)
+        lateness.append(actual - deadline)
+    cpu = time.process_time() - t0
+    return quantiles(lateness), cpu / (samples * interval)
+
+
+def choose_spin(sleep):
+    """自旋阈值：各时长超调 p90 的最大值 + 余量，限制在 [MIN_SPIN, MAX_SPIN]"""
+    worst = max(s["p90"] for s in sleep.values()) / 1000
+    return min(MAX_SPIN, max(MIN_SPIN, worst + SPIN_MARGIN))
+
+
+def calibrate():
+    """测量本机计时特性，返回一条主机记录"""
+    sleep = measure_sleep()
+    spin = choose_spin(sleep)
+    lateness, cpu = measure_deadlines(spin)
+    return {
+        "signature": host_signature(),
+        "measured": time.time(),
+        "resolution_us": measure_resolution() * 1e6,
+        "sleep_overshoot_ms": sleep,
+        "spin": spin,
+        "lateness_ms": lateness,
+        "spin_cpu": cpu,
+    }
+
+
+class TimerProfile:
+    """{"hosts": {主机名: 记录}}，多台机器可共用一个文件"""
+
+    def __init__(self, path=None, hosts=None):
+        self.path = path
+        self.hosts = hosts or {}
+
+    @classmethod
+    def load(cls, path):
+        hosts = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                hosts = json.load(f).get("hosts", {})
+        return cls(path, hosts)
+
+    def save(self):
+        """先写临时文件再替换，中途退出不会留下半个文件"""
+        if not self.path:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"hosts": self.hosts}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def current(self):
+        """本机记录；没有或已过期时返回 None"""
+        entry = self.hosts.get(host_key())
+        if entry is None or entry.get("signature") != host_signature():
+            return None
+        return entry
+
+    def ensure(self, recalibrate=False):
+        """返回本机记录，需要时先测量并保存"""
+        entry = None if recalibrate else self.current()
+        if entry is None:
+            click = self.hosts.get(host_key(), {}).get("click_us")
+            entry = calibrate()
+            if click:
+                entry["click_us"] = click
+            self.hosts[host_key()] = entry
+            self.save()
+        return entry
+
+
+def check_config(entry, config, lanes=4):
+    """检查配置的间隔在本机能否达到，返回 [(是否正常, 说明)]"""
+    checks = []
+    late = entry["lateness_ms"]["p99"]
+    raw = entry["sleep_overshoot_ms"]
+    raw_p99 = max(s["p99"] for s in raw.values())
+
+    jitter = float(config["time_jitter"]) * 1000
+    checks.append((jitter >= late,
+                   f"time_jitter ±{jitter:.2f}ms：补偿后计时误差 p99 {late:.2f}ms（不补偿时 sleep 超调 p99 {raw_p99:.2f}ms）"
+                   + ("" if jitter >= late else "，扰动小于计时误差，实际分布主要由计时误差决定")))
+
+    interval = float(config["click_interval_in_game"]) * 1000
+    click = entry.get("click_us")
+    if click:
+        burst = click["median"] * 2 * lanes / 1000 + float(config["tap_hold_time"]) * 1000 * lanes
+        need = burst + late
+        checks.append((interval >= need,
+                       f"click_interval_in_game {interval:.1f}ms：一组全按约 {burst:.2f}ms（{click['backend']}）"
+                       f"+ 计时误差 {late:.2f}ms = {need:.2f}ms"
+                       + ("" if interval >= need else "，间隔内发不完一组，会跳过节拍")))
+    else:
+        checks.append((interval >= late,
+                       f"click_interval_in_game {interval:.1f}ms：计时误差 p99 {late:.2f}ms（点击耗时未测量，见 --clicks）"))
+
+    fps = float(config["detect_fps"])
+    if config["game_mode"] == "detect" and fps:
+        period = 1000 / fps
+        spin = entry["spin"] * 1000
+        share = min(1.0, spin / period)
+        checks.append((share < 0.5,
+                       f"detect_fps {fps:.0f}（每帧 {period:.2f}ms）：每帧最后 {spin:.2f}ms 自旋，约占 {share:.0%} CPU"
+                       + ("" if share < 0.5 else "，可降低 detect_fps 或设为 0（不限帧率）")))
+    return checks
+
+
+# ============ 查看本机计时特性 ============
+if __name__ == "__main__":
+    import argparse
+
+    from engine import DEFAULT_CONFIG, CONFIG_FILE
+
+    parser = argparse.ArgumentParser(description="测量本机计时特性，检查配置的间隔能否达到")
+    parser.add_argument("--config", default=CONFIG_FILE)
+    parser.add_argument("--profile", help=f"计时特性文件（默认取 config 的 timer_profile_file 或 {TIMER_PROFILE_FILE}）")
+    parser.add_argument("--recalibrate", action="store_true", help="重新测量")
+    parser.add_argument("--clicks", nargs=2, type=int, metavar=("X", "Y"),
+                        help="同时测量输入后端单次点击耗时（会在该位置真实点击 200 次）")
+    parser.add_argument("--backend", help="测量点击用的输入后端（默认 config 的 input_backend）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    args = parser.parse_args()
+
+    config = dict(DEFAULT_CONFIG)
+    if os.path.exists(args.config):
+        with open(args.config, "r", encoding="utf-8") as f:
+            config.update({k: v for k, v in json.load(f).items() if k in config})
+    profile = TimerProfile.load(args.profile or config["timer_profile_file"] or TIMER_PROFILE_FILE)
+    entry = profile.ensure(args.recalibrate)
+    if args.clicks:
+        from input_backend import create_backend, measure_click_cost
+
+        backend = create_backend(args.backend or config["input_backend"])
+        mean, median, worst = measure_click_cost(backend, args.clicks)
+        backend.close()
+        entry["click_us"] = {"backend": backend.name, "mean": mean, "median": median, "max": worst}
+        profile.save()
+
+    checks = check_config(entry, config)
+    if args.json:
+        print(json.dumps({"host": host_key(), "profile": entry,
+                          "checks": [{"ok": ok, "text": text} for ok, text in checks]}, indent=2, ensure_ascii=False))
+    else:
+        print(f"🖥️ {host_key()}（{entry['signature']}）")
+        print(f"  计时器分辨率 {entry['resolution_us']:.3f}µs")
+        for seconds, s in entry["sleep_overshoot_ms"].items():
+            print(f"  sleep {float(seconds) * 1000:5.1f}ms 超调: p50 {s['p50']:.3f}ms / p99 {s['p99']:.3f}ms / "
+                  f"max {s['max']:.3f}ms")
+        late = entry["lateness_ms"]
+        print(f"  自旋阈值 {entry['spin'] * 1000:.2f}ms → 截止时间误差 p50 {late['p50']:.3f}ms / "
+              f"p99 {late['p99']:.3f}ms，每 {DEADLINE_INTERVAL * 1000:.0f}ms 一次时自旋占 {entry['spin_cpu']:.0%} CPU")
+        if "click_us" in entry:
+            c = entry["click_us"]
+            print(f"  单次点击（{c['backend']}）: 平均 {c['mean']:.1f}µs / 中位 {c['median']:.1f}µs / "
+                  f"最大 {c['max']:.1f}µs")
+        for ok, text in checks:
+            print(f"{'✅' if ok else '⚠️'} {text}")
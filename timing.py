@@ -0,0 +1,90 @@
+# timing.py
+# 时钟抽象 + 截止时间等待：按单调时钟上的绝对目标时间点触发，避免每轮误差累积
+
+import time
+
+# 最后这段时间改为自旋等待，绕开 sleep 的调度粒度
+SPIN_THRESHOLD = 0.001
+
+
+def wait_until(deadline, clock=time.perf_counter, sleep=time.sleep, spin=SPIN_THRESHOLD):
+    """先 sleep 到截止时间前 spin 秒，再自旋到截止时间，返回实际到达时间"""
+    remaining = deadline - clock()
+    if remaining > spin:
+        sleep(remaining - spin)
+    now = clock()
+    while now < deadline:
+        now = clock()
+    return now
+
+
+def sleep_until(deadline, clock=None, cancel=None):
+    """先 sleep 到截止时间前 clock.spin 秒，再等到截止时间；返回 (实际时间, sleep 超调)
+
+    cancel（threading.Event）被设置时立即返回当前时间，不再等到截止时间。
+    """
+    clock = clock or SYSTEM_CLOCK
+    wake = deadline - clock.spin
+    remaining = wake - clock.perf_counter()
+    overshoot = 0.0
+    if remaining > 0:
+        clock.sleep(remaining, cancel)
+        if cancel is not None and cancel.is_set():
+            return clock.perf_counter(), 0.0
+        overshoot = clock.perf_counter() - wake
+    return clock.wait_until(deadline), overshoot
+
+
+class SystemClock:
+    """真实时钟：time() 用于显示和工作/休息周期，perf_counter() 用于精确调度
+
+    spin 为截止时间前改为自旋的时长，引擎按本机计时特性（timer_profile.py）调整。
+    """
+
+    def __init__(self, spin=SPIN_THRESHOLD):
+        self.spin = spin
+
+    def time(self):
+        return time.time()
+
+    def perf_counter(self):
+        return time.perf_counter()
+
+    def sleep(self, seconds, cancel=None):
+        """等待 seconds 秒；给出 cancel（threading.Event）时被设置即提前返回"""
+        if seconds > 0:
+            if cancel is None:
+                time.sleep(seconds)
+            else:
+                cancel.wait(seconds)
+
+    def wait_until(self, deadline):
+        return wait_until(deadline, spin=self.spin)
+
+
+class VirtualClock:
+    """虚拟时钟：sleep 只推进内部时间，用于快进模拟"""
+
+    spin = 0.0
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+    def sleep(self, seconds, cancel=None):
+        if seconds > 0 and not (cancel is not None and cancel.is_set()):
+            self.now += seconds
+
+    def wait_until(self, deadline):
+        if deadline > self.now:
+            self.now = deadline
+        return self.now
+
+
+SYSTEM_CLOCK = SystemClock()
+
@@ -0,0 +1,60 @@
+# ui_channel.py
+# 工作线程 -> Tk 主线程的消息通道：工作线程只往队列里放消息（不会阻塞），
+# Tk 线程用 after() 定时取出并执行；同一 key 的更新（如状态栏）在一次取出中只执行最后一条
+
+import queue
+
+
+class UIChannel:
+    """Tk 控件只能在主线程操作，其它线程通过 post / call 把界面更新交给主线程"""
+
+    def __init__(self, root=None, interval=50):
+        self.root = root
+        self.interval = interval  # 取出间隔（毫秒）
+        self._queue = queue.SimpleQueue()
+        self._job = None
+        self.posted = 0   # 累计消息数
+        self.merged = 0   # 被同 key 后续消息覆盖而跳过的条数
+
+    def post(self, key, fn, *args):
+        """可合并的更新：同一 key 只执行最新一条"""
+        self.posted += 1
+        self._queue.put((key, fn, args))
+
+    def call(self, fn, *args):
+        """不合并的调用（弹窗、按钮状态等），按顺序执行"""
+        self.posted += 1
+        self._queue.put((None, fn, args))
+
+    def drain(self):
+        """在 Tk 线程中执行队列里的全部消息，返回执行条数"""
+        items = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        last = {key: i for i, (key, _, _) in enumerate(items) if key is not None}
+        done = 0
+        for i, (key, fn, args) in enumerate(items):
+            if key is not None and last[key] != i:
+                self.merged += 1
+                continue
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"⚠️ 界面更新失败: {e}")
+            done += 1
+        return done
+
+    def start(self):
+        self._tick()
+
+    def _tick(self):
+        self.drain()
+        self._job = self.root.after(self.interval, self._tick)
+
+    def stop(self):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None